@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(__file__).parent
+# modules of benchmarks are imported by name, the folder is not a package
+sys.path.insert(0, str(BENCH_DIR))
+
+from scenarios import compare, load_results, save_results  # noqa: E402
+
+from mko_data_cleaner.core.init_service import init_project  # noqa: E402
+
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+RESULTS_FILE = BENCH_DIR / "results" / "latest.json"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--update-baseline",
+        action="store_true",
+        help="save measured results as the new baseline instead of comparing",
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=1.5,
+        help="max ratio of measured to baseline total time (default: 1.5)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("-m"):
+        return
+    skip = pytest.mark.skip(reason="benchmark, use -m slow to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def bench_service():
+    # app_service module configures logging from user settings on import
+    init_project(force=False)
+    from mko_data_cleaner.core.app_service import AppService
+    from mko_data_cleaner.core.paths import APP_PATHS, PathResolver
+
+    return AppService(app_paths=APP_PATHS, resolver=PathResolver(APP_PATHS.user_dir))
+
+
+@pytest.fixture(scope="session")
+def baseline(request):
+    results = {}
+    yield load_results(BASELINE_FILE), results
+    if not results:
+        return
+    save_results(RESULTS_FILE, results)
+    if request.config.getoption("--update-baseline"):
+        save_results(BASELINE_FILE, {**load_results(BASELINE_FILE), **results})
+
+
+@pytest.fixture
+def bench_check(baseline, request):
+    """
+    Record result of a benchmark by key and compare its total seconds
+    with the baseline.
+    """
+    stored, results = baseline
+    update = request.config.getoption("--update-baseline")
+    tolerance = request.config.getoption("--bench-tolerance")
+
+    def check(key: str, result: dict):
+        results[key] = result
+        if update or key not in stored:
+            return
+        ratios = compare(result, stored[key])
+        print("vs baseline: " + ", ".join(f"{k} x{v:.2f}" for k, v in ratios.items()))
+        assert ratios["total"] <= tolerance, (
+            f"{key} is {ratios['total']:.2f} times slower than baseline"
+        )
+
+    return check
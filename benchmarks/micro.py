@@ -0,0 +1,154 @@
+"""
+Helpers of micro-benchmarks: timing of a single call and databases
+pre-built by the sqlite pipeline for benchmarks of DBWorker phases.
+"""
+
+import shutil
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+from scenarios import Scenario, bench_config
+from synthetic import make_report
+
+from mko_data_cleaner.core.csv_service import CSVWorker
+from mko_data_cleaner.core.db_service import DBWorker
+from mko_data_cleaner.core.dict_service import MappingDict
+from mko_data_cleaner.core.models import ActionType
+from mko_data_cleaner.core.run_metrics import RunMetrics
+
+
+def measure(
+    run: Callable[[Any], Any],
+    setup: Callable[[], Any] = lambda: None,
+    teardown: Callable[[Any], Any] = lambda _: None,
+    repeat: int = 3,
+) -> tuple[float, Any]:
+    """
+    Best wall time of `run(setup())` over repeats, setup and teardown
+    are not timed.
+    :return: seconds and result of the last run
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        arg = setup()
+        try:
+            start = time.perf_counter()
+            result = run(arg)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            teardown(arg)
+    return best, result
+
+
+def csv_worker(service, root: Path, scenario: Scenario) -> CSVWorker:
+    """CSVWorker of report folder with benchmark config set to service."""
+    service.app_config = bench_config(scenario)
+    service.base_path = root
+    config = service.app_config
+    return CSVWorker(
+        data_path=service.import_path,
+        data_settings=config.data_file_settings.model_dump(),
+        reader_settings=config.read_settings.from_csv.model_dump(),
+        dict_path=service.dict_path,
+        dict_settings=config.dict_file_settings.model_dump(),
+        export_path=service.export_path,
+        export_settings=service.export_settings,
+    )
+
+
+class PrebuiltDB:
+    """
+    Snapshots of a database at the stages of the sqlite pipeline:
+    `indexed` - data loaded and indexed, `matched` - rules matched,
+    `deleted` - DELETE rules applied, `applied` - all rules applied.
+    Tables are persistent, so a snapshot can be reopened by `open`.
+    """
+
+    STAGES = ("indexed", "matched", "deleted", "applied")
+
+    def __init__(self, service, root: Path, scenario: Scenario):
+        self.root = root
+        self.scenario = scenario
+        make_report(root, scenario.data, scenario.dictionary)
+        self._csv_worker = csv_worker(service, root, scenario)
+        config = service.app_config
+        self._db_params = dict(
+            tbl_name=config.database_settings.table_name,
+            index_column=config.data_file_settings.index_column,
+            date_column=self._csv_worker.check_date_column(
+                config.data_file_settings.date_column
+            ),
+            use_temp_tables=False,
+        )
+        self.separator = config.dict_file_settings.add_separator
+        self.mapping_dict = MappingDict(
+            data=self._csv_worker.get_dictionary(),
+            action_col_indexes=config.dict_file_settings.col_indexes,
+        )
+        self._build(service)
+
+    def snapshot_path(self, stage: str) -> Path:
+        return self.root / f"{stage}.db"
+
+    def _worker(self, db_file: Path) -> DBWorker:
+        db_worker = DBWorker(db_file=db_file, **self._db_params)
+        db_worker.set_data_tbl_columns(
+            *self._csv_worker.source_headers,
+            extra_cols=self.mapping_dict.extra_col_names,
+        )
+        return db_worker
+
+    def _snapshot(self, db_worker: DBWorker, stage: str):
+        with sqlite3.connect(self.snapshot_path(stage)) as target:
+            db_worker.db_con.backup(target)
+
+    def _build(self, service):
+        mapping_dict = self.mapping_dict
+        metrics = RunMetrics("sqlite")
+        with self._worker(self.root / "build.db") as db_worker:
+            mapping_dict.build_mapping(
+                *db_worker.data_tbl_columns, extra_col_names=db_worker.extra_columns
+            )
+            db_worker.search_columns = sorted(mapping_dict.search_columns)
+            self.search_columns = db_worker.search_columns
+            with db_worker.transaction():
+                db_worker.create_table_with_index()
+                db_worker.create_rules_matches()
+                if not mapping_dict.fts_data.is_empty():
+                    db_worker.link_search_table()
+            service._import_data(db_worker, self._csv_worker, metrics)
+            service._index_data(db_worker)
+            self._snapshot(db_worker, "indexed")
+
+            with db_worker.transaction():
+                service._insert_matches(db_worker, mapping_dict, metrics)
+            self._snapshot(db_worker, "matched")
+
+            for action, data in mapping_dict.generate_rules_blocks():
+                with db_worker.transaction():
+                    db_worker.frame_to_sql(data, "mapping_table")
+                    db_worker.apply_mapping(
+                        mapping_table="mapping_table",
+                        action_type=action,
+                        extra_cols=data.columns.copy(),
+                        separator=self.separator,
+                    )
+                if action == ActionType.DELETE:
+                    self._snapshot(db_worker, "deleted")
+            self._snapshot(db_worker, "applied")
+
+    def open(self, stage: str, db_file: Path) -> DBWorker:
+        """Worker on a copy of the snapshot, the copy is deleted on close."""
+        shutil.copy(self.snapshot_path(stage), db_file)
+        db_worker = self._worker(db_file)
+        db_worker.search_columns = self.search_columns
+        # tables exist, restores names of the index table in the worker
+        db_worker.create_table_with_index()
+        return db_worker
+
+    def rules_block(self, action: ActionType) -> pl.DataFrame:
+        return dict(self.mapping_dict.generate_rules_blocks())[action]
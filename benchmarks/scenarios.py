@@ -0,0 +1,114 @@
+"""
+Grid of end-to-end benchmark scenarios and their runner.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+from synthetic import DataSpec, DictSpec, make_report
+
+from mko_data_cleaner.core import utils
+from mko_data_cleaner.core.models import DataFileExtension, DataSettings
+from mko_data_cleaner.core.paths import APP_PATHS
+
+
+class Scenario(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    name: str
+    data: DataSpec
+    dictionary: DictSpec
+
+
+def rules_spec(total: int) -> DictSpec:
+    """Dictionary of `total` rules: 40% full match, 30% partial, 10% s, e, fts."""
+    tenth = total // 10
+    return DictSpec(
+        full_match=total - 6 * tenth,
+        partial=3 * tenth,
+        starts_with=tenth,
+        ends_with=tenth,
+        fts=tenth,
+    )
+
+
+SCENARIOS = [
+    Scenario(
+        name="small",
+        data=DataSpec(rows=10_000, files=2, cardinality=1_000),
+        dictionary=rules_spec(200),
+    ),
+    Scenario(
+        name="medium",
+        data=DataSpec(rows=50_000, files=4, cardinality=10_000),
+        dictionary=rules_spec(2_000),
+    ),
+    Scenario(
+        name="medium_csv",
+        data=DataSpec(rows=50_000, files=4, cardinality=10_000, gzip=False),
+        dictionary=rules_spec(2_000),
+    ),
+    Scenario(
+        name="large",
+        data=DataSpec(rows=125_000, files=8, cardinality=50_000),
+        dictionary=rules_spec(10_000),
+    ),
+]
+
+
+def bench_config(scenario: Scenario) -> DataSettings:
+    """
+    Default config of the package for cold runs: no match cache
+    and no compiled dictionary cache.
+    """
+    config = DataSettings(
+        **utils.yaml_to_dict(APP_PATHS.app_settings_dir / "app_config.yaml")
+    )
+    config.data_file_settings.extension = (
+        DataFileExtension.gz if scenario.data.gzip else DataFileExtension.csv
+    )
+    config.dict_file_settings.compiled_cache = False
+    config.database_settings.match_cache = False
+    config.database_settings.incremental = False
+    config.database_settings.profile = False
+    return config
+
+
+def run_scenario(service, root: Path, scenario: Scenario, engine: str) -> dict:
+    """Generate report folder, run it and return seconds and counters by phase."""
+    make_report(root, scenario.data, scenario.dictionary)
+    service.app_config = bench_config(scenario)
+    report = service.run_report(root, engine=engine).report()
+    return {
+        "total_seconds": report["total_seconds"],
+        "peak_rss_mb": report["peak_rss_mb"],
+        "rows": scenario.data.rows * scenario.data.files,
+        "rules": scenario.dictionary.model_dump(),
+        "phases": report["phases"],
+    }
+
+
+def compare(result: dict, baseline: dict) -> dict[str, float]:
+    """Ratio of measured to baseline seconds: total and each common phase."""
+    ratios = {"total": result["total_seconds"] / baseline["total_seconds"]}
+    for phase, counters in result["phases"].items():
+        base = baseline["phases"].get(phase, {}).get("seconds")
+        if base:
+            ratios[phase] = counters["seconds"] / base
+    return ratios
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf8"))
+
+
+def save_results(path: Path, results: dict[str, Any]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(results, ensure_ascii=False, indent=2, sort_keys=True),
+        encoding="utf8",
+    )
+    return path
@@ -0,0 +1,195 @@
+"""
+Generators of synthetic Mediascope-like reports for benchmarks.
+
+A report folder gets `raw_data` files with the columns of a Mediascope
+export and `dict/merged_dictionary.csv` with rules matching its values,
+the layout expected by the default `app_config.yaml`.
+"""
+
+import random
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+from pydantic import BaseModel, ConfigDict, PositiveInt
+
+DATA_COLUMNS = [
+    "researchDate",
+    "AdId",
+    "ADVERTISERS",
+    "BRANDS",
+    "SUBBRANDS",
+    "MEDIA",
+    "COST RUB",
+]
+DICT_COLUMNS = [
+    "action",
+    "match",
+    "search_column_idx",
+    "note",
+    "term",
+    "CAT",
+    "BRAND CLEAN",
+    "TAG",
+]
+# search columns of rules: index of the column in DATA_COLUMNS
+SEARCH_COLUMNS = {"ADVERTISERS": 2, "BRANDS": 3, "SUBBRANDS": 4}
+
+SYLLABLES = [
+    "ka", "ro", "mi", "ta", "ne", "lo", "su", "vi", "de", "pa",
+    "ба", "ко", "ли", "ма", "ну", "ре", "со", "та", "фе", "ши",
+]  # fmt: skip
+MEDIA = ["TV", "TV_REG", "OUTDOOR", "RADIO", "INTERNET"]
+
+
+class DataSpec(BaseModel):
+    """Size of synthetic data."""
+
+    model_config = ConfigDict(frozen=True)
+    rows: PositiveInt = 10_000  # rows per file
+    files: PositiveInt = 2
+    cardinality: PositiveInt = 1_000  # distinct brands, other columns scale with it
+    gzip: bool = True
+    seed: int = 1
+
+
+class DictSpec(BaseModel):
+    """Counts of rules by match type and shares of actions."""
+
+    model_config = ConfigDict(frozen=True)
+    full_match: int = 50  # f
+    partial: int = 50  # p
+    starts_with: int = 20  # s
+    ends_with: int = 20  # e
+    fts: int = 10
+    delete_share: float = 0.05
+    add_share: float = 0.2  # the rest of rules are REPLACE
+    seed: int = 1
+
+
+def _words(rnd: random.Random, count: int, min_words: int, max_words: int) -> list:
+    """Distinct names of 1-3 words built from latin and cyrillic syllables."""
+    names: set[str] = set()
+    while len(names) < count:
+        words = [
+            "".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 3)))
+            for _ in range(rnd.randint(min_words, max_words))
+        ]
+        name = " ".join(words)
+        names.add(name.upper() if rnd.random() < 0.7 else name.title())
+    return sorted(names)
+
+
+def vocabulary(spec: DataSpec) -> dict[str, list[str]]:
+    """Distinct values of search columns."""
+    rnd = random.Random(spec.seed)
+    return {
+        "ADVERTISERS": _words(rnd, max(spec.cardinality // 4, 1), 1, 2),
+        "BRANDS": _words(rnd, spec.cardinality, 1, 2),
+        "SUBBRANDS": _words(rnd, spec.cardinality * 2, 2, 3),
+    }
+
+
+def make_data(raw_path: Path, spec: DataSpec) -> list[Path]:
+    """
+    Write data files of `spec.rows` rows to raw_path.
+    Each AdId has fixed advertiser, brand and subbrand, so AdId
+    repeats over rows and files like in real exports.
+    """
+    raw_path.mkdir(parents=True, exist_ok=True)
+    vocab = vocabulary(spec)
+
+    def sample(values: pl.Series, n: int, seed: int) -> pl.Series:
+        return values.sample(n, with_replacement=True, seed=seed)
+
+    ads_count = spec.cardinality * 4
+    ads = pl.DataFrame(
+        {
+            "AdId": pl.int_range(1, ads_count + 1, eager=True).cast(pl.Utf8),
+            **{
+                col: sample(pl.Series(values), ads_count, spec.seed + i)
+                for i, (col, values) in enumerate(vocab.items())
+            },
+        }
+    )
+    dates = pl.date_range(date(2024, 1, 1), date(2024, 12, 31), eager=True).cast(
+        pl.Utf8
+    )
+    costs = pl.int_range(1, 10**6, eager=True).cast(pl.Utf8)
+    files = []
+    for i in range(spec.files):
+        seed = spec.seed * 1000 + i
+        df = ads.sample(spec.rows, with_replacement=True, seed=seed).with_columns(
+            researchDate=sample(dates, spec.rows, seed),
+            MEDIA=sample(pl.Series(MEDIA), spec.rows, seed),
+            **{"COST RUB": sample(costs, spec.rows, seed)},
+        )
+        ext = ".csv.gz" if spec.gzip else ".csv"
+        file = raw_path / f"part_{i:03d}{ext}"
+        df.select(DATA_COLUMNS).write_csv(
+            file, separator=";", compression="gzip" if spec.gzip else "uncompressed"
+        )
+        files.append(file)
+    return files
+
+
+def _term(rnd: random.Random, value: str, match: str) -> str:
+    word = rnd.choice(value.split())
+    match match:
+        case "p":
+            start = rnd.randint(0, max(len(word) - 3, 0))
+            return word[start : start + 3]
+        case "s":
+            return value[:4]
+        case "e":
+            return value[-3:]
+        case "fts":
+            return word
+        case _:
+            return value
+
+
+def make_dictionary(dict_file: Path, data_spec: DataSpec, spec: DictSpec) -> Path:
+    """Write dictionary with rules matching values of data generated by data_spec."""
+    dict_file.parent.mkdir(parents=True, exist_ok=True)
+    vocab = vocabulary(data_spec)
+    rnd = random.Random(spec.seed)
+    cats = [f"CAT {i}" for i in range(50)]
+    tags = [f"TAG {i}" for i in range(100)]
+
+    counts = {
+        "f": spec.full_match,
+        "p": spec.partial,
+        "s": spec.starts_with,
+        "e": spec.ends_with,
+        "fts": spec.fts,
+    }
+    rules = []
+    for match, count in counts.items():
+        for _ in range(count):
+            column = rnd.choices(list(SEARCH_COLUMNS), weights=(1, 4, 2))[0]
+            value = rnd.choice(vocab[column])
+            term = _term(rnd, value, match)
+            roll = rnd.random()
+            if roll < spec.delete_share:
+                action, extra = "d", [None, None, None]
+            elif roll < spec.delete_share + spec.add_share:
+                action, extra = "a", [None, None, rnd.choice(tags)]
+            else:
+                action = "r"
+                extra = [rnd.choice(cats), value if rnd.random() < 0.5 else None, None]
+            rules.append(
+                [action, match, str(SEARCH_COLUMNS[column]), None, term, *extra]
+            )
+    rnd.shuffle(rules)
+    pl.DataFrame(rules, schema=DICT_COLUMNS, orient="row").write_csv(
+        dict_file, separator=";"
+    )
+    return dict_file
+
+
+def make_report(root: Path, data_spec: DataSpec, dict_spec: DictSpec) -> Path:
+    """Create report folder with data files and dictionary."""
+    make_data(root / "raw_data", data_spec)
+    make_dictionary(root / "dict" / "merged_dictionary.csv", data_spec, dict_spec)
+    return root
@@ -0,0 +1,247 @@
+import polars as pl
+import pytest
+from micro import PrebuiltDB, measure
+from scenarios import Scenario, bench_config, rules_spec
+from synthetic import DATA_COLUMNS, DataSpec, make_dictionary
+
+from mko_data_cleaner.core.dict_service import MappingDict
+from mko_data_cleaner.core.models import (
+    ActionType,
+    DictColumnsIndexes,
+    MappingColumns,
+    MatchType,
+)
+from mko_data_cleaner.core.utils import clean_names
+
+DICT_RULES = [10**3, 10**4, 10**5, 10**6]
+DICT_DATA = DataSpec(cardinality=10_000)
+# terms of big dictionaries repeat a lot, suffixing of repeated names
+# in clean_names is quadratic, 10^6 terms take minutes
+CLEAN_NAMES = DICT_RULES[:-1]
+
+DB_RULES = [10**3, 10**4]
+DB_DATA = DataSpec(rows=50_000, files=2, cardinality=1_000)
+# DELETE rules of short terms remove most of the data, their number is fixed,
+# so REPLACE and ADD phases of all sizes run on tables of similar size
+DB_DELETE_RULES = 10
+
+
+def _scenario(data: DataSpec, rules: int, **dictionary) -> Scenario:
+    return Scenario(
+        name=f"rules_{rules}",
+        data=data,
+        dictionary=rules_spec(rules).model_copy(update=dictionary),
+    )
+
+
+def _result(seconds: float, **counters) -> dict:
+    print(f"\n{seconds:.4f}s {counters}")
+    return {"total_seconds": seconds, "phases": {}, **counters}
+
+
+@pytest.fixture(scope="module")
+def dictionaries(tmp_path_factory):
+    """Raw dictionary frames by number of rules."""
+    frames = {}
+
+    def get(rules: int) -> pl.DataFrame:
+        if rules not in frames:
+            scenario = _scenario(DICT_DATA, rules)
+            file = make_dictionary(
+                tmp_path_factory.mktemp("dict") / "merged_dictionary.csv",
+                scenario.data,
+                scenario.dictionary,
+            )
+            reader_settings = bench_config(scenario).read_settings.from_csv
+            frames[rules] = pl.read_csv(file, **reader_settings.model_dump())
+        return frames[rules]
+
+    return get
+
+
+def _mapping_dict(frame: pl.DataFrame) -> MappingDict:
+    return MappingDict(data=frame.clone(), action_col_indexes=DictColumnsIndexes())
+
+
+def _build(mapping_dict: MappingDict) -> MappingDict:
+    extra_count = len(mapping_dict.extra_col_names)
+    columns = clean_names(*DATA_COLUMNS, *mapping_dict.extra_col_names)
+    mapping_dict.build_mapping(*columns, extra_col_names=columns[-extra_count:])
+    return mapping_dict
+
+
+@pytest.fixture(scope="module")
+def compiled(dictionaries):
+    """Compiled dictionaries by number of rules."""
+    mapping_dicts = {}
+
+    def get(rules: int) -> MappingDict:
+        if rules not in mapping_dicts:
+            mapping_dicts[rules] = _build(_mapping_dict(dictionaries(rules)))
+        return mapping_dicts[rules]
+
+    return get
+
+
+@pytest.fixture(scope="module")
+def prebuilt(bench_service, tmp_path_factory):
+    """Pre-built databases by number of rules."""
+    databases = {}
+
+    def get(rules: int) -> PrebuiltDB:
+        if rules not in databases:
+            databases[rules] = PrebuiltDB(
+                bench_service,
+                tmp_path_factory.mktemp(f"db_{rules}"),
+                _scenario(DB_DATA, rules, delete_share=DB_DELETE_RULES / rules),
+            )
+        return databases[rules]
+
+    return get
+
+
+# ---------------------------------------------------------
+# dictionary compilation
+# ---------------------------------------------------------
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DICT_RULES)
+def test_build_mapping(rules, dictionaries, bench_check):
+    seconds, _ = measure(
+        _build, setup=lambda: _mapping_dict(dictionaries(rules)), repeat=3
+    )
+    bench_check(f"build_mapping-{rules}", _result(seconds, rules=rules))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DICT_RULES)
+def test_build_fts_query(rules, compiled, bench_check):
+    mapping_dict = compiled(rules)
+    fts_data = mapping_dict.data.filter(pl.col(MappingColumns.match) == MatchType.FTS)
+    seconds, queries = measure(lambda _: mapping_dict._build_fts_query(fts_data))
+    bench_check(f"build_fts_query-{rules}", _result(seconds, rules=queries.height))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DICT_RULES)
+def test_generate_rules_blocks(rules, compiled, bench_check):
+    mapping_dict = compiled(rules)
+    seconds, blocks = measure(lambda _: list(mapping_dict.generate_rules_blocks()))
+    bench_check(f"generate_rules_blocks-{rules}", _result(seconds, blocks=len(blocks)))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", CLEAN_NAMES)
+def test_clean_names(rules, dictionaries, bench_check):
+    names = dictionaries(rules)["term"].to_list()
+    seconds, _ = measure(lambda _: clean_names(*names))
+    bench_check(f"clean_names-{rules}", _result(seconds, names=len(names)))
+
+
+# ---------------------------------------------------------
+# DBWorker phases on pre-built databases
+# ---------------------------------------------------------
+
+
+def _db_phase(prebuilt_db: PrebuiltDB, stage: str, tmp_path, prepare=None):
+    """Setup and teardown of a phase run on a fresh copy of the snapshot."""
+    counter = iter(range(10**6))
+
+    def setup():
+        db_worker = prebuilt_db.open(stage, tmp_path / f"{stage}_{next(counter)}.db")
+        if prepare:
+            prepare(db_worker)
+        return db_worker
+
+    return {"setup": setup, "teardown": lambda db_worker: db_worker.close()}
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DB_RULES)
+def test_insert_matches(rules, prebuilt, bench_check, tmp_path):
+    prebuilt_db = prebuilt(rules)
+    like_data = prebuilt_db.mapping_dict.like_data.filter(
+        pl.col(MappingColumns.match).is_in(
+            [MatchType.PARTIAL_MATCH, MatchType.ENDS_WITH]
+        )
+    ).select(
+        MappingColumns.mapping_index, MappingColumns.column_name, MappingColumns.pattern
+    )
+
+    def run(db_worker):
+        with db_worker.transaction():
+            return db_worker.insert_matches(mapping_table="temp_tbl")
+
+    seconds, matches = measure(
+        run,
+        **_db_phase(
+            prebuilt_db,
+            "indexed",
+            tmp_path,
+            lambda db_worker: db_worker.frame_to_sql(like_data, "temp_tbl"),
+        ),
+    )
+    bench_check(
+        f"insert_matches-{rules}",
+        _result(seconds, rules=like_data.height, matches=matches),
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DB_RULES)
+def test_apply_replace(rules, prebuilt, bench_check, tmp_path):
+    prebuilt_db = prebuilt(rules)
+    block = prebuilt_db.rules_block(ActionType.REPLACE)
+
+    def run(db_worker):
+        with db_worker.transaction():
+            return db_worker._apply_replace("mapping_table", block.columns.copy())
+
+    seconds, rows = measure(
+        run,
+        **_db_phase(
+            prebuilt_db,
+            "deleted",
+            tmp_path,
+            lambda db_worker: db_worker.frame_to_sql(block, "mapping_table"),
+        ),
+    )
+    bench_check(f"apply_replace-{rules}", _result(seconds, rows=rows))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DB_RULES)
+def test_apply_add(rules, prebuilt, bench_check, tmp_path):
+    prebuilt_db = prebuilt(rules)
+    block = prebuilt_db.rules_block(ActionType.ADD)
+
+    def run(db_worker):
+        with db_worker.transaction():
+            return db_worker._apply_add(
+                "mapping_table", block.columns.copy(), prebuilt_db.separator
+            )
+
+    seconds, rows = measure(
+        run,
+        **_db_phase(
+            prebuilt_db,
+            "deleted",
+            tmp_path,
+            lambda db_worker: db_worker.frame_to_sql(block, "mapping_table"),
+        ),
+    )
+    bench_check(f"apply_add-{rules}", _result(seconds, rows=rows))
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("rules", DB_RULES)
+def test_sync_tables(rules, prebuilt, bench_check, tmp_path):
+    prebuilt_db = prebuilt(rules)
+
+    def run(db_worker):
+        with db_worker.transaction():
+            return db_worker.sync_with_data_table()
+
+    seconds, rows = measure(run, **_db_phase(prebuilt_db, "applied", tmp_path))
+    bench_check(f"sync_tables-{rules}", _result(seconds, **rows))
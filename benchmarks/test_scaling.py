@@ -0,0 +1,19 @@
+import pytest
+from scenarios import SCENARIOS, run_scenario
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("engine", ["sqlite", "polars"])
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[s.name for s in SCENARIOS])
+def test_scaling(scenario, engine, bench_service, bench_check, tmp_path):
+    key = f"{scenario.name}-{engine}"
+
+    result = run_scenario(bench_service, tmp_path / scenario.name, scenario, engine)
+
+    phases = ", ".join(
+        f"{phase} {counters['seconds']:.2f}s"
+        for phase, counters in result["phases"].items()
+    )
+    print(f"\n{key}: {result['total_seconds']:.2f}s ({phases})")
+
+    bench_check(key, result)
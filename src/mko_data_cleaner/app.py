@@ -3,14 +3,21 @@ mko_get_mediascope_data — основной публичный интерфей
 """
 
 import sys
+import time
+from collections.abc import Callable, Iterable
 from pathlib import Path
 from typing import Annotated
 
 import typer
 from rich.console import Console
+from rich.live import Live
+from rich.table import Table
 
 from mko_data_cleaner.core.app_service import app_service
+from mko_data_cleaner.core.batch_service import BatchJob, JobStatus
 from mko_data_cleaner.core.init_service import init_project
+from mko_data_cleaner.core.models import Engine
+from mko_data_cleaner.core.run_metrics import RunMetrics
 from mko_data_cleaner.core.utils import list_files_in_directory
 
 sys.stdout.reconfigure(line_buffering=True)
@@ -41,20 +48,144 @@ def run(
         typer.Argument(exists=True, dir_okay=True, help="Путь к директории отчета"),
     ],
     verbose: bool = typer.Option(True, "--verbose", "-v"),
+    engine: Annotated[
+        Engine | None,
+        typer.Option(
+            "--engine", "-e", help="Движок обработки (по умолчанию из настроек)"
+        ),
+    ] = None,
+    metrics: bool = typer.Option(
+        False, "--metrics", "-m", help="Показать сводку метрик по этапам обработки"
+    ),
 ):
     """Запустить выгрузку отчёта"""
     if verbose:
         console.print(f"[blue]▶ Запуск отчёта:[/blue] {report.name}")
 
     try:
-        app_service.run_report(report)
+        run_metrics = app_service.run_report(report, engine=engine)
         console.print("[green]✅ Отчёт успешно завершён[/green]")
+        if metrics:
+            console.print(metrics_table(run_metrics))
 
     except Exception as e:
         console.print(f"[red]❌ Ошибка:[/red] {e}")
         raise typer.Exit(1) from e
 
 
+def metrics_table(run_metrics: RunMetrics) -> Table:
+    """Сводная таблица метрик по этапам обработки"""
+    report = run_metrics.report()
+    table = Table(title=f"Метрики обработки ({report['engine']})")
+    table.add_column("Этап")
+    table.add_column("Время, с", justify="right")
+    table.add_column("Показатели")
+    for phase, counters in report["phases"].items():
+        values = ", ".join(
+            f"{name}={value:,}"
+            for name, value in counters.items()
+            if name != "seconds" and value is not None
+        )
+        table.add_row(phase, f"{counters['seconds']:.2f}", values)
+    peak_rss = report["peak_rss_mb"]
+    table.add_row(
+        "всего",
+        f"{report['total_seconds']:.2f}",
+        f"peak_rss_mb={peak_rss:,.0f}" if peak_rss is not None else "",
+    )
+    return table
+
+
+@app.command()
+def run_batch(
+    reports: Annotated[
+        list[str],
+        typer.Argument(help="Директории отчетов или glob-шаблоны, например 'data/*'"),
+    ],
+    engine: Annotated[
+        Engine | None,
+        typer.Option(
+            "--engine", "-e", help="Движок обработки (по умолчанию из настроек)"
+        ),
+    ] = None,
+    workers: Annotated[
+        int | None,
+        typer.Option(
+            "--workers", "-w", min=1, help="Число отчётов, обрабатываемых параллельно"
+        ),
+    ] = None,
+    memory_budget: Annotated[
+        int | None,
+        typer.Option(
+            "--memory-budget",
+            "-M",
+            min=1,
+            help="Бюджет памяти параллельных отчётов, МБ",
+        ),
+    ] = None,
+):
+    """Запустить выгрузку нескольких отчётов параллельно"""
+    jobs: list[BatchJob] = []
+    start = time.perf_counter()
+
+    def on_update(updated: list[BatchJob]):
+        jobs[:] = updated
+
+    try:
+        with Live(console=console, get_renderable=lambda: jobs_table(jobs)):
+            process_many(
+                reports,
+                engine=engine,
+                workers=workers,
+                memory_budget_mb=memory_budget,
+                on_update=on_update,
+            )
+    except Exception as e:
+        console.print(f"[red]❌ Ошибка:[/red] {e}")
+        raise typer.Exit(1) from e
+
+    failed = [job for job in jobs if job.status == JobStatus.FAILED]
+    console.print(
+        f"\nОтчётов: {len(jobs)}, успешно: {len(jobs) - len(failed)}, "
+        f"с ошибкой: {len(failed)}. Общее время: {time.perf_counter() - start:.1f} с"
+    )
+    for job in failed:
+        console.print(
+            f"[red]❌ {job.report.name}:[/red] {job.error} (лог: {job.log_file})"
+        )
+    if failed:
+        raise typer.Exit(1)
+    console.print("[green]✅ Все отчёты успешно завершены[/green]")
+
+
+JOB_STATUSES = {
+    JobStatus.PENDING: "[dim]ожидает[/dim]",
+    JobStatus.RUNNING: "[blue]выполняется[/blue]",
+    JobStatus.DONE: "[green]готово[/green]",
+    JobStatus.FAILED: "[red]ошибка[/red]",
+}
+
+
+def jobs_table(jobs: list[BatchJob]) -> Table:
+    """Статус отчётов пакетного запуска"""
+    table = Table(title="Пакетная обработка")
+    table.add_column("Отчёт")
+    table.add_column("Статус")
+    table.add_column("Время, с", justify="right")
+    table.add_column("Строк", justify="right")
+    table.add_column("Память, МБ", justify="right")
+    for job in jobs:
+        elapsed, rows, peak_rss = job.elapsed, job.rows, job.peak_rss_mb
+        table.add_row(
+            job.report.name,
+            JOB_STATUSES[job.status],
+            f"{elapsed:.1f}" if elapsed is not None else "",
+            f"{rows:,}" if rows is not None else "",
+            f"{peak_rss:,.0f}" if peak_rss is not None else "",
+        )
+    return table
+
+
 @app.command()
 def list_settings():
     """Показать все доступные файлы заданий"""
@@ -70,14 +201,39 @@ def list_settings():
 
 
 # Public API
-def process_data(report_path: str | Path) -> None:
+def process_data(
+    report_path: str | Path, engine: Engine | str | None = None
+) -> RunMetrics:
     """
     Асинхронная версия для async-окружений (например, FastAPI).
     """
     path = Path(report_path)
     if not path.exists():
         raise FileNotFoundError(f"Файл не найден: {path}")
-    app_service.run_report(path)
+    return app_service.run_report(path, engine=engine)
+
+
+def process_many(
+    reports: str | Path | Iterable[str | Path],
+    engine: Engine | str | None = None,
+    workers: int | None = None,
+    memory_budget_mb: int | None = None,
+    on_update: Callable[[list[BatchJob]], None] | None = None,
+) -> list[BatchJob]:
+    """
+    Параллельная обработка нескольких отчётов: пути или glob-шаблоны директорий.
+    Ошибка одного отчёта не останавливает остальные, статус, время и ошибка
+    каждого — в возвращаемом списке, лог — в директории отчёта.
+    """
+    if isinstance(reports, (str, Path)):
+        reports = [reports]
+    return app_service.run_batch(
+        reports,
+        engine=engine,
+        workers=workers,
+        memory_budget_mb=memory_budget_mb,
+        on_update=on_update,
+    )
 
 
 def initialize_settings(force: bool = False) -> Path:
@@ -91,9 +247,11 @@ if __name__ == "__main__":
 
 __all__ = [
     "process_data",
+    "process_many",
     "initialize_settings",
     "init",
     "run",
+    "run_batch",
     "list_settings",
     "app",
 ]
@@ -1,16 +1,40 @@
 import logging
 import logging.config
+import multiprocessing
+import os
+import sqlite3
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 from functools import cached_property
 from pathlib import Path
 
+import adbc_driver_sqlite.dbapi as adb
+import polars as pl
+
 import mko_data_cleaner.core.utils as utils
+from mko_data_cleaner.core.batch_service import BatchJob, BatchRunner, expand_reports
 from mko_data_cleaner.core.csv_service import CSVWorker
-from mko_data_cleaner.core.db_service import DBWorker
+from mko_data_cleaner.core.db_service import FILE_ID_COLUMN, DBWorker
 from mko_data_cleaner.core.dict_service import MappingDict
 from mko_data_cleaner.core.errors import ConfigError, DataValidationError
-from mko_data_cleaner.core.models import DataSettings, LoggingSettings, MappingColumns
+from mko_data_cleaner.core.matchers import normalize_expr, split_plain_rules
+from mko_data_cleaner.core.models import (
+    ActionType,
+    DataSettings,
+    Engine,
+    ExportFormat,
+    LoggingSettings,
+    MappingColumns,
+    Matcher,
+    MatchType,
+)
 from mko_data_cleaner.core.paths import APP_PATHS, AppPaths, PathResolver
+from mko_data_cleaner.core.polars_service import PolarsWorker
+from mko_data_cleaner.core.query_profiler import QueryProfiler
+from mko_data_cleaner.core.run_metrics import RunMetrics
+from mko_data_cleaner.core.shard_service import ShardSpool
 from mko_data_cleaner.core.utils import progress_bar
 
 logger = logging.getLogger("app_service")
@@ -63,6 +87,51 @@ class AppService:
     def db_path(self) -> Path:
         return Path(self.base_path, self.app_config.data_paths.db_file)
 
+    @property
+    def match_cache_path(self) -> Path | None:
+        if not self.app_config.database_settings.match_cache:
+            return None
+        return self.db_path.with_name(f"{self.db_path.stem}_match_cache.db")
+
+    @property
+    def profile_path(self) -> Path:
+        return Path(self.base_path, "sql_profile.json")
+
+    @property
+    def metrics_path(self) -> Path:
+        return Path(self.base_path, RunMetrics.FILE_NAME)
+
+    def compiled_dict_path(
+        self, *tbl_columns: str, extra_col_names: list[str]
+    ) -> Path | None:
+        """
+        Folder of the compiled dictionary keyed by hash of the dictionary
+        file and the columns layout, None if the cache is disabled.
+        """
+        dict_settings = self.app_config.dict_file_settings
+        if not dict_settings.compiled_cache:
+            return None
+        key = utils.content_hash(
+            MappingDict.COMPILED_VERSION,
+            utils.file_hash(self.dict_path),
+            tbl_columns,
+            extra_col_names,
+            dict_settings.model_dump(),
+            self.app_config.read_settings.from_csv.model_dump(),
+        )
+        return self.dict_path.parent / "compiled" / key
+
+    @property
+    def export_settings(self) -> dict:
+        """Writer settings of the selected export format."""
+        settings = self.app_config.export_settings
+        match settings.file_format:
+            case ExportFormat.PARQUET:
+                writer_settings = settings.to_parquet
+            case _:
+                writer_settings = settings.to_csv
+        return {"file_format": settings.file_format, **writer_settings.model_dump()}
+
     def prepare_log_paths(self):
         # logger files
         for handler in self.log_config.handlers.values():
@@ -72,11 +141,19 @@ class AppService:
                 handler["filename"] = file_path
 
     @staticmethod
-    def _import_data(db_worker, csv_worker):
+    def _normalized_columns(db_worker: DBWorker) -> list[pl.Expr]:
+        # normalized copies of search columns are used by all rule matchers
+        return [
+            normalize_expr(pl.col(col)).alias(norm_col)
+            for col, norm_col in db_worker.normalized_columns.items()
+        ]
+
+    def _load_chunks(self, db_worker: DBWorker, chunks: Iterable[pl.DataFrame]) -> int:
+        """Append chunks with normalized search columns to the data table."""
         rows_count = 0
-        col_count = len(csv_worker.source_headers)
-
-        for chunk in csv_worker.get_data_chunks(db_worker.data_tbl_columns[:col_count]):
+        normalized_columns = self._normalized_columns(db_worker)
+        for chunk in chunks:
+            chunk = chunk.with_columns(normalized_columns)
             rows_count += chunk.write_database(
                 table_name=db_worker.data_tbl_name,
                 connection=db_worker.db_adb_con,
@@ -87,18 +164,163 @@ class AppService:
         db_worker.db_adb_con.commit()
 
         logger.info(f"{rows_count:,} rows were loaded to data table")
+        return rows_count
+
+    def _import_data(self, db_worker, csv_worker, metrics: RunMetrics) -> int:
+        col_count = len(csv_worker.source_headers)
+        chunks = csv_worker.get_file_chunks(db_worker.data_tbl_columns[:col_count])
+        return self._load_chunks(
+            db_worker, (chunk for _, chunk in metrics.track_files(chunks))
+        )
+
+    @staticmethod
+    def _index_data(db_worker: DBWorker):
+        with db_worker.transaction():
+            db_worker.update_index_from_data()
+            db_worker.create_search_indexes()
+            db_worker.build_distinct_values()
+
+    def _import_new_data(
+        self,
+        db_worker: DBWorker,
+        csv_worker: CSVWorker,
+        rules_changed: bool,
+        metrics: RunMetrics,
+    ) -> int:
+        """
+        Incremental mode: load only new or changed files to the raw data table,
+        then refresh rows of affected keys in the data table.
+        """
+        rows_count = 0
+        normalized_columns = self._normalized_columns(db_worker)
 
-        db_worker.update_index_from_data()
+        files = db_worker.sync_manifest(csv_worker.data_files)
+        # files stay pending in manifest until all of them are loaded
+        file_ids = {file: db_worker.register_file(file) for file in files}
 
-    def run_report(self, data_path: str | Path):
+        chunks = csv_worker.get_file_chunks(db_worker.main_columns, files)
+        for file, chunk in metrics.track_files(chunks):
+            chunk = chunk.with_columns(
+                *normalized_columns, pl.lit(file_ids[file]).alias(FILE_ID_COLUMN)
+            )
+            rows_count += chunk.write_database(
+                table_name=db_worker.raw_tbl_name,
+                connection=db_worker.db_adb_con,
+                engine="adbc",
+                if_table_exists="append",
+            )
+            logger.debug(f"write_database → {rows_count:,} rows")
+        db_worker.db_adb_con.commit()
+
+        with db_worker.transaction():
+            for file, file_id in file_ids.items():
+                db_worker.file_loaded(file_id, file)
+        logger.info(f"{rows_count:,} rows were loaded to raw data table")
+
+        with db_worker.transaction():
+            db_worker.refresh_data_table(all_keys=rules_changed)
+        return rows_count
+
+    def _ingest_keys(
+        self, db_worker: DBWorker, mapping_dict: MappingDict
+    ) -> tuple[str, str]:
+        """Hashes of data layout and of rules kept with the database."""
+        layout_key = utils.content_hash(
+            db_worker.data_tbl_columns,
+            db_worker.main_columns,
+            sorted(db_worker.search_columns),
+            db_worker.index_column,
+            db_worker.date_column,
+            self.app_config.read_settings.from_csv.model_dump(),
+        )
+        rules_key = utils.content_hash(
+            mapping_dict.data.write_csv(),
+            self.app_config.dict_file_settings.add_separator,
+        )
+        return layout_key, rules_key
+
+    def _insert_matches(
+        self, db_worker: DBWorker, mapping_dict: MappingDict, metrics: RunMetrics
+    ):
+        # importing fts rules to db
+        if not mapping_dict.fts_data.is_empty():
+            db_worker.frame_to_sql(
+                mapping_dict.fts_data.select(
+                    [
+                        MappingColumns.mapping_index,
+                        MappingColumns.pattern,
+                    ]
+                ),
+                "fts_temp_tbl",
+            )
+            metrics.count(
+                "match", "fts", db_worker.insert_matches_from_fts("fts_temp_tbl")
+            )
+
+        like_columns = [
+            MappingColumns.mapping_index,
+            MappingColumns.column_name,
+            MappingColumns.pattern,
+        ]
+        plain_columns = [
+            MappingColumns.mapping_index,
+            MappingColumns.column_name,
+            MappingColumns.term,
+        ]
+        like_data = mapping_dict.like_data
+        if like_data.is_empty():
+            return
+
+        # full match rules are matched by equality
+        exact_data, like_data = split_plain_rules(like_data, MatchType.FULL_MATCH)
+        if not exact_data.is_empty():
+            db_worker.frame_to_sql(exact_data.select(plain_columns), "exact_temp_tbl")
+            metrics.count(
+                "match",
+                "full_match",
+                db_worker.insert_exact_matches(mapping_table="exact_temp_tbl"),
+            )
+
+        # starts with rules are matched by index range scan
+        prefix_data, like_data = split_plain_rules(like_data, MatchType.STARTS_WITH)
+        if not prefix_data.is_empty():
+            db_worker.frame_to_sql(prefix_data.select(plain_columns), "prefix_temp_tbl")
+            metrics.count(
+                "match",
+                "starts_with",
+                db_worker.insert_prefix_matches(mapping_table="prefix_temp_tbl"),
+            )
+
+        if self.app_config.database_settings.matcher == Matcher.AHO_CORASICK:
+            multi_pattern_data, like_data = split_plain_rules(
+                like_data, MatchType.PARTIAL_MATCH, MatchType.ENDS_WITH
+            )
+            metrics.count(
+                "match",
+                "multi_pattern",
+                db_worker.insert_multi_pattern_matches(multi_pattern_data),
+            )
+
+        if not like_data.is_empty():
+            # importing full dictionary to db and
+            # creating mapping table with indexes
+            db_worker.frame_to_sql(like_data.select(like_columns), "temp_tbl")
+            metrics.count(
+                "match", "like", db_worker.insert_matches(mapping_table="temp_tbl")
+            )
+
+    def run_report(
+        self, data_path: str | Path, engine: Engine | str | None = None
+    ) -> RunMetrics:
         start_time = datetime.now().replace(microsecond=0)
         print(
             f"\n{'-' * 10}  Обработка стартовала: {start_time} {'-' * 10}\n",
             flush=True,
         )
         self.base_path = data_path
-        self.resolver.ensure_file_parent(self.db_path)
+        engine = Engine(engine or self.app_config.engine)
         self.resolver.ensure_dir(self.export_path)
+        metrics = RunMetrics(engine)
 
         csv_worker = CSVWorker(
             data_path=self.import_path,
@@ -107,39 +329,137 @@ class AppService:
             dict_path=self.dict_path,
             dict_settings=self.app_config.dict_file_settings.model_dump(),
             export_path=self.export_path,
-            export_settings=self.app_config.export_settings.to_csv.model_dump(),
+            export_settings=self.export_settings,
         )
 
         # reading mapping params
-        df = csv_worker.get_dictionary()
-        mapping_dict = MappingDict(
-            data=df, action_col_indexes=self.app_config.dict_file_settings.col_indexes
-        )
+        with metrics.phase("dictionary") as counters:
+            df = csv_worker.get_dictionary()
+            mapping_dict = MappingDict(
+                data=df,
+                action_col_indexes=self.app_config.dict_file_settings.col_indexes,
+            )
+            counters["rules"] = mapping_dict.data.height
 
         # DB settings
         date_column = self.app_config.data_file_settings.date_column
         date_column = csv_worker.check_date_column(date_column)
 
-        with DBWorker(
-            db_file=self.db_path,
-            tbl_name=self.app_config.database_settings.table_name,
+        logger.info(f"Using '{engine}' engine")
+        profiler = None
+        match engine:
+            case Engine.POLARS:
+                self._run_polars(csv_worker, mapping_dict, date_column, metrics)
+            case _ if self.app_config.database_settings.shards > 1:
+                self._run_sharded(csv_worker, mapping_dict, date_column, metrics)
+            case _:
+                if self.app_config.database_settings.profile:
+                    profiler = QueryProfiler()
+                self._run_sqlite(
+                    csv_worker, mapping_dict, date_column, metrics, profiler
+                )
+
+        if profiler:
+            profiler.save(self.profile_path)
+            print(f"\n{profiler.summary()}", flush=True)
+        metrics.save(self.metrics_path)
+
+        end_time = datetime.now().replace(microsecond=0)
+        print(
+            f"\n{'-' * 10}  Обработка завершена: {end_time}. "
+            f"Общее время: {end_time - start_time} {'-' * 10}\n",
+            flush=True,
+        )
+        return metrics
+
+    def run_batch(
+        self,
+        reports: Iterable[str | Path],
+        engine: Engine | str | None = None,
+        workers: int | None = None,
+        memory_budget_mb: int | None = None,
+        on_update: Callable[[list[BatchJob]], None] | None = None,
+    ) -> list[BatchJob]:
+        """
+        Run report folders (paths or glob patterns) in parallel processes,
+        limits not given are taken from batch settings. A failed report
+        does not stop the others, its error is in the returned job.
+        """
+        settings = self.app_config.batch_settings
+        runner = BatchRunner(
+            job=run_report_job,
+            log_config=self.log_config.model_dump(),
+            workers=workers or settings.workers or os.cpu_count() or 1,
+            memory_budget_mb=memory_budget_mb or settings.memory_budget_mb,
+            log_file=settings.log_file,
+        )
+        return runner.run(
+            expand_reports(reports, self.resolver),
+            engine=Engine(engine) if engine else None,
+            on_update=on_update,
+        )
+
+    def _db_worker(
+        self,
+        db_file: Path,
+        date_column: str | None,
+        match_cache_file: Path | None,
+        profiler: QueryProfiler | None = None,
+        keep_file: bool = False,
+    ) -> DBWorker:
+        settings = self.app_config.database_settings
+        return DBWorker(
+            db_file=db_file,
+            tbl_name=settings.table_name,
             index_column=self.app_config.data_file_settings.index_column,
             date_column=date_column,
-        ) as db_worker:
-
-            # setting and clearing up column names before import
-            db_worker.set_data_tbl_columns(
-                *csv_worker.source_headers, extra_cols=mapping_dict.extra_col_names
-            )
+            fts_build=settings.fts_build,
+            match_cache_file=match_cache_file,
+            match_cache_size=settings.match_cache_size,
+            incremental=settings.incremental,
+            profiler=profiler,
+            keep_file=keep_file,
+        )
 
-            # adjusting mapping in accordance with cleaned column names
-            # prepare search patterns
+    def _compile(
+        self,
+        mapping_dict: MappingDict,
+        tbl_columns: list[str],
+        extra_columns: list[str],
+        metrics: RunMetrics,
+    ):
+        # adjusting mapping in accordance with cleaned column names
+        # prepare search patterns
+        with metrics.phase("compile"):
             mapping_dict.build_mapping(
-                *db_worker.data_tbl_columns, extra_col_names=db_worker.extra_columns
+                *tbl_columns,
+                extra_col_names=extra_columns,
+                compiled_path=self.compiled_dict_path(
+                    *tbl_columns, extra_col_names=extra_columns
+                ),
             )
 
-            # creating index and search tables
-            db_worker.search_columns = mapping_dict.search_columns
+    def _create_schema(
+        self, db_worker: DBWorker, mapping_dict: MappingDict, metrics: RunMetrics
+    ) -> bool:
+        """
+        Create index and search tables.
+        :return: bool, False if rules are the same as in the last
+            incremental run, True otherwise
+        """
+        # search columns are a set, its order differs between runs and
+        # compiled dictionary loads, the sorted order keeps exports stable
+        db_worker.search_columns = sorted(mapping_dict.search_columns)
+        rules_changed = True
+        with (
+            metrics.phase("schema"),
+            db_worker.profile_scope("schema"),
+            db_worker.transaction(),
+        ):
+            if db_worker.incremental:
+                rules_changed = db_worker.check_ingest_state(
+                    *self._ingest_keys(db_worker, mapping_dict)
+                )
             db_worker.create_table_with_index()
             db_worker.create_rules_matches()
 
@@ -147,107 +467,381 @@ class AppService:
             # fts patterns in mapping
             if not mapping_dict.fts_data.is_empty():
                 db_worker.link_search_table()
+        return rules_changed
+
+    def _apply_rules(
+        self,
+        db_worker: DBWorker,
+        mapping_dict: MappingDict,
+        metrics: RunMetrics,
+        quiet: bool = False,
+    ):
+        """
+        Match and apply rules, sync data table with the index table.
+        :param quiet: bool, do not print progress, used by shard processes
+        """
+        # matching rules with data
+        with (
+            metrics.phase("match"),
+            db_worker.profile_scope("match"),
+            db_worker.transaction(),
+        ):
+            self._insert_matches(db_worker, mapping_dict, metrics)
+
+        rules_count_total = mapping_dict.data.height
+        rules_count = 0
+
+        # a failed rule block is rolled back to its savepoint and skipped,
+        # blocks applied before and after it are committed with the phase
+        with metrics.phase("apply") as counters, db_worker.transaction():
+            for action, data in mapping_dict.generate_rules_blocks():
+                rules_count += data.height
+                if not quiet:
+                    progress_bar(
+                        message="Applying rules",
+                        current=rules_count,
+                        total=rules_count_total,
+                    )
+
+                action_name = ActionType(action).name.lower()
+                try:
+                    with (
+                        db_worker.profile_scope("apply", action),
+                        db_worker.transaction(savepoint=f"{action}_block"),
+                    ):
+                        db_worker.frame_to_sql(data, "mapping_table")
+                        rows = db_worker.apply_mapping(
+                            mapping_table="mapping_table",
+                            action_type=action,
+                            extra_cols=data.columns.copy(),
+                            separator=self.app_config.dict_file_settings.add_separator,
+                        )
+                except sqlite3.Error as e:
+                    logger.error(f"{action_name.upper()} rules are not applied: {e}")
+                    counters["failed_blocks"] = counters.get("failed_blocks", 0) + 1
+                    continue
+                counters[f"{action_name}_rows"] = rows
+
+        # synchronizing
+
+        if not quiet:
+            print(
+                "Synchronizing the index table with the data table is in progress. "
+                "Please be patient, this may take some time.",
+                flush=True,
+            )
+        with (
+            metrics.phase("sync") as counters,
+            db_worker.profile_scope("sync"),
+            db_worker.transaction(),
+        ):
+            sync_rows = db_worker.sync_with_data_table()
+            counters.update({f"{k}_rows": v for k, v in sync_rows.items()})
 
-            # loading data to database
-            self._import_data(db_worker, csv_worker)
+            # checking non mapped data
+            db_worker.build_non_mapped()
 
-            # importing fts rules to db
-            if not mapping_dict.fts_data.is_empty():
-                mapping_dict.fts_data.select(
-                    [
-                        MappingColumns.mapping_index,
-                        MappingColumns.pattern,
-                    ]
-                ).write_database(
-                    table_name="fts_temp_tbl",
-                    connection=db_worker.db_adb_con,
-                    engine="adbc",
-                    if_table_exists="replace",
+    def _run_sqlite(
+        self,
+        csv_worker: CSVWorker,
+        mapping_dict: MappingDict,
+        date_column: str | None,
+        metrics: RunMetrics,
+        profiler: QueryProfiler | None = None,
+    ):
+        self.resolver.ensure_file_parent(self.db_path)
+        incremental = self.app_config.database_settings.incremental
+
+        with self._db_worker(
+            self.db_path, date_column, self.match_cache_path, profiler
+        ) as db_worker:
+            # setting and clearing up column names before import
+            db_worker.set_data_tbl_columns(
+                *csv_worker.source_headers, extra_cols=mapping_dict.extra_col_names
+            )
+            self._compile(
+                mapping_dict,
+                db_worker.data_tbl_columns,
+                db_worker.extra_columns,
+                metrics,
+            )
+            rules_changed = self._create_schema(db_worker, mapping_dict, metrics)
+
+            # loading data to database
+            with (
+                metrics.phase("import") as counters,
+                db_worker.profile_scope("import"),
+            ):
+                if incremental:
+                    counters["rows"] = self._import_new_data(
+                        db_worker, csv_worker, rules_changed, metrics
+                    )
+                else:
+                    counters["rows"] = self._import_data(db_worker, csv_worker, metrics)
+            with metrics.phase("index"), db_worker.profile_scope("index"):
+                self._index_data(db_worker)
+
+            self._apply_rules(db_worker, mapping_dict, metrics)
+
+            # exporting
+            with metrics.phase("export") as counters:
+                counters["non_mapped_rows"] = csv_worker.export_sql_to_csv(
+                    db_con=db_worker.db_adb_con,
+                    file_prefix="null_data",
+                    export_path=f"{self.base_path}",
+                    data_table=db_worker.non_mapped_table,
                 )
-                db_worker.insert_matches_from_fts("fts_temp_tbl")
-                db_worker.db_adb_con.commit()
 
-            if not mapping_dict.like_data.is_empty():
-                # importing full dictionary to db and
-                # creating mapping table with indexes
-                mapping_dict.like_data.select(
-                    [
-                        MappingColumns.mapping_index,
-                        MappingColumns.column_name,
-                        MappingColumns.pattern,
-                    ]
-                ).write_database(
-                    table_name="temp_tbl",
-                    connection=db_worker.db_adb_con,
-                    engine="adbc",
-                    if_table_exists="replace",
+                counters["rows"] = csv_worker.export_sql_to_csv(
+                    db_con=db_worker.db_adb_con,
+                    data_table=db_worker.data_tbl_name,
+                    export_path=self.export_path,
+                    columns=db_worker.data_tbl_columns,
                 )
-                db_worker.db_adb_con.commit()
-                db_worker.insert_matches(mapping_table="temp_tbl")
+            if incremental:
+                with metrics.phase("finish"), db_worker.profile_scope("finish"):
+                    db_worker.finish_ingest()
 
-            rules_count_total = mapping_dict.data.height
-            rules_count = 0
+    @staticmethod
+    def shard_file(path: Path, shard: int) -> Path:
+        return path.with_name(f"{path.stem}_shard{shard}{path.suffix}")
+
+    def _run_sharded(
+        self,
+        csv_worker: CSVWorker,
+        mapping_dict: MappingDict,
+        date_column: str | None,
+        metrics: RunMetrics,
+    ):
+        """
+        Rows are partitioned by hash of index column into `shards` databases,
+        rules are applied to the shards by a pool of processes and the shards
+        are exported as one table.
+        """
+        settings = self.app_config.database_settings
+        index_column = self.app_config.data_file_settings.index_column
+        if settings.incremental:
+            raise ConfigError("Sharded mode is not supported in incremental mode")
+        if settings.profile:
+            logger.warning("SQL profile is not collected in sharded mode")
+
+        # column names are cleaned the same way as by DBWorker
+        tbl_columns = utils.clean_names(
+            *csv_worker.source_headers, *mapping_dict.extra_col_names
+        )
+        main_columns = tbl_columns[: len(csv_worker.source_headers)]
+        index_column = utils.make_valid(index_column) if index_column else None
+        if index_column not in main_columns:
+            raise ConfigError(
+                f"Sharded mode requires index column found in data files, "
+                f"got '{index_column}'"
+            )
+        extra_columns = tbl_columns[len(main_columns) :]
+        self._compile(mapping_dict, tbl_columns, extra_columns, metrics)
+        # non-mapped columns are ordered as DBWorker of a shard orders them
+        non_mapped_columns = [
+            col for col in sorted(mapping_dict.search_columns) if col in tbl_columns
+        ] + extra_columns
 
-            for action, data in mapping_dict.generate_rules_blocks():
-                rules_count += data.height
-                progress_bar(
-                    message="Applying rules",
-                    current=rules_count,
-                    total=rules_count_total,
+        self.resolver.ensure_file_parent(self.db_path)
+        spool = ShardSpool(
+            self.db_path.with_name(f"{self.db_path.stem}_spool"),
+            shards=settings.shards,
+            index_column=index_column,
+        )
+        shard_files = [
+            self.shard_file(self.db_path, shard) for shard in range(settings.shards)
+        ]
+        try:
+            with metrics.phase("spool") as counters:
+                chunks = csv_worker.get_file_chunks(main_columns)
+                counters["rows"] = sum(
+                    spool.write(chunk) for _, chunk in metrics.track_files(chunks)
+                )
+            tables = self._process_shards(
+                spool, shard_files, csv_worker, mapping_dict, date_column, metrics
+            )
+            spool.clear()
+
+            with metrics.phase("export") as counters, ExitStack() as stack:
+                db_cons = [
+                    stack.enter_context(adb.connect(str(db_file.as_posix())))
+                    for db_file in shard_files
+                ]
+                counters["non_mapped_rows"] = csv_worker.export_sql_to_csv(
+                    db_con=db_cons,
+                    file_prefix="null_data",
+                    export_path=f"{self.base_path}",
+                    data_table=tables["non_mapped_table"],
+                    columns=non_mapped_columns,
+                    distinct=True,
                 )
 
-                data.write_database(
-                    table_name="mapping_table",
-                    connection=db_worker.db_adb_con,
-                    engine="adbc",
-                    if_table_exists="replace",
+                counters["rows"] = csv_worker.export_sql_to_csv(
+                    db_con=db_cons,
+                    data_table=tables["data_table"],
+                    export_path=self.export_path,
+                    columns=tables["columns"],
                 )
-                db_worker.db_adb_con.commit()
-                rules_columns = data.columns.copy()
-
-                db_worker.apply_mapping(
-                    mapping_table="mapping_table",
-                    action_type=action,
-                    extra_cols=rules_columns,
-                    separator=self.app_config.dict_file_settings.add_separator,
+        finally:
+            spool.clear()
+            for db_file in shard_files:
+                DBWorker.delete_db_files(db_file)
+
+    def _process_shards(
+        self,
+        spool: ShardSpool,
+        shard_files: list[Path],
+        csv_worker: CSVWorker,
+        mapping_dict: MappingDict,
+        date_column: str | None,
+        metrics: RunMetrics,
+    ) -> dict:
+        """
+        Process shards by a pool of processes, phases of shards are merged
+        to metrics. Failure of a shard cancels shards waiting for a process.
+        :return: dict, names of tables and columns of shard databases
+        """
+        workers = min(len(shard_files), os.cpu_count() or 1)
+        logger.info(f"Processing {len(shard_files)} shards by {workers} processes")
+        print(f"Applying rules to {len(shard_files)} shards", flush=True)
+        # forked copies of Polars thread pools may deadlock, processes are spawned
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [
+                pool.submit(
+                    self._process_shard,
+                    shard,
+                    db_file,
+                    spool,
+                    csv_worker,
+                    mapping_dict,
+                    date_column,
                 )
+                for shard, db_file in enumerate(shard_files)
+            ]
+            try:
+                results = [future.result() for future in futures]
+            except Exception:
+                pool.shutdown(cancel_futures=True)
+                raise
+
+        for phases, _ in results:
+            metrics.merge(phases)
+        return results[0][1]
+
+    def _process_shard(
+        self,
+        shard: int,
+        db_file: Path,
+        spool: ShardSpool,
+        csv_worker: CSVWorker,
+        mapping_dict: MappingDict,
+        date_column: str | None,
+    ) -> tuple[dict, dict]:
+        """
+        Load rows of the shard to its database and apply rules,
+        runs in a worker process. The database is kept for export.
+        :return: tuple, counters of phases and names of tables and columns
+        """
+        metrics = RunMetrics(Engine.SQLITE)
+        match_cache_file = self.match_cache_path
+        if match_cache_file:
+            match_cache_file = self.shard_file(match_cache_file, shard)
+
+        with self._db_worker(
+            db_file, date_column, match_cache_file, keep_file=True
+        ) as db_worker:
+            db_worker.set_data_tbl_columns(
+                *csv_worker.source_headers, extra_cols=mapping_dict.extra_col_names
+            )
+            self._create_schema(db_worker, mapping_dict, metrics)
+            with metrics.phase("import") as counters:
+                counters["rows"] = self._load_chunks(db_worker, spool.read(shard))
+            with metrics.phase("index"):
+                self._index_data(db_worker)
+            self._apply_rules(db_worker, mapping_dict, metrics, quiet=True)
+
+            tables = {
+                "data_table": db_worker.data_tbl_name,
+                "columns": db_worker.data_tbl_columns,
+                "non_mapped_table": db_worker.non_mapped_table,
+            }
+        return metrics.phases, tables
+
+    def _run_polars(
+        self,
+        csv_worker: CSVWorker,
+        mapping_dict: MappingDict,
+        date_column: str | None,
+        metrics: RunMetrics,
+    ):
+        worker = PolarsWorker(
+            index_column=self.app_config.data_file_settings.index_column,
+            date_column=date_column,
+        )
 
-            # checking non mapped data
-            db_worker.build_non_mapped()
+        # setting and clearing up column names before import
+        worker.set_data_tbl_columns(
+            *csv_worker.source_headers, extra_cols=mapping_dict.extra_col_names
+        )
 
-            csv_worker.export_sql_to_csv(
-                db_con=db_worker.db_con,
-                file_prefix="null_data",
-                export_path=f"{self.base_path}",
-                data_table=db_worker.non_mapped_table,
+        self._compile(
+            mapping_dict, worker.data_tbl_columns, worker.extra_columns, metrics
+        )
+        worker.search_columns = sorted(mapping_dict.search_columns)
+
+        # loading data, files are collected one by one to measure each of them
+        with metrics.phase("import") as counters:
+            col_count = len(csv_worker.source_headers)
+            col_names = worker.data_tbl_columns[:col_count]
+            files = metrics.track_files(
+                (
+                    file,
+                    csv_worker.scan_data(col_names, [file]).collect(engine="streaming"),
+                )
+                for file in csv_worker.data_files
+            )
+            counters["rows"] = worker.load_data(
+                pl.concat([frame for _, frame in files]).lazy()
             )
 
-            # synchronizing and exporting
+        with metrics.phase("match") as counters:
+            counters.update(worker.match_rules(mapping_dict))
+        with metrics.phase("apply") as counters:
+            rows = worker.apply_rules(
+                mapping_dict, separator=self.app_config.dict_file_settings.add_separator
+            )
+            counters.update(
+                (f"{ActionType(action).name.lower()}_rows", count)
+                for action, count in rows.items()
+            )
 
-            print(
-                "Synchronizing the index table with the data table is in progress. "
-                "Please be patient, this may take some time.",
-                flush=True,
+        # checking non mapped data
+        with metrics.phase("export") as counters:
+            counters["non_mapped_rows"] = csv_worker.export_frame_to_csv(
+                worker.non_mapped(),
+                file_prefix="null_data",
+                export_path=f"{self.base_path}",
             )
-            db_worker.sync_with_data_table()
 
-            csv_worker.export_sql_to_csv(
-                db_con=db_worker.db_con,
-                data_table=db_worker.data_tbl_name,
+            counters["rows"] = csv_worker.export_frame_to_csv(
+                worker.result(),
+                file_prefix=self.app_config.database_settings.table_name,
                 export_path=self.export_path,
             )
 
-        end_time = datetime.now().replace(microsecond=0)
-        print(
-            f"\n{'-' * 10}  Обработка завершена: {end_time}. "
-            f"Общее время: {end_time - start_time} {'-' * 10}\n",
-            flush=True,
-        )
-
 
 app_service = AppService(app_paths=APP_PATHS, resolver=PathResolver(APP_PATHS.user_dir))
 
 logging.config.dictConfig(app_service.log_config.model_dump())
 
+
+def run_report_job(report: Path, engine: Engine | None) -> dict:
+    """Run of a report in a batch worker process, metrics report is returned."""
+    return app_service.run_report(report, engine=engine).report()
+
+
 if __name__ == "__main__":
     app_service.run_report(r"data\mvideo")
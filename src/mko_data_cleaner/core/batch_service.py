@@ -0,0 +1,249 @@
+import glob
+import json
+import logging
+import logging.config
+import multiprocessing
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, TextIO
+
+from pydantic import BaseModel
+
+from mko_data_cleaner.core.errors import NoReportFoundError
+from mko_data_cleaner.core.paths import PathResolver
+from mko_data_cleaner.core.run_metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+# job(report, engine) -> metrics report of the run
+ReportJob = Callable[[Path, str | None], dict[str, Any]]
+
+
+class JobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class BatchJob(BaseModel):
+    report: Path
+    log_file: Path
+    memory_mb: float | None = None  # expected peak memory
+    status: JobStatus = JobStatus.PENDING
+    started: float | None = None
+    seconds: float | None = None
+    rows: int | None = None
+    peak_rss_mb: float | None = None
+    error: str | None = None
+
+    @property
+    def elapsed(self) -> float | None:
+        if self.seconds is not None or self.started is None:
+            return self.seconds
+        return time.perf_counter() - self.started
+
+
+def expand_reports(
+    patterns: Iterable[str | Path], resolver: PathResolver
+) -> list[Path]:
+    """
+    Report folders of paths and glob patterns, relative ones are resolved
+    like a report path of a single run. Files matched by patterns are skipped.
+    """
+    reports = {}
+    for pattern in patterns:
+        path = resolver.resolve(pattern)
+        if glob.has_magic(str(path)):
+            matches = [Path(p) for p in sorted(glob.glob(str(path), recursive=True))]
+            folders = [p for p in matches if p.is_dir()]
+            if not folders:
+                logger.warning(f"No report folders match '{pattern}'")
+            reports.update(dict.fromkeys(folders))
+        elif path.is_dir():
+            reports[path] = None
+        else:
+            raise FileNotFoundError(f"Report folder not found: {path}")
+
+    if not reports:
+        raise NoReportFoundError("No report folders to process")
+    return list(reports)
+
+
+def job_log_config(log_config: dict[str, Any], stream: TextIO) -> dict[str, Any]:
+    """Logging config of a job: loggers of the app config write to the job log."""
+    handler = {"class": "logging.StreamHandler", "stream": stream}
+    if log_config["formatters"]:
+        handler["formatter"] = next(iter(log_config["formatters"]))
+    loggers = {
+        name: {**config, "handlers": ["job"]} if "handlers" in config else config
+        for name, config in log_config["loggers"].items()
+    }
+    return {
+        **log_config,
+        "handlers": {"job": handler},
+        "loggers": loggers,
+        "root": {**log_config["root"], "handlers": ["job"]},
+    }
+
+
+def run_isolated(
+    job: ReportJob,
+    report: Path,
+    engine: str | None,
+    log_file: Path,
+    log_config: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Run the job in a worker process with logs and output of the run
+    redirected to the log file. Errors of the job are logged and returned.
+    :return: dict, `metrics` of the run or `error`
+    """
+    stream = log_file.open("w", encoding="utf-8", buffering=1)
+    logging.config.dictConfig(job_log_config(log_config, stream))
+    try:
+        with redirect_stdout(stream), redirect_stderr(stream):
+            return {"metrics": job(report, engine)}
+    except Exception as e:
+        logger.exception(f"Report '{report}' failed")
+        return {"error": f"{type(e).__name__}: {e}"}
+    finally:
+        logging.shutdown()
+        stream.close()
+
+
+class BatchRunner:
+    """
+    Runs reports in parallel processes, a fresh process per report, so
+    a crashed report and its memory do not affect the others. Reports are
+    started in order while the number of running ones is below `workers`
+    and their expected memory fits `memory_budget_mb`, one report runs
+    regardless of the budget.
+
+    Expected memory of a report is peak memory of its previous run,
+    an equal share of the budget if the report was never measured.
+    """
+
+    def __init__(
+        self,
+        job: ReportJob,
+        log_config: dict[str, Any],
+        workers: int,
+        memory_budget_mb: int | None = None,
+        log_file: str = "batch_run.log",
+    ):
+        self.job = job
+        self.log_config = log_config
+        self.workers = workers
+        self.memory_budget_mb = memory_budget_mb
+        self.log_file = log_file
+
+    def expected_memory(self, report: Path) -> float | None:
+        metrics_file = report / RunMetrics.FILE_NAME
+        try:
+            peak = json.loads(metrics_file.read_text(encoding="utf8"))["peak_rss_mb"]
+        except (OSError, ValueError, KeyError):
+            peak = None
+        if peak is None and self.memory_budget_mb:
+            return self.memory_budget_mb / self.workers
+        return peak
+
+    def fits(self, job: BatchJob, running: Iterable[BatchJob]) -> bool:
+        running = list(running)
+        if not running:
+            return True
+        if len(running) >= self.workers:
+            return False
+        if not self.memory_budget_mb or job.memory_mb is None:
+            return True
+        reserved = sum(r.memory_mb or 0 for r in running)
+        return reserved + job.memory_mb <= self.memory_budget_mb
+
+    def run(
+        self,
+        reports: Iterable[Path],
+        engine: str | None = None,
+        on_update: Callable[[list[BatchJob]], None] | None = None,
+    ) -> list[BatchJob]:
+        """
+        Run all reports, failed ones do not stop the others.
+        :param on_update: called with all jobs when a job is started or finished
+        :return: list, jobs in order of reports
+        """
+        jobs = [
+            BatchJob(
+                report=report,
+                log_file=report / self.log_file,
+                memory_mb=self.expected_memory(report),
+            )
+            for report in reports
+        ]
+        logger.info(
+            f"Batch of {len(jobs)} reports, {self.workers} workers, "
+            f"memory budget: {self.memory_budget_mb or 'none'} MB"
+        )
+
+        def update():
+            if on_update:
+                on_update(jobs)
+
+        pending = deque(jobs)
+        running: dict[Future, tuple[BatchJob, ProcessPoolExecutor]] = {}
+        # forked copies of Polars thread pools may deadlock, processes are spawned
+        context = multiprocessing.get_context("spawn")
+        update()
+        try:
+            while pending or running:
+                while pending and self.fits(
+                    pending[0], (job for job, _ in running.values())
+                ):
+                    job = pending.popleft()
+                    executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+                    future = executor.submit(
+                        run_isolated,
+                        self.job,
+                        job.report,
+                        engine,
+                        job.log_file,
+                        self.log_config,
+                    )
+                    running[future] = job, executor
+                    job.status, job.started = JobStatus.RUNNING, time.perf_counter()
+                    logger.debug(f"Report '{job.report}' started")
+                    update()
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, executor = running.pop(future)
+                    executor.shutdown()
+                    self._finish(job, future)
+                    update()
+        finally:
+            for future, (_, executor) in running.items():
+                future.cancel()
+                executor.shutdown(wait=False, cancel_futures=True)
+        return jobs
+
+    @staticmethod
+    def _finish(job: BatchJob, future: Future):
+        job.seconds = time.perf_counter() - job.started
+        try:
+            result = future.result()
+        except Exception as e:  # the process crashed or the job was not started
+            result = {"error": f"{type(e).__name__}: {e}"}
+
+        if "error" in result:
+            job.status, job.error = JobStatus.FAILED, result["error"]
+            logger.error(f"Report '{job.report}' failed: {job.error}")
+            return
+
+        metrics = result["metrics"]
+        job.status = JobStatus.DONE
+        job.rows = metrics.get("phases", {}).get("export", {}).get("rows")
+        job.peak_rss_mb = metrics.get("peak_rss_mb")
+        logger.info(f"Report '{job.report}' done in {job.seconds:.1f} s")
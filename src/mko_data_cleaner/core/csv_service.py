@@ -1,11 +1,16 @@
 import logging
 import os
-import sqlite3
 import traceback
-from collections.abc import Generator
+from collections.abc import Generator, Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import chain
 from pathlib import Path
+from queue import Full, Queue
+from threading import Event
 from time import strftime
 
+import adbc_driver_sqlite as adbc_sqlite
+import adbc_driver_sqlite.dbapi as adb
 import polars as pl
 
 from mko_data_cleaner.core.errors import WrongDataSettings
@@ -26,8 +31,18 @@ class CSVWorker:
     """
 
     CHUNK_SIZE = 10000
+    # lazy scanners of binary data files by extension, others are read as CSV
+    BINARY_SCANNERS = {
+        "parquet": pl.scan_parquet,
+        "arrow": pl.scan_ipc,
+        "ipc": pl.scan_ipc,
+    }
+    # chunks of one file parsed ahead of the consumer
+    QUEUE_SIZE = 2
     DATE_REGEX = r"^\d{4}[-/.]\d{2}[-/.]\d{2}$"
     DATE_SAMPLE_SIZE = 500
+    # rowid of exported rows, the last one starts the query of the next chunk
+    EXPORT_ROWID = "_export_rowid"
 
     def __init__(
         self,
@@ -74,10 +89,30 @@ class CSVWorker:
                 f"found in: '{self.data_path}'. "
             )
 
+    @property
+    def is_binary_data(self) -> bool:
+        return self.data_settings.get("extension") in self.BINARY_SCANNERS
+
+    def _scan_binary(
+        self, files: Path | list[Path], headers: list[str] | None = None
+    ) -> pl.LazyFrame:
+        """
+        Lazily scan Parquet or Arrow IPC files.
+        Values are cast to strings, the same as CSV files are read.
+        """
+        scanner = self.BINARY_SCANNERS[self.data_settings["extension"]]
+        lf = scanner(files)
+        columns = headers or lf.collect_schema().names()
+        return lf.select(
+            pl.nth(i).cast(pl.Utf8).alias(name) for i, name in enumerate(columns)
+        )
+
     def get_csv_headers(self, file: str | Path) -> list[str]:
         """Read CSV headers using Polars."""
 
         try:
+            if self.is_binary_data:
+                return self._scan_binary(file).collect_schema().names()
             df = pl.read_csv(file, n_rows=0, **self.reader_settings)
             return df.columns
 
@@ -151,9 +186,18 @@ class CSVWorker:
         return None
 
     def check_date_column(self, column: str = None) -> tuple[int, str] | None:
-        df = pl.read_csv(
-            self.sample_data_file, n_rows=self.DATE_SAMPLE_SIZE, **self.reader_settings
-        )
+        if self.is_binary_data:
+            df = (
+                self._scan_binary(self.sample_data_file)
+                .head(self.DATE_SAMPLE_SIZE)
+                .collect()
+            )
+        else:
+            df = pl.read_csv(
+                self.sample_data_file,
+                n_rows=self.DATE_SAMPLE_SIZE,
+                **self.reader_settings,
+            )
         return self._detect_date_column(df, column)
 
     def _read_csv_in_chunks(
@@ -167,6 +211,12 @@ class CSVWorker:
         Generator[pl.DataFrame]
         """
         try:
+            if self.is_binary_data:
+                yield from self._scan_binary(csv_file, headers).collect_batches(
+                    chunk_size=self.CHUNK_SIZE
+                )
+                return
+
             df = pl.read_csv_batched(
                 csv_file,
                 batch_size=self.CHUNK_SIZE,
@@ -186,15 +236,100 @@ class CSVWorker:
     def get_data_chunks(
         self, col_names: list[str]
     ) -> Generator[pl.DataFrame, None, None]:
-        """Yield CSV chunks from all files."""
-        total = len(self.data_files)
-        logger.info("Reading of %d files from folder %s", total, self.data_path)
+        """Yield CSV chunks from all files, see `get_file_chunks`."""
+        for _, chunk in self.get_file_chunks(col_names):
+            yield chunk
+
+    def get_file_chunks(
+        self, col_names: list[str], files: list[Path] | None = None
+    ) -> Generator[tuple[Path, pl.DataFrame], None, None]:
+        """
+        Yield (file, chunk) pairs from given files, all data files by default.
+
+        Files are decompressed and parsed by a pool of `reader_threads`
+        threads, each file into its own bounded queue. Chunks are yielded
+        in the order of files, so a single consumer (database writer)
+        always gets the same order of rows.
+        """
+        files = self.data_files if files is None else files
+        total = len(files)
+        if not total:
+            return
+        reader_threads = min(self.data_settings.get("reader_threads", 1), total)
+        logger.info(
+            "Reading of %d files from folder %s in %d threads",
+            total,
+            self.data_path,
+            reader_threads,
+        )
 
-        for i, file in enumerate(self.data_files, start=1):
-            logger.debug("Reading file: %s", file)
-            progress_bar(message="Reading data", current=i, total=total)
+        stop = Event()
+        pool = ThreadPoolExecutor(
+            max_workers=reader_threads, thread_name_prefix="csv_reader"
+        )
+        try:
+            queues = []
+            for file in files:
+                chunks = Queue(maxsize=self.QUEUE_SIZE)
+                pool.submit(self._read_file_to_queue, file, col_names, chunks, stop)
+                queues.append(chunks)
+
+            for i, (file, chunks) in enumerate(
+                zip(files, queues, strict=True), start=1
+            ):
+                logger.debug("Reading file: %s", file)
+                progress_bar(message="Reading data", current=i, total=total)
+
+                while (chunk := chunks.get()) is not None:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield file, chunk
+        finally:
+            # release readers blocked on full queues if consumer stopped early
+            stop.set()
+            pool.shutdown(cancel_futures=True)
+
+    def _read_file_to_queue(
+        self, csv_file: Path, headers: list[str], chunks: Queue, stop: Event
+    ):
+        """Put chunks of the file to the queue followed by None or an error."""
+        try:
+            for chunk in self._read_csv_in_chunks(csv_file, headers):
+                if not self._put(chunks, chunk, stop):
+                    return
+        except Exception as err:
+            self._put(chunks, err, stop)
+        else:
+            self._put(chunks, None, stop)
 
-            yield from self._read_csv_in_chunks(file, col_names)
+    @staticmethod
+    def _put(chunks: Queue, item, stop: Event) -> bool:
+        """Put item to the bounded queue unless reading is stopped."""
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def scan_data(
+        self, col_names: list[str], files: list[Path] | None = None
+    ) -> pl.LazyFrame:
+        """Lazily scan given files, all data files by default, as a single LazyFrame."""
+        files = self.data_files if files is None else files
+        logger.debug("Scanning of %d files from folder %s", len(files), self.data_path)
+        try:
+            if self.is_binary_data:
+                return self._scan_binary(files, col_names)
+            return pl.scan_csv(
+                files,
+                new_columns=col_names,
+                **self.reader_settings,
+            )
+        except Exception as err:
+            logger.error(traceback.format_exc())
+            raise err
 
     # ---------------------------------------------------------
     # DICTIONARY
@@ -235,7 +370,10 @@ class CSVWorker:
     # ---------------------------------------------------------
 
     def get_file_name(self, name_prefix, name_suffix):
-        ext = self.get_files_suffix(self.export_settings["compression"])
+        if self.export_settings.get("file_format") == "parquet":
+            ext = ".parquet"
+        else:
+            ext = self.get_files_suffix(self.export_settings["compression"])
         time_str = strftime("%Y%m%d-%H%M%S")
         return f"{name_prefix}_{time_str}_{name_suffix}{ext}"
 
@@ -268,105 +406,241 @@ class CSVWorker:
 
     def export_sql_to_csv(
         self,
-        db_con: sqlite3.Connection,
+        db_con: adb.Connection | Sequence[adb.Connection],
         data_table: str,
         file_prefix: str | None = None,
         export_path: Path | str | None = None,
-    ):
+        columns: list[str] | None = None,
+        distinct: bool = False,
+    ) -> int:
         """
-        Export SQLite table to CSV files using Polars.
+        Export SQLite table to CSV (or Parquet) files using Polars.
 
-        The table is exported in chunks to avoid loading the entire
-        dataset into memory. Each chunk is written into a separate
-        CSV file (optionally compressed).
+        The table is read from ADBC connection as Arrow record batches
+        of chunk_size rows to avoid loading the entire dataset into memory.
+        Each chunk is written into a separate CSV file (optionally compressed).
 
         Parameters
         ----------
-        db_con : sqlite3.Connection
-            Active SQLite connection.
+        db_con : adbc_driver_sqlite.dbapi.Connection | Sequence[Connection]
+            Active ADBC SQLite connection, TEMP tables of other
+            connections are not visible to it. Tables of several
+            connections (shards of a database) are exported as one table.
         data_table : str
             Source table name.
         file_prefix : str, optional
             Prefix for exported file names.
         export_path : Path | str, optional
             Directory for exported files.
+        columns : list[str], optional
+            Columns to export, all columns of the table by default.
+        distinct : bool, optional
+            Drop rows repeated in tables of several connections,
+            rows are collected in memory.
 
         Returns
         -------
-        None
+        int
+            Number of exported rows.
         """
 
         logger.debug(f"Starting export from {data_table}")
+        db_cons = [db_con] if isinstance(db_con, adb.Connection) else list(db_con)
 
         try:
-            file_prefix = file_prefix or data_table
-            export_path = Path(export_path or self.export_path)
-            export_path.mkdir(parents=True, exist_ok=True)
-
-            file_name = self.get_file_name(file_prefix, "{file_index}")
-
-            params = self.export_settings.copy()
-
-            max_rows = params.pop("chunk_size", 10000)
-
-            file_index = 1
-            row_counter = 0
-
-            # -----------------------------
-            # cursor for data
-            # -----------------------------
-            data_cursor = db_con.cursor()
-            data_cursor.execute(f"SELECT * FROM {data_table}")
-
-            columns = [col[0] for col in data_cursor.description]
-
-            schema_overrides = {col: pl.Utf8 for col in columns}
+            max_rows = self.export_settings.get("chunk_size", 10000)
 
             # -----------------------------
             # cursor for row count
             # -----------------------------
-            count_cursor = db_con.cursor()
-            count_cursor.execute(f"SELECT COUNT(*) FROM {data_table}")
-            total_rows = count_cursor.fetchone()[0]
+            total_rows = 0
+            for con in db_cons:
+                with con.cursor() as count_cursor:
+                    count_cursor.execute(f"SELECT COUNT(*) FROM {data_table}")
+                    total_rows += count_cursor.fetchone()[0]
 
             if total_rows == 0:
                 logger.debug(f"Table {data_table} is empty.")
-                return
+                return 0
+
+            # chunks continue across connections
+            chunks = self._rechunk(
+                chain.from_iterable(
+                    self._fetch_sql_chunks(con, data_table, max_rows, columns)
+                    for con in db_cons
+                ),
+                max_rows,
+            )
+            if distinct and len(db_cons) > 1:
+                df = pl.concat(chunks).unique(maintain_order=True)
+                chunks, total_rows = df.iter_slices(max_rows), df.height
+
+            return self._write_chunks(
+                chunks,
+                total_rows=total_rows,
+                data_name=data_table,
+                file_prefix=file_prefix or data_table,
+                export_path=export_path,
+            )
 
-            rows = data_cursor.fetchmany(max_rows)
+        except Exception as err:
+            logger.error(traceback.format_exc())
+            raise err
+        finally:
+            # end read transaction, otherwise the connection keeps
+            # its snapshot and doesn't see later changes of the table
+            for con in db_cons:
+                con.commit()
 
-            while rows:
-                df = pl.DataFrame(
-                    rows,
-                    schema=columns,
-                    orient="row",
-                    schema_overrides=schema_overrides,
-                )
+    def export_frame_to_csv(
+        self,
+        df: pl.DataFrame,
+        file_prefix: str,
+        export_path: Path | str | None = None,
+    ) -> int:
+        """
+        Export Polars DataFrame to CSV (or Parquet) files.
 
-                row_counter += df.height
+        Uses the same chunking and file naming as `export_sql_to_csv`.
+        Returns number of exported rows.
+        """
+        logger.debug(f"Starting export of {file_prefix}")
 
-                progress_bar(
-                    message=f"Exporting {data_table}",
-                    current=row_counter,
-                    total=total_rows,
-                )
+        try:
+            if df.is_empty():
+                logger.debug(f"Data {file_prefix} is empty.")
+                return 0
+
+            max_rows = self.export_settings.get("chunk_size", 10000)
+            df = df.select(pl.all().cast(pl.Utf8))
+
+            return self._write_chunks(
+                df.iter_slices(max_rows),
+                total_rows=df.height,
+                data_name=file_prefix,
+                file_prefix=file_prefix,
+                export_path=export_path,
+            )
 
-                file_path = export_path / file_name.format(file_index=file_index)
+        except Exception as err:
+            logger.error(traceback.format_exc())
+            raise err
 
-                df.write_csv(
-                    file=file_path,
-                    **params,
+    @staticmethod
+    def _fetch_sql_chunks(
+        db_con: adb.Connection,
+        data_table: str,
+        max_rows: int,
+        columns: list[str] | None = None,
+    ) -> Generator[pl.DataFrame, None, None]:
+        columns = columns or db_con.adbc_get_table_schema(data_table).names
+
+        # ADBC SQLite infers column types from the first batch of a query and
+        # fails on text in a column which was NULL there, so every chunk is
+        # read by its own query as one batch and cast to Utf8 after reading
+        rowid_col = CSVWorker.EXPORT_ROWID
+        select_columns = ", ".join(f"CAST({col} AS TEXT) AS {col}" for col in columns)
+        last_rowid = None
+
+        with db_con.cursor() as data_cursor:
+            data_cursor.adbc_statement.set_options(
+                **{adbc_sqlite.StatementOptions.BATCH_ROWS.value: str(max_rows)}
+            )
+            while True:
+                where = f"WHERE rowid > {last_rowid} " if last_rowid is not None else ""
+                data_cursor.execute(
+                    f"SELECT rowid AS {rowid_col}, {select_columns} "
+                    f"FROM {data_table} {where}"
+                    f"ORDER BY rowid LIMIT {max_rows}"
                 )
+                df = pl.from_arrow(data_cursor.fetch_arrow_table())
+                if df.is_empty():
+                    return
+                last_rowid = df[rowid_col][-1]
+                yield df.drop(rowid_col).cast(pl.Utf8)
+                if df.height < max_rows:
+                    return
 
-                logger.debug(f"Exported chunk {file_index} ({df.height:,} rows)")
-
-                file_index += 1
-                rows = data_cursor.fetchmany(max_rows)
+    @staticmethod
+    def _rechunk(
+        frames: Iterable[pl.DataFrame], max_rows: int
+    ) -> Generator[pl.DataFrame, None, None]:
+        """Regroup frames into chunks of max_rows rows."""
+        buffer = pl.DataFrame()
+        for df in frames:
+            buffer = pl.concat([buffer, df]) if buffer.width else df
+            while buffer.height >= max_rows:
+                yield buffer.slice(0, max_rows)
+                buffer = buffer.slice(max_rows)
+        if buffer.height:
+            yield buffer
+
+    def _write_chunks(
+        self,
+        chunks: Iterable[pl.DataFrame],
+        total_rows: int,
+        data_name: str,
+        file_prefix: str,
+        export_path: Path | str | None = None,
+    ) -> int:
+        """
+        Write each chunk into a separate numbered CSV or Parquet file
+        depending on `file_format` of export settings.
+        Returns number of written rows.
 
-            logger.debug(
-                f"Successfully exported {row_counter:,} rows from table '{data_table}'"
+        Chunks are compressed and written by a pool of `writer_threads`
+        threads while the next chunks are read, files are numbered
+        in the order of chunks.
+        """
+        export_path = Path(export_path or self.export_path)
+        export_path.mkdir(parents=True, exist_ok=True)
+
+        file_name = self.get_file_name(file_prefix, "{file_index}")
+
+        params = self.export_settings.copy()
+        params.pop("chunk_size", None)
+        file_format = params.pop("file_format", "csv")
+        writer_threads = params.pop("writer_threads", 1)
+        # limit chunks kept in memory while waiting for a writer
+        max_pending = writer_threads * 2
+
+        row_counter = 0
+        pending: set[Future[int]] = set()
+
+        def collect(done: set[Future[int]]):
+            nonlocal row_counter
+            for future in done:
+                row_counter += future.result()
+            progress_bar(
+                message=f"Exporting {data_name}",
+                current=row_counter,
+                total=total_rows,
             )
 
-        except Exception as err:
-            logger.error(traceback.format_exc())
-            raise err
+        with ThreadPoolExecutor(
+            max_workers=writer_threads, thread_name_prefix="csv_writer"
+        ) as pool:
+            for file_index, df in enumerate(chunks, start=1):
+                file_path = export_path / file_name.format(file_index=file_index)
+                pending.add(
+                    pool.submit(self._write_chunk, df, file_path, file_format, params)
+                )
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(wait(pending).done)
+
+        logger.debug(f"Successfully exported {row_counter:,} rows from '{data_name}'")
+        return row_counter
+
+    @staticmethod
+    def _write_chunk(
+        df: pl.DataFrame, file_path: Path, file_format: str, params: dict
+    ) -> int:
+        match file_format:
+            case "parquet":
+                df.write_parquet(file_path, **params)
+            case _:
+                df.write_csv(file=file_path, **params)
+        logger.debug(f"Exported chunk {file_path.name} ({df.height:,} rows)")
+        return df.height
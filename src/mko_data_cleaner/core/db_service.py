@@ -1,15 +1,21 @@
 import logging
 import sqlite3
 import traceback
-from functools import cached_property
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import cached_property, partial
 from pathlib import Path
 from typing import Any
 
 import adbc_driver_sqlite.dbapi as adb
+import polars as pl
 
 from .errors import WrongDataSettings
-from .models import ActionType, MappingColumns
-from .utils import clean_names, make_valid, validate_names
+from .match_cache import MatchCache
+from .matchers import MultiPatternMatcher, normalized_name
+from .models import ActionType, FtsBuild, MappingColumns
+from .query_profiler import QueryProfiler
+from .utils import clean_names, file_hash, make_valid, validate_names
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +25,10 @@ MASTER_TABLE = "sqlite_master"
 # # Data types used to add columns in SQLight data table
 VALID_COLUMN_DTYPES = ("TEXT", "NUMERIC", "INTEGER", "REAL", "BLOB")
 
+# # service columns of the raw data table kept in incremental mode
+RAW_ROWID_COLUMN = "raw_rowid"
+FILE_ID_COLUMN = "file_id"
+
 DATA_TO_SQL_PARAMS = {
     "if_exists": "append",
     "index": False,
@@ -49,24 +59,60 @@ class DBWorker:
         index_column: str | None = None,
         date_column: str | None = None,
         use_temp_tables: bool = True,
+        fts_build: FtsBuild | str = FtsBuild.REBUILD,
+        match_cache_file: Path | None = None,
+        match_cache_size: int = 1000000,
+        incremental: bool = False,
+        profiler: QueryProfiler | None = None,
+        keep_file: bool = False,
     ):
         self.db_file = db_file
-        self.db_con = sqlite3.connect(self.db_file)
+        # autocommit mode, statements are grouped by `transaction` scopes
+        self.db_con = sqlite3.connect(self.db_file, isolation_level=None)
         self.db_adb_con = adb.connect(str(self.db_file.as_posix()))
         self.data_tbl_name = make_valid(tbl_name)
         self.index_column = make_valid(index_column) if index_column else None
+        self.incremental = incremental
+        # database file is deleted on close unless kept for later use
+        self.keep_file = keep_file
+        if incremental and not self.index_column:
+            # rows are refreshed by keys, each raw row is a key of its own
+            self.index_column = RAW_ROWID_COLUMN
         self.date_column = make_valid(date_column) if date_column else None
         self.use_temp_tables = use_temp_tables
+        self.fts_build = FtsBuild(fts_build)
         self._index_tbl_name = None
         self._data_tbl_columns = None
+        self._main_columns = None
         self._search_columns = None
         self._extra_columns = None
         self.use_fts = False
         self._fts_table_name: str | None = None
+        self._search_tuples_table: str | None = None
         self.non_mapped_table = "non_mapped"
         self._full_matches_table: str = "full_matches_table"
         self._joined_matches_table: str = "joined_matches_table"
+        self._tags_table: str = "data_table_tags"
+        self._rule_tags_table: str = "rule_tags"
+        self._tag_values_table: str = "tag_values"
+        self.raw_tbl_name = f"{self.data_tbl_name}_raw"
+        self.manifest_table = "ingested_files"
+        self._state_table = "ingest_state"
+        self._affected_table = "affected_keys"
+        self._ingest_rules_key: str | None = None
+        self._savepoints_count = 0
+        self.profiler = profiler
         self._init_base()
+        self.match_cache = (
+            MatchCache(
+                self.db_con,
+                match_cache_file,
+                match_cache_size,
+                execute=self.perform_query,
+            )
+            if match_cache_file
+            else None
+        )
 
     # ---------------------------------------------------------
     # properties
@@ -95,6 +141,16 @@ class DBWorker:
     def extra_columns(self):
         return self._extra_columns
 
+    @property
+    def main_columns(self):
+        """Columns of the source data files"""
+        return self._main_columns
+
+    @property
+    def normalized_columns(self) -> dict[str, str]:
+        """Search column name: name of its shadow column with normalized values"""
+        return {col: normalized_name(col) for col in self.search_columns or []}
+
     @cached_property
     def column_index(self):
         if self.data_tbl_columns:
@@ -107,6 +163,7 @@ class DBWorker:
     def set_data_tbl_columns(self, *main_cols, extra_cols: list | None = None):
         extra_cols = extra_cols or []
         self._data_tbl_columns = clean_names(*main_cols, *extra_cols)
+        self._main_columns = self.data_tbl_columns[: len(main_cols)]
         self._extra_columns = self.data_tbl_columns[-len(extra_cols) :]
 
     # ---------------------------------------------------------
@@ -194,9 +251,10 @@ class DBWorker:
 
     def perform_query(self, query: str, params: tuple | None = None):
         try:
-            q = self.db_con.cursor().execute(query, params or ())
-            self.db_con.cursor().close()
-            self.db_con.commit()
+            if self.profiler:
+                q = self.profiler.execute(self.db_con, query, params or ())
+            else:
+                q = self.db_con.execute(query, params or ())
         except sqlite3.Error as err:
             logging.error(
                 f"SQL Error {err}, Query = ' {query} ', Terms =' {params} ' {traceback.format_exc()}"
@@ -205,6 +263,51 @@ class DBWorker:
         else:
             return q
 
+    def profile_scope(
+        self, phase: str, block: str | None = None
+    ) -> AbstractContextManager[None]:
+        """Tag statements of the scope with phase and rule block for the profiler."""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.tag(phase, block)
+
+    def _changes(self) -> int:
+        """Number of rows changed by the last INSERT, UPDATE or DELETE statement."""
+        (changes,) = self.db_con.execute("SELECT changes()").fetchone()
+        return changes
+
+    @contextmanager
+    def transaction(self, savepoint: str | None = None) -> Iterator[None]:
+        """
+        Run statements of the scope in one transaction, committed on exit
+        and rolled back on error.
+        Nested scopes and scopes with savepoint name run in a savepoint:
+        on error only the work of the scope is rolled back, work done
+        before it stays in the outer transaction, the error is raised.
+        :param savepoint: str, name of the savepoint
+        """
+        if savepoint is None and not self.db_con.in_transaction:
+            self.db_con.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self.db_con.execute("ROLLBACK")
+                raise
+            self.db_con.execute("COMMIT")
+            return
+
+        self._savepoints_count += 1
+        name = make_valid(savepoint or f"scope_{self._savepoints_count}")
+        self.db_con.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            self.db_con.execute(f"ROLLBACK TO {name}")
+            self.db_con.execute(f"RELEASE {name}")
+            logger.debug(f"Savepoint '{name}' was rolled back")
+            raise
+        self.db_con.execute(f"RELEASE {name}")
+
     def drop_table(self, table_name) -> bool:
         """
         Drop table from current database
@@ -259,7 +362,8 @@ class DBWorker:
             tr_names = f"{tbl_name}_insert;{tbl_name}_delete;{tbl_name}_update".split(
                 ";"
             )
-        map(self.drop_trigger, tr_names)
+        for tr_name in tr_names:
+            self.drop_trigger(tr_name)
 
     def tbl_exists(self, name: str) -> bool:
         sql = """
@@ -330,7 +434,12 @@ class DBWorker:
         if self.index_column:
             self._index_tbl_name = self.data_tbl_name + "_distinct"
             index_tbl_column_names = list(
-                (*self.search_columns, *self.extra_columns, self.index_column)
+                (
+                    *self.search_columns,
+                    *self.normalized_columns.values(),
+                    *self.extra_columns,
+                    self.index_column,
+                )
             )
             if self.date_column:
                 index_tbl_column_names.append(self.date_column)
@@ -352,40 +461,128 @@ class DBWorker:
     def create_table_with_index(self):
 
         self._validate_required()
-        # create empty datatable
-        self.create_table(self.data_tbl_name, *self.data_tbl_columns)
+        # create empty datatable with shadow columns for normalized search values
+        self.create_table(
+            self.data_tbl_name,
+            *self.data_tbl_columns,
+            *self.normalized_columns.values(),
+            **({RAW_ROWID_COLUMN: "INTEGER"} if self.incremental else {}),
+        )
+        if self.incremental:
+            self._create_raw_tables()
         self._create_index_table()
         self._create_index(self.data_tbl_name, self.index_column)
         self._create_index(self._index_tbl_name, self.index_column)
 
     def update_index_from_data(self):
+        """
+        Fill the index table with one row per index_column value: the row
+        with the latest date_column value (the first one of equal dates),
+        the first loaded row without date column. Rows without index value
+        are skipped, they can't be synchronized with the data table.
+        """
         if self.index_column:
-            insert_columns = select_columns = (
-                f"{', '.join(self.search_columns)}, {self.index_column}"
-            )
+            columns = [
+                *self.search_columns,
+                *self.normalized_columns.values(),
+                self.index_column,
+            ]
+            # bare columns of a group are taken from the row of MAX or MIN,
+            # the first one of equal values: groups are scanned in rowid
+            # order by the index_column index. Rows without date are
+            # taken only if the key has no dated rows.
             if self.date_column:
-                insert_columns += f", {self.date_column}"
-                select_columns += f", MAX({self.date_column})"
+                columns.append(self.date_column)
+                aggregate = f"MAX(COALESCE({self.date_column}, '')) AS latest_date"
+            else:
+                aggregate = "MIN(rowid) AS first_rowid"
+            columns = ", ".join(columns)
+            where = f"WHERE {self.index_column} IS NOT NULL "
+            # only keys affected by new or removed files in incremental mode
+            if self.incremental:
+                where += f"AND {self.index_column} IN (SELECT key FROM {self._affected_table}) "
             query = (
-                f"INSERT INTO {self._index_tbl_name} ({insert_columns}) "
-                f"SELECT {select_columns} "
+                f"INSERT INTO {self._index_tbl_name} ({columns}) "
+                f"SELECT {columns} "
+                f"FROM (SELECT {columns}, {aggregate} "
                 f"FROM {self.data_tbl_name} "
-                f"GROUP BY {self.index_column};"
+                f"{where}"
+                f"GROUP BY {self.index_column});"
             )
-            # print(query)
             self.perform_query(query)
             logger.debug(f"Table '{self._index_tbl_name}' updated successfully")
 
-    def sync_with_data_table(self):
-        if self._index_tbl_name:
-            self._sync_tables(
-                self.data_tbl_name,
-                self._index_tbl_name,
-                self.index_column,
-                *self.extra_columns,
-            )
+    def create_search_indexes(self):
+        """
+        Index normalized shadow columns of the target table, used by
+        equality and range scans of rules. Call after data is loaded.
+        """
+        for norm_col in self.normalized_columns.values():
+            self._create_index(self.target_table, norm_col)
+
+    def values_table(self, column_name: str) -> str:
+        """Name of the table with distinct normalized values of the search column"""
+        return f"{self.target_table}_{column_name}_values"
+
+    def build_distinct_values(self):
+        """
+        Build tables with distinct normalized values of search columns
+        and table with distinct tuples of search columns for fts rules.
+        Rules are matched against these tables and expanded back to rows
+        of the target table. Call after data is loaded.
+        """
+        for col, norm_col in self.normalized_columns.items():
+            values_tbl = self.values_table(col)
+            self.drop_table(values_tbl)
+            self.create_table(values_tbl, "value", temporary=self.use_temp_tables)
+            self.perform_query(f"""
+                INSERT INTO {values_tbl} (value)
+                SELECT DISTINCT {norm_col}
+                FROM {self.target_table}
+                WHERE {norm_col} IS NOT NULL
+                """)
+            self._create_index(values_tbl, "value", unique_index=True)
+
+        if self._search_tuples_table:
+            columns = ", ".join(self.search_columns)
+            # content table is kept between runs in incremental mode
+            self.perform_query(f"DELETE FROM {self._search_tuples_table}")
+            self.perform_query(f"""
+                INSERT INTO {self._search_tuples_table} ({columns})
+                SELECT DISTINCT {columns}
+                FROM {self.target_table}
+                """)
+            self._create_index(self._search_tuples_table, *self.search_columns)
+            # with the match cache fts rules are matched against an index
+            # of tuples missing in the cache, see `insert_matches_from_fts`
+            if self.fts_build == FtsBuild.REBUILD and self.match_cache is None:
+                self.rebuild_search_table()
+
+    def sync_with_data_table(self) -> dict[str, int]:
+        """
+        Sync data table with the index table.
+        :return: dict, numbers of updated, inserted and deleted rows
+            of the data table, empty without index table
+        """
+        if not self._index_tbl_name:
+            return {}
+        return self._sync_tables(
+            self.data_tbl_name,
+            self._index_tbl_name,
+            self.index_column,
+            *self.extra_columns,
+            scope_tbl=self._affected_table if self.incremental else None,
+        )
 
-    def _sync_tables(self, target_tbl, source_tbl, index_col, *cols):
+    def _sync_tables(
+        self, target_tbl, source_tbl, index_col, *cols, scope_tbl: str | None = None
+    ) -> dict[str, int]:
+        """
+        Update target table from source table by index column.
+        :param scope_tbl: str, table with `key` column, if set only rows of
+            target table with these keys are deleted when missing in source
+        :return: dict, numbers of updated, inserted and deleted rows
+        """
 
         cols_update = ", ".join(f"{c}=s.{c}" for c in cols if c != index_col)
 
@@ -397,6 +594,7 @@ class DBWorker:
         """
 
         self.perform_query(update_sql)
+        updated = self._changes()
 
         insert_cols = ", ".join(cols)
 
@@ -412,28 +610,37 @@ class DBWorker:
         """
 
         self.perform_query(insert_sql)
+        inserted = self._changes()
 
+        scope = (
+            f"AND t.{index_col} IN (SELECT key FROM {scope_tbl})" if scope_tbl else ""
+        )
         delete_sql = f"""
         DELETE FROM {target_tbl} AS t
         WHERE NOT EXISTS (
             SELECT 1
             FROM {source_tbl} AS s
             WHERE s.{index_col}=t.{index_col}
-        );
+        )
+        {scope};
         """
 
         self.perform_query(delete_sql)
+        deleted = self._changes()
         logger.debug(f"Sync {target_tbl} with {source_tbl} on {index_col}")
+        return {"updated": updated, "inserted": inserted, "deleted": deleted}
 
     # ---------------------------------------------------------
     # FTS search
     # ---------------------------------------------------------
     def link_search_table(self, suffix: str | None = "_fts"):
         """
-        Creates Virtual SQLight3 FTS 5 table using provided datatable as a content table.
-        And setting triggers on update, delete and insert actions to keep it synchronised to the datatable.
+        Creates Virtual SQLight3 FTS 5 table using table of distinct search tuples as a content table.
+        The content table is filled by `build_distinct_values` after data import, then
+        depending on `fts_build`:
+            rebuild  - the index is built once by FTS5 'rebuild' command
+            triggers - the index is kept in sync by insert, delete and update triggers
         For mor details please check: https://www.sqlite.org/fts5.html#external_content_tables
-        to be used as a content for a Virtual table FTS (text-search)
         :param suffix: str, define the name of a search table as
         {data_table_name}{suffix} it is recommended to keep default
         :return:
@@ -445,6 +652,10 @@ class DBWorker:
         search_columns = self.search_columns.copy()
 
         validate_names(search_tbl, *search_columns)
+        # content table has to be in the same schema as fts table to be rebuilt
+        self._search_tuples_table = tbl_name = f"{tbl_name}_search_tuples"
+        self.create_table(tbl_name, *search_columns)
+        self.use_fts = True
         # ensure that there are no table with the same name
         query = (
             f"CREATE VIRTUAL TABLE IF NOT EXISTS {search_tbl} "
@@ -452,7 +663,16 @@ class DBWorker:
         )
         self.perform_query(query)
         logger.debug(f"Search table '{search_tbl}' was successfully created")
-        self.create_triggers(tbl_name, search_tbl, search_columns)
+        if self.fts_build == FtsBuild.TRIGGERS:
+            self.create_triggers(tbl_name, search_tbl, search_columns)
+
+    def rebuild_search_table(self):
+        """Build FTS index from its content table in a single pass."""
+        self.perform_query(
+            f"INSERT INTO {self._fts_table_name} ({self._fts_table_name}) "
+            f"VALUES ('rebuild')"
+        )
+        logger.debug(f"Search table '{self._fts_table_name}' was rebuilt")
 
     def create_triggers(self, tbl_name, search_tbl, search_columns):
         columns = ",".join(search_columns)
@@ -482,7 +702,7 @@ class DBWorker:
 
             "update": f"""
             CREATE TRIGGER IF NOT EXISTS {tbl_name}_update 
-            AFTER UPDATE ON {tbl_name} 
+            AFTER UPDATE OF {columns} ON {tbl_name} 
             BEGIN 
                 INSERT INTO {search_tbl} ({search_tbl}, rowid, {columns})
                 VALUES ('delete', old.rowid, {old_columns});
@@ -519,6 +739,51 @@ class DBWorker:
         )  # load data
         return chunk.shape[0]
 
+    def frame_to_sql(
+        self, df: pl.DataFrame, table_name: str, if_table_exists: str = "replace"
+    ) -> int:
+        """
+        Write Polars DataFrame to database using ADBC connection.
+        Inside a transaction the frame is written by the sqlite3 connection,
+        ADBC connection would wait for the lock held by the transaction.
+        :return: int, number of rows written
+        """
+        if self.db_con.in_transaction:
+            return self._frame_to_sql_con(df, table_name, if_table_exists)
+        rows_count = df.write_database(
+            table_name=table_name,
+            connection=self.db_adb_con,
+            engine="adbc",
+            if_table_exists=if_table_exists,
+        )
+        self.db_adb_con.commit()
+        return rows_count
+
+    def _frame_to_sql_con(
+        self, df: pl.DataFrame, table_name: str, if_table_exists: str
+    ) -> int:
+        if if_table_exists == "replace":
+            self.drop_table(table_name)
+        exists = "IF NOT EXISTS" if if_table_exists == "append" else ""
+        columns = ", ".join(
+            f"{col} {self._sql_type(dtype)}" for col, dtype in df.schema.items()
+        )
+        self.perform_query(f"CREATE TABLE {exists} {table_name} ({columns})")
+        placeholders = ", ".join("?" * df.width)
+        self.db_con.executemany(
+            f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})",
+            df.iter_rows(),
+        )
+        return df.height
+
+    @staticmethod
+    def _sql_type(dtype: pl.DataType) -> str:
+        if dtype.is_integer():
+            return "INTEGER"
+        if dtype.is_float():
+            return "REAL"
+        return "TEXT"
+
     # ---------------------------------------------------------
     # Mapping - tables
     # ---------------------------------------------------------
@@ -538,52 +803,291 @@ class DBWorker:
         self._create_index(self._full_matches_table, data_rowid)
         self._create_index(self._full_matches_table, mapping_index)
 
-    def insert_matches_from_fts(self, mapping_table: str):
+    def _rules_key(self, kind: str, rules_query: str) -> str | None:
+        """Key of rules in the match cache, None if cache is not used."""
+        if self.match_cache is None:
+            return None
+        return MatchCache.rules_key(kind, self.perform_query(rules_query).fetchall())
+
+    def _match_values(
+        self,
+        values_tbl: str,
+        rules_key: str | None,
+        evaluate: Callable[[str], str],
+        misses_tbl: str = "value_misses",
+    ) -> str:
+        """
+        Evaluate rules only for values of values_tbl missing in the match cache.
+        :param values_tbl: str, table with distinct values in `value` column
+        :param rules_key: str, key of rules in the match cache
+        :param evaluate: callable getting name of a table with values to check
+            and returning query of (value, mapping_index) matched by rules
+        :return: str, query of (value, mapping_index) for all values of values_tbl
+        """
+        if rules_key is None:
+            return evaluate(values_tbl)
+        self.match_cache.collect_misses(rules_key, values_tbl, misses_tbl)
+        self.match_cache.store(rules_key, misses_tbl, evaluate(misses_tbl))
+        return self.match_cache.hits_query(rules_key, values_tbl)
+
+    def _insert_value_matches(self, col: str, hits_query: str) -> int:
+        """
+        Expand matches of distinct normalized values to rows of the target table.
+        :param col: str, search column
+        :param hits_query: str, query returning value and mapping_index columns
+            with normalized values of the column matched by rules
+        :return: int, number of inserted matches
+        """
+        index_col = MappingColumns.mapping_index
+        data_rowid_col = MappingColumns.data_rowid
+
+        sql = f"""
+        WITH hits AS MATERIALIZED ({hits_query})
+        INSERT INTO {self._full_matches_table} ({data_rowid_col}, {index_col})
+        SELECT data.rowid, hits.{index_col}
+        FROM hits
+        JOIN {self.target_table} AS data
+        ON data.{self.normalized_columns[col]} = hits.value
+        """
+        self.perform_query(sql)
+        return self._changes()
+
+    def _fts_hits_query(
+        self, mapping_table: str, values_tbl: str, fts_table: str | None = None
+    ) -> str:
+        index_col = MappingColumns.mapping_index
+        pattern_col = MappingColumns.pattern
+        fts_table = fts_table or self._fts_table_name
+        return f"""
+            SELECT v.value, mt.{index_col}
+            FROM {fts_table}
+            JOIN {mapping_table} AS mt
+            ON {fts_table} MATCH mt.{pattern_col}
+            JOIN {values_tbl} AS v
+            ON v.tuple_rowid = {fts_table}.rowid
+            """
+
+    def _fts_misses_hits_query(self, mapping_table: str, misses_tbl: str) -> str:
+        """
+        Index tuples missing in the match cache in a temporary FTS table,
+        so fts rules are matched only against them.
+        """
+        misses_fts = f"{self._fts_table_name}_misses"
+        columns = ", ".join(self.search_columns)
+        self.drop_table(misses_fts)
+        self.perform_query(
+            f"CREATE VIRTUAL TABLE temp.{misses_fts} USING fts5({columns})"
+        )
+        self.perform_query(f"""
+            INSERT INTO {misses_fts} (rowid, {columns})
+            SELECT t.rowid, {", ".join(f"t.{c}" for c in self.search_columns)}
+            FROM {self._search_tuples_table} AS t
+            JOIN {misses_tbl} AS m
+            ON m.tuple_rowid = t.rowid
+            """)
+        return self._fts_hits_query(mapping_table, misses_tbl, fts_table=misses_fts)
+
+    def insert_matches_from_fts(self, mapping_table: str) -> int:
+        """
+        Match fts rules against distinct tuples of search columns,
+        matched tuples are expanded to rows of the target table.
+        Tuples are keyed in the match cache as JSON array of their values,
+        with the cache rules are matched only against missing tuples.
+        """
         index_col = MappingColumns.mapping_index
         data_rowid_col = MappingColumns.data_rowid
         pattern_col = MappingColumns.pattern
+        tuples_tbl = self._search_tuples_table
+        values_tbl = f"{tuples_tbl}_values"
+        same_tuple = " AND ".join(f"data.{c} IS t.{c}" for c in self.search_columns)
+
+        self.drop_table(values_tbl)
+        self.perform_query(f"""
+            CREATE TEMP TABLE {values_tbl} AS
+            SELECT rowid AS tuple_rowid, json_array({', '.join(self.search_columns)}) AS value
+            FROM {tuples_tbl}
+            """)
+
+        rules_key = self._rules_key(
+            f"fts:{','.join(self.search_columns)}",
+            f"SELECT {index_col}, {pattern_col} FROM {mapping_table}",
+        )
+        evaluate = self._fts_hits_query
+        if rules_key is not None:
+            evaluate = self._fts_misses_hits_query
+        hits_query = self._match_values(
+            values_tbl, rules_key, partial(evaluate, mapping_table)
+        )
+
         sql = f"""
+                WITH hits AS MATERIALIZED ({hits_query})
                 INSERT INTO {self._full_matches_table} ({data_rowid_col}, {index_col})
-                SELECT {self._fts_table_name}.rowid, mt.{index_col}
-                FROM {self._fts_table_name}
-                JOIN {mapping_table} AS mt
-                ON {self._fts_table_name} MATCH mt.{pattern_col}
+                SELECT data.rowid, hits.{index_col}
+                FROM {self.target_table} AS data
+                JOIN {tuples_tbl} AS t
+                ON {same_tuple}
+                JOIN {values_tbl} AS v
+                ON v.tuple_rowid = t.rowid
+                JOIN hits
+                ON hits.value = v.value
                 """
 
         self.perform_query(sql)
+        inserted = self._changes()
+        self.drop_table(f"{self._fts_table_name}_misses")
 
         # self.drop_table(mapping_table)
+        return inserted
 
-    def insert_matches(self, mapping_table: str):
+    @staticmethod
+    def _like_hits_query(mapping_table: str, col: str, values_tbl: str) -> str:
+        column_name_col = MappingColumns.column_name
+        index_col = MappingColumns.mapping_index
+        pattern_col = MappingColumns.pattern
+        return f"""
+            SELECT v.value, rules.{index_col}
+            FROM {values_tbl} AS v
+            JOIN {mapping_table} AS rules
+            ON rules.{column_name_col} = '{col}'
+            AND rules.{pattern_col} IS NOT NULL
+            AND v.value LIKE rules.{pattern_col}
+            """
 
+    def insert_matches(self, mapping_table: str) -> int:
+        """
+        Match rules by LIKE pattern, each rule is checked once
+        per distinct normalized value of the search column
+        missing in the match cache.
+        """
         column_name_col = MappingColumns.column_name
         index_col = MappingColumns.mapping_index
-        data_rowid_col = MappingColumns.data_rowid
         pattern_col = MappingColumns.pattern
-        matches_table = self._full_matches_table
 
-        union_queries = []
+        inserted = 0
+        for col in self.search_columns:
+            rules_key = self._rules_key(
+                f"like:{col}",
+                f"SELECT {index_col}, {pattern_col} FROM {mapping_table} "
+                f"WHERE {column_name_col} = '{col}'",
+            )
+            hits_query = self._match_values(
+                self.values_table(col),
+                rules_key,
+                partial(self._like_hits_query, mapping_table, col),
+            )
+            inserted += self._insert_value_matches(col, hits_query)
+        self.drop_table(mapping_table)
+        return inserted
+
+    def insert_exact_matches(self, mapping_table: str) -> int:
+        """
+        Match full match (f) rules by equality of the normalized term and
+        the normalized shadow column, each rule costs one index lookup.
+        :param mapping_table: str, table with mapping_index, column_name
+            and term (normalized, without LIKE wildcards) columns
+        """
+        column_name_col = MappingColumns.column_name
+        index_col = MappingColumns.mapping_index
+        term_col = MappingColumns.term
 
+        inserted = 0
         for col in self.search_columns:
-            union_queries.append(f"""            
-                SELECT DISTINCT 
-                    data.rowid AS {data_rowid_col},
-                    rules.{index_col}                                       
-                FROM {self.target_table} AS data
-                JOIN {mapping_table} AS rules
-                ON rules.{column_name_col} = '{col}'
-                AND rules.{pattern_col} IS NOT NULL
-                AND data.{col} LIKE rules.{pattern_col} COLLATE NOCASE
-                """)
+            inserted += self._insert_value_matches(
+                col,
+                f"""
+                SELECT rules.{term_col} AS value, rules.{index_col}
+                FROM {mapping_table} AS rules
+                WHERE rules.{column_name_col} = '{col}'
+                """,
+            )
+        self.drop_table(mapping_table)
+        return inserted
 
-        rule_match_query = "\nUNION ALL\n".join(union_queries)
+    def insert_prefix_matches(self, mapping_table: str) -> int:
+        """
+        Match starts with (s) rules by range scan over distinct normalized
+        values: value >= term AND value < term || U+10FFFF.
+        CROSS JOIN keeps rules as the outer loop so the index is used.
+        :param mapping_table: str, table with mapping_index, column_name
+            and term (normalized, without LIKE wildcards) columns
+        """
+        column_name_col = MappingColumns.column_name
+        index_col = MappingColumns.mapping_index
+        term_col = MappingColumns.term
 
-        sql = f""" 
-        INSERT INTO {matches_table} ({data_rowid_col}, {index_col})
-         {rule_match_query}
-         """
-        self.perform_query(sql)
+        inserted = 0
+        for col in self.search_columns:
+            inserted += self._insert_value_matches(
+                col,
+                f"""
+                SELECT v.value, rules.{index_col}
+                FROM {mapping_table} AS rules
+                CROSS JOIN {self.values_table(col)} AS v
+                ON v.value >= rules.{term_col}
+                AND v.value < rules.{term_col} || char(1114111)
+                WHERE rules.{column_name_col} = '{col}'
+                """,
+            )
         self.drop_table(mapping_table)
+        return inserted
+
+    def _multi_pattern_hits_query(
+        self, col: str, col_rules: pl.DataFrame, hits_table: str, values_tbl: str
+    ) -> str:
+        """Scan values with Aho-Corasick automaton, matches are saved to hits_table."""
+        index_col = MappingColumns.mapping_index
+        matcher = MultiPatternMatcher(col_rules)
+        values = self.perform_query(f"SELECT value FROM {values_tbl}")
+        hits = pl.DataFrame(
+            list(matcher.match_values(v for (v,) in values)),
+            schema={"value": pl.Utf8, index_col: pl.Int64},
+            orient="row",
+        )
+        logger.debug(
+            f"{hits.height:,} values of '{col}' matched with multi pattern rules"
+        )
+        self.frame_to_sql(hits, hits_table)
+        return f"SELECT value, {index_col} FROM {hits_table}"
+
+    def insert_multi_pattern_matches(
+        self, rules: pl.DataFrame, hits_table: str = "multi_pattern_hits"
+    ) -> int:
+        """
+        Match partial (p), starts with (s) and ends with (e) rules using
+        Aho-Corasick automaton built per search column instead of
+        joining every row with every LIKE rule.
+
+        Each distinct normalized value of a search column missing in the
+        match cache is scanned once, matched values are joined back
+        to the rows of the target table.
+        :param rules: DataFrame with mapping_index, column_name, match
+            and term (normalized, without LIKE wildcards) columns,
+            see `split_plain_rules`
+        :param hits_table: str, name of a temporary table for matched values
+        """
+        column_name_col = MappingColumns.column_name
+        index_col = MappingColumns.mapping_index
+
+        inserted = 0
+        for (col,), col_rules in rules.group_by(column_name_col):
+            if col not in self.search_columns:
+                continue
+            rules_key = None
+            if self.match_cache is not None:
+                rules_key = MatchCache.rules_key(
+                    f"multi_pattern:{col}",
+                    col_rules.select(
+                        index_col, MappingColumns.match, MappingColumns.term
+                    ).iter_rows(),
+                )
+            hits_query = self._match_values(
+                self.values_table(col),
+                rules_key,
+                partial(self._multi_pattern_hits_query, col, col_rules, hits_table),
+            )
+            inserted += self._insert_value_matches(col, hits_query)
+            self.drop_table(hits_table)
+        return inserted
 
     def _build_joined_matches(self, mapping_table):
 
@@ -608,26 +1112,25 @@ class DBWorker:
 
     def apply_mapping(
         self, mapping_table: str, action_type: str, extra_cols: list, separator=", "
-    ):
+    ) -> int:
         """
         Apply mapping rules in order:
         DELETE → REPLACE → ADD
+        :return: int, number of deleted or updated rows of the target table
         """
 
-        self._build_joined_matches(mapping_table)
-
         match action_type:
             case ActionType.DELETE:
-                self._apply_delete()
+                self._build_joined_matches(mapping_table)
+                return self._apply_delete()
             case ActionType.REPLACE:
-                self._apply_replace(extra_cols)
+                return self._apply_replace(mapping_table, extra_cols)
             case ActionType.ADD:
-                self._ensure_tags_table()
-                self._apply_add(separator)
+                return self._apply_add(mapping_table, extra_cols, separator)
             case _:
-                pass
+                return 0
 
-    def _apply_delete(self) -> None:
+    def _apply_delete(self) -> int:
 
         sql = f"""
             DELETE FROM {self.target_table}
@@ -637,135 +1140,419 @@ class DBWorker:
                 )                            
             """
 
-        self.perform_query(sql)
-
         logger.debug(f"Apply delete rules to {self.target_table}")
         self.perform_query(sql)
+        return self._changes()
 
-    def _apply_replace(self, column_names: list):
+    def _apply_replace(self, mapping_table: str, column_names: list) -> int:
+        """
+        Apply all REPLACE rules in a single UPDATE. For each matched row
+        and extra column the value is taken from the rule with the highest
+        mapping_index among matched rules having non-null value in it.
+        """
+        index_col = MappingColumns.mapping_index
         extra_cols_set = set(self.extra_columns)
         extra_cols = [col for col in column_names if col in extra_cols_set]
+        if not extra_cols:
+            return 0
 
-        select_cols = ",\n".join(f"{col}" for col in extra_cols)
-        update_clause = ",\n".join(f"{col} = rr.{col}" for col in extra_cols)
+        self._create_index(mapping_table, index_col)
+        winners = ",\n".join(
+            f"MAX(CASE WHEN r.{col} IS NOT NULL THEN fm.{index_col} END) AS {col}"
+            for col in extra_cols
+        )
+        values = ",\n".join(f"r_{col}.{col} AS {col}" for col in extra_cols)
+        values_joins = "\n".join(
+            f"LEFT JOIN {mapping_table} AS r_{col} ON r_{col}.{index_col} = w.{col}"
+            for col in extra_cols
+        )
+        update_clause = ",\n".join(
+            f"{col} = COALESCE(v.{col}, {self.target_table}.{col})"
+            for col in extra_cols
+        )
 
         sql = f"""
-                WITH ranked_rules AS (
+                WITH winners AS (
+                    SELECT
+                        fm.{MappingColumns.data_rowid},
+                        {winners}
+                    FROM {self._full_matches_table} AS fm
+                    JOIN {mapping_table} AS r
+                    ON r.{index_col} = fm.{index_col}
+                    GROUP BY fm.{MappingColumns.data_rowid}
+                ),
+                replace_values AS (
                     SELECT
-                        data_rowid,
-                        {select_cols},
-                        ROW_NUMBER() OVER(
-                            PARTITION BY data_rowid
-                            ORDER BY {MappingColumns.mapping_index} DESC, rowid DESC
-                        ) AS rn
-                    FROM {self._joined_matches_table}
+                        w.{MappingColumns.data_rowid},
+                        {values}
+                    FROM winners AS w
+                    {values_joins}
                 )
                 UPDATE {self.target_table}
                 SET
                     {update_clause}
-                FROM ranked_rules rr
-                WHERE rr.rn = 1
-                AND {self.target_table}.rowid = rr.data_rowid
+                FROM replace_values AS v
+                WHERE {self.target_table}.rowid = v.{MappingColumns.data_rowid}
                 """
 
         logger.debug(f"Apply replace rules to {self.target_table}")
         self.perform_query(sql)
+        return self._changes()
 
-    def _apply_add(self, separator=", "):
+    def _apply_add(self, mapping_table: str, column_names: list, separator=", ") -> int:
+        """
+        Apply ADD rules: tags of all matched rules are joined per row and
+        column, deduplicated and sorted.
+        Tags are stored as integer ids of columns and values, strings are
+        taken only to join tags.
+        """
+        index_col = MappingColumns.mapping_index
+        extra_cols_set = set(self.extra_columns)
+        extra_cols = [col for col in column_names if col in extra_cols_set]
+        if not extra_cols:
+            return 0
 
         logger.debug(f"Apply add rules to {self.target_table}")
 
+        self._create_tags_tables()
         tag_unions = []
-
-        for col in self.extra_columns:
+        for column_id, col in enumerate(extra_cols):
             tag_unions.append(f"""
-                SELECT
-                    rm.data_rowid AS rowid,
-                    '{col}' AS column_name,
-                    rm.{col} AS value
-                FROM {self._joined_matches_table} rm
-                WHERE rm.{col} IS NOT NULL
-                AND rm.{col} != ''
+                SELECT {index_col}, {column_id} AS column_id, {col} AS value
+                FROM {mapping_table}
+                WHERE {col} IS NOT NULL
+                AND {col} != ''
                 """)
-
-        tag_expand_query = "\nUNION ALL\n".join(tag_unions)
-
-        insert_sql = f"""
-        INSERT OR IGNORE INTO data_table_tags(rowid, column_name, value)
-        {tag_expand_query}
-        """
-
-        self.perform_query(insert_sql)
-
-        # получаем реально используемые колонки
-        cols_query = """
-                     SELECT DISTINCT column_name
-                     FROM data_table_tags \
-                     """
-        used_columns = self.perform_query(cols_query).fetchall()
-        used_columns = [row[0] for row in used_columns]
-
-        # обновляем только эти колонки
-        for col in used_columns:
-            update_sql = f"""
-            UPDATE {self.target_table}
-            SET {col} = (
-                SELECT GROUP_CONCAT(value, '{separator}')
-                FROM (
-                    SELECT DISTINCT value
-                    FROM data_table_tags
-                    WHERE rowid = {self.target_table}.rowid
-                    AND column_name = '{col}'
-                    ORDER BY value
-                )
-            )
-            WHERE rowid IN (
-                SELECT rowid
-                FROM data_table_tags
-                WHERE column_name = '{col}'
+        rule_tags = "\nUNION ALL\n".join(tag_unions)
+        # values are interned in sorted order, so ids order is the tags order
+        self.perform_query(f"""
+            INSERT INTO {self._tag_values_table} (value)
+            SELECT DISTINCT value
+            FROM ({rule_tags})
+            ORDER BY value
+            """)
+        self.perform_query(f"""
+            INSERT INTO {self._rule_tags_table} ({index_col}, column_id, value_id)
+            SELECT rt.{index_col}, rt.column_id, v.value_id
+            FROM ({rule_tags}) AS rt
+            JOIN {self._tag_values_table} AS v
+            ON v.value = rt.value
+            """)
+        self._create_index(self._rule_tags_table, index_col)
+        self.perform_query(f"""
+            INSERT OR IGNORE INTO {self._tags_table} (data_rowid, column_id, value_id)
+            SELECT fm.{MappingColumns.data_rowid}, rt.column_id, rt.value_id
+            FROM {self._full_matches_table} AS fm
+            JOIN {self._rule_tags_table} AS rt
+            ON rt.{index_col} = fm.{index_col}
+            """)
+
+        # tags are joined once per (row, column) and applied to all columns
+        # in one update. Order of GROUP_CONCAT is not defined by SQLite,
+        # tags are fed to it ordered by value ids, which follow tags order
+        tags_pivot = ",\n".join(
+            f"MAX(CASE WHEN column_id = {column_id} THEN value END) AS {col}"
+            for column_id, col in enumerate(extra_cols)
+        )
+        update_clause = ",\n".join(
+            f"{col} = COALESCE(t.{col}, {self.target_table}.{col})"
+            for col in extra_cols
+        )
+        update_sql = f"""
+        WITH joined_tags AS (
+            SELECT
+                data_rowid,
+                column_id,
+                GROUP_CONCAT(value, '{separator}') AS value
+            FROM (
+                SELECT t.data_rowid, t.column_id, v.value
+                FROM {self._tags_table} AS t
+                JOIN {self._tag_values_table} AS v
+                ON v.value_id = t.value_id
+                ORDER BY t.data_rowid, t.column_id, t.value_id
             )
-            """
-
-            self.perform_query(update_sql)
+            GROUP BY data_rowid, column_id
+        ),
+        row_tags AS (
+            SELECT
+                data_rowid,
+                {tags_pivot}
+            FROM joined_tags
+            GROUP BY data_rowid
+        )
+        UPDATE {self.target_table}
+        SET
+            {update_clause}
+        FROM row_tags AS t
+        WHERE {self.target_table}.rowid = t.data_rowid
+        """
 
-    def _ensure_tags_table(self):
-        self.create_table(
-            "data_table_tags",
-            "rowid",
-            "column_name",
-            "value",
-            temporary=self.use_temp_tables,
+        self.perform_query(update_sql)
+        updated = self._changes()
+        self.drop_tables(
+            self._tags_table, self._rule_tags_table, self._tag_values_table
         )
+        return updated
 
-        self._create_index(
-            "data_table_tags", "rowid", "column_name", "value", unique_index=True
+    def _create_tags_tables(self):
+        tmp = "TEMP" if self.use_temp_tables else ""
+        self.drop_tables(
+            self._tags_table, self._rule_tags_table, self._tag_values_table
         )
-        self._create_index("data_table_tags", "rowid", "column_name")
+        self.perform_query(f"""
+            CREATE {tmp} TABLE {self._tag_values_table} (
+                value_id INTEGER PRIMARY KEY,
+                value TEXT UNIQUE
+            )
+            """)
+        self.perform_query(f"""
+            CREATE {tmp} TABLE {self._rule_tags_table} (
+                {MappingColumns.mapping_index} INTEGER,
+                column_id INTEGER,
+                value_id INTEGER
+            )
+            """)
+        self.perform_query(f"""
+            CREATE {tmp} TABLE {self._tags_table} (
+                data_rowid INTEGER,
+                column_id INTEGER,
+                value_id INTEGER,
+                PRIMARY KEY (data_rowid, column_id, value_id)
+            ) WITHOUT ROWID
+            """)
 
     def build_non_mapped(self) -> list[sqlite3.Row] | None:
         """
-        Get rows with NULL values for defined columns
+        Get rows with NULL values for defined columns.
+        Table is created in the main schema to be exported via ADBC connection.
+        In incremental mode rows are taken from the synchronized data table,
+        the target table holds only rows affected in this run.
         """
         select_cols = ", ".join(self.search_columns + self.extra_columns)
+        source_tbl = self.data_tbl_name if self.incremental else self.target_table
+        self.drop_table(self.non_mapped_table)
         query = f"""
-            CREATE TEMP TABLE {self.non_mapped_table} AS 
+            CREATE TABLE {self.non_mapped_table} AS 
                 SELECT DISTINCT {select_cols} 
-                FROM {self.target_table} 
+                FROM {source_tbl} 
                 WHERE   {' | '.join(self.extra_columns)} IS NULL                
             """
         self.perform_query(query)
 
+    # ---------------------------------------------------------
+    # Incremental ingest
+    # ---------------------------------------------------------
+
+    def check_ingest_state(self, layout_key: str, rules_key: str) -> bool:
+        """
+        Compare keys of the kept database with keys of this run.
+        The database is reset if layout of data (columns, search columns,
+        reader settings) changed.
+        :param layout_key: str, hash of data layout
+        :param rules_key: str, hash of dictionary rules, saved by `finish_ingest`
+        :return: bool, True if all rows have to be matched with rules again
+        """
+        self._create_state_table()
+        state = dict(self.perform_query(f"SELECT name, value FROM {self._state_table}"))
+        self._ingest_rules_key = rules_key
+        if state.get("layout") == layout_key:
+            return state.get("rules") != rules_key
+
+        if state:
+            logger.info("Data layout changed, all files will be loaded again")
+        self._reset_base()
+        self.perform_query(
+            f"INSERT OR REPLACE INTO {self._state_table} (name, value) VALUES (?, ?)",
+            ("layout", layout_key),
+        )
+        return True
+
+    def _reset_base(self):
+        """Drop all tables of the main schema, virtual tables go first."""
+        tables = self.perform_query(f"""
+            SELECT name, sql LIKE 'CREATE VIRTUAL%' AS is_virtual
+            FROM {MASTER_TABLE}
+            WHERE type = 'table'
+            AND name NOT LIKE 'sqlite_%'
+            ORDER BY is_virtual DESC
+            """).fetchall()
+        for name, _ in tables:
+            self.drop_table(name)
+        self._create_state_table()
+
+    def _create_state_table(self):
+        self.perform_query(f"""
+            CREATE TABLE IF NOT EXISTS {self._state_table} (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            )
+            """)
+
+    def _create_raw_tables(self):
+        """Create raw data table, manifest of loaded files and table of affected keys."""
+        columns = ", ".join(
+            f"{col} TEXT"
+            for col in (*self.main_columns, *self.normalized_columns.values())
+        )
+        self.perform_query(f"""
+            CREATE TABLE IF NOT EXISTS {self.raw_tbl_name} (
+                {RAW_ROWID_COLUMN} INTEGER PRIMARY KEY,
+                {columns},
+                {FILE_ID_COLUMN} INTEGER
+            )
+            """)
+        self._create_index(self.raw_tbl_name, FILE_ID_COLUMN)
+        if self.index_column != RAW_ROWID_COLUMN:
+            self._create_index(self.raw_tbl_name, self.index_column)
+
+        self.perform_query(f"""
+            CREATE TABLE IF NOT EXISTS {self.manifest_table} (
+                {FILE_ID_COLUMN} INTEGER PRIMARY KEY,
+                path TEXT UNIQUE,
+                size INTEGER,
+                mtime REAL,
+                content_hash TEXT
+            )
+            """)
+        # keys are kept until the run is finished to survive interrupted runs
+        self.perform_query(f"""
+            CREATE TABLE IF NOT EXISTS {self._affected_table} (
+                key PRIMARY KEY
+            )
+            """)
+
+    def _mark_affected(self, where: str, params: tuple = ()):
+        """Add keys of raw rows selected by where clause to affected keys."""
+        self.perform_query(
+            f"""
+            INSERT OR IGNORE INTO {self._affected_table} (key)
+            SELECT DISTINCT {self.index_column}
+            FROM {self.raw_tbl_name}
+            {where}
+            """,
+            params,
+        )
+
+    def sync_manifest(self, files: list[Path]) -> list[Path]:
+        """
+        Compare data files with the manifest of loaded files.
+        Rows of removed, changed or partially loaded files are removed
+        from the raw data table and their keys are marked as affected.
+        Files are identified by name, changed files are detected by
+        size and mtime and confirmed by content hash.
+        :param files: list[Path], data files of this run
+        :return: list[Path], new and changed files to be loaded
+        """
+        manifest = {
+            path: (file_id, size, mtime, content_hash)
+            for file_id, path, size, mtime, content_hash in self.perform_query(
+                f"SELECT {FILE_ID_COLUMN}, path, size, mtime, content_hash "
+                f"FROM {self.manifest_table}"
+            ).fetchall()
+        }
+        current = {file.name: file for file in files}
+
+        removed_ids = [
+            file_id
+            for path, (file_id, *_, content_hash) in manifest.items()
+            if path not in current or content_hash is None
+        ]
+        to_load = []
+        for path, file in current.items():
+            entry = manifest.get(path)
+            if entry is None or entry[3] is None:
+                to_load.append(file)
+                continue
+            file_id, size, mtime, content_hash = entry
+            stat = file.stat()
+            if (stat.st_size, stat.st_mtime) == (size, mtime):
+                continue
+            if file_hash(file) == content_hash:
+                self.perform_query(
+                    f"UPDATE {self.manifest_table} SET size = ?, mtime = ? "
+                    f"WHERE {FILE_ID_COLUMN} = ?",
+                    (stat.st_size, stat.st_mtime, file_id),
+                )
+                continue
+            removed_ids.append(file_id)
+            to_load.append(file)
+
+        for file_id in removed_ids:
+            where = f"WHERE {FILE_ID_COLUMN} = ?"
+            self._mark_affected(where, (file_id,))
+            self.perform_query(f"DELETE FROM {self.raw_tbl_name} {where}", (file_id,))
+            self.perform_query(f"DELETE FROM {self.manifest_table} {where}", (file_id,))
+
+        logger.info(
+            f"{len(current) - len(to_load):,} files are already loaded, "
+            f"{len(to_load):,} files to load, {len(removed_ids):,} files removed"
+        )
+        return to_load
+
+    def register_file(self, file: Path) -> int:
+        """Add file to the manifest before loading, return its file_id."""
+        stat = file.stat()
+        cursor = self.perform_query(
+            f"INSERT OR REPLACE INTO {self.manifest_table} (path, size, mtime) "
+            f"VALUES (?, ?, ?)",
+            (file.name, stat.st_size, stat.st_mtime),
+        )
+        return cursor.lastrowid
+
+    def file_loaded(self, file_id: int, file: Path):
+        """Mark keys of the loaded file as affected and save its content hash."""
+        self._mark_affected(f"WHERE {FILE_ID_COLUMN} = ?", (file_id,))
+        self.perform_query(
+            f"UPDATE {self.manifest_table} SET content_hash = ? "
+            f"WHERE {FILE_ID_COLUMN} = ?",
+            (file_hash(file), file_id),
+        )
+
+    def refresh_data_table(self, all_keys: bool = False):
+        """
+        Replace rows of affected keys in the data table with raw rows.
+        :param all_keys: bool, mark all keys as affected (e.g. rules changed)
+        """
+        if all_keys:
+            self._mark_affected("")
+        scope = f"WHERE {self.index_column} IN (SELECT key FROM {self._affected_table})"
+        self.perform_query(f"DELETE FROM {self.data_tbl_name} {scope}")
+        columns = ", ".join(
+            (*self.main_columns, *self.normalized_columns.values(), RAW_ROWID_COLUMN)
+        )
+        cursor = self.perform_query(f"""
+            INSERT INTO {self.data_tbl_name} ({columns})
+            SELECT {columns}
+            FROM {self.raw_tbl_name}
+            {scope}
+            ORDER BY {RAW_ROWID_COLUMN}
+            """)
+        logger.info(f"{cursor.rowcount:,} rows of new or changed keys to process")
+
+    def finish_ingest(self):
+        """Clear affected keys and save rules key after successful run."""
+        self.perform_query(f"DELETE FROM {self._affected_table}")
+        self.perform_query(
+            f"INSERT OR REPLACE INTO {self._state_table} (name, value) VALUES (?, ?)",
+            ("rules", self._ingest_rules_key),
+        )
+
     # ---------------------------------------------------------
     # Finalization
     # ---------------------------------------------------------
 
-    def _delete_base_files(self):
-        for f in self.db_file.parent.glob(self.db_file.name + "*"):
+    @staticmethod
+    def delete_db_files(db_file: Path):
+        """Delete database file with its WAL and SHM files."""
+        for f in db_file.parent.glob(db_file.name + "*"):
             try:
                 f.unlink(missing_ok=True)
             except PermissionError:
                 logger.warning(f"Cannot delete {f}")
 
+    def _delete_base_files(self):
+        self.delete_db_files(self.db_file)
+
     def close(self):
         logger.info("Cleaning up temporary files")
         # self.drop_triggers(tbl_name=self.data_tbl_name),
@@ -775,10 +1562,14 @@ class DBWorker:
         except Exception as e:
             logger.warning(f"Cannot clean up temporary files: {e}")
 
+        if self.match_cache is not None:
+            self.match_cache.close()
         self.db_con.close()
         self.db_adb_con.close()
 
-        self._delete_base_files()
+        # database is kept between runs in incremental mode
+        if not (self.incremental or self.keep_file):
+            self._delete_base_files()
 
     def __enter__(self):
         return self
@@ -1,8 +1,13 @@
+import json
 import logging
+import shutil
+import tempfile
 from collections.abc import Generator
+from pathlib import Path
 
 import polars as pl
 
+from mko_data_cleaner.core.matchers import normalize_expr
 from mko_data_cleaner.core.models import (
     ActionType,
     DictColumnsIndexes,
@@ -14,6 +19,14 @@ logger = logging.getLogger(__name__)
 
 
 class MappingDict:
+    # frames of the compiled dictionary saved by `build_mapping`
+    COMPILED_FRAMES = ("data", "like_data", "fts_data")
+    COMPILED_META = "meta.json"
+    # suffix of folders being written by `_save_compiled`
+    COMPILED_TMP = ".tmp"
+    # bumped when layout of compiled frames changes
+    COMPILED_VERSION = 3
+
     def __init__(self, data: pl.DataFrame, action_col_indexes: DictColumnsIndexes):
         self.data = data
 
@@ -60,22 +73,6 @@ class MappingDict:
             logger.error(err)
             raise err
 
-    @staticmethod
-    def group_by_cols(df: pl.DataFrame) -> Generator[pl.DataFrame]:
-        current_cols = None
-        current_block: list[dict] = []
-        for row in df.iter_rows(named=True):
-            non_empty = {c: v for c, v in row.items() if v is not None}
-            if current_cols == set(non_empty.keys()):
-                current_block.append(non_empty)
-                continue
-            if current_block:
-                yield pl.from_dicts(current_block)
-            current_block = [non_empty]
-            current_cols = set(non_empty.keys())
-        if current_block:
-            yield pl.from_dicts(current_block)
-
     def generate_rules_blocks(self) -> Generator[tuple[str, pl.DataFrame]]:
         keep_cols = [
             MappingColumns.mapping_index,
@@ -83,15 +80,8 @@ class MappingDict:
         ]
         actions = [ActionType.DELETE, ActionType.REPLACE, ActionType.ADD]
         for action in actions:
-            df_action = self.data.filter(
-                pl.col(MappingColumns.action) == action
-            ).select(keep_cols)
-            match action:
-                case ActionType.DELETE | ActionType.ADD:
-                    yield action, df_action
-                case ActionType.REPLACE:
-                    for df in self.group_by_cols(df_action):
-                        yield action, df
+            # all REPLACE rules form one block, winners are resolved in one pass
+            yield action, self.get_data_mapping_by_action(action).select(keep_cols)
 
     def _initialize_mapping(self):
         # First we use action column indexes to update their names and
@@ -116,10 +106,25 @@ class MappingDict:
         # replace user defined names with internal standard
         self._data_actions.columns = action_names
 
-    def build_mapping(self, *tbl_columns: str, extra_col_names: list[str]):
+    def build_mapping(
+        self,
+        *tbl_columns: str,
+        extra_col_names: list[str],
+        compiled_path: Path | None = None,
+    ):
+        """
+        Build search patterns of rules for given data table columns.
+        :param compiled_path: Path, folder of the compiled dictionary, it is
+            loaded if exists or saved after build otherwise. Name of the folder
+            is expected to be a key of the dictionary content and columns layout
+        """
         self._table_columns = list(tbl_columns)
         # update extra_col_names with names from db
         self.extra_col_names = extra_col_names
+        if compiled_path and self._load_compiled(compiled_path):
+            logger.info(f"Compiled dictionary loaded from '{compiled_path}'")
+            return
+
         self.data = pl.concat(
             [self._data_actions, self._data_mapping], how="horizontal"
         )
@@ -141,6 +146,59 @@ class MappingDict:
         if not self.fts_data.is_empty():
             self.fts_data = self._build_fts_query(self.fts_data)
 
+        if compiled_path:
+            self._save_compiled(compiled_path)
+
+    def _save_compiled(self, path: Path):
+        """
+        Save compiled frames as Arrow IPC files.
+        Frames are written to a unique temporary folder renamed to `path`,
+        so processes compiling at the same time do not overwrite each other,
+        `path` saved by another process is kept. Other compiled versions
+        in the parent folder are removed.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(
+            tempfile.mkdtemp(
+                prefix=f"{path.name}.", suffix=self.COMPILED_TMP, dir=path.parent
+            )
+        )
+        try:
+            for name in self.COMPILED_FRAMES:
+                getattr(self, name).write_ipc(tmp_path / f"{name}.arrow")
+
+            meta = {"search_columns": sorted(self.search_columns)}
+            (tmp_path / self.COMPILED_META).write_text(
+                json.dumps(meta), encoding="utf8"
+            )
+            try:
+                tmp_path.rename(path)
+            except OSError:
+                if not (path / self.COMPILED_META).is_file():
+                    raise
+                logger.debug(f"Compiled dictionary '{path}' saved by another run")
+            else:
+                logger.debug(f"Compiled dictionary saved to '{path}'")
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        for old_path in path.parent.iterdir():
+            if old_path != path and not old_path.name.endswith(self.COMPILED_TMP):
+                shutil.rmtree(old_path, ignore_errors=True)
+
+    def _load_compiled(self, path: Path) -> bool:
+        """Load frames saved by `_save_compiled`, return False if not found."""
+        meta_file = path / self.COMPILED_META
+        if not meta_file.is_file():
+            return False
+        meta = json.loads(meta_file.read_text(encoding="utf8"))
+
+        for name in self.COMPILED_FRAMES:
+            setattr(self, name, pl.read_ipc(path / f"{name}.arrow", memory_map=False))
+        self.data_col_index = self._get_data_col_index()
+        self.search_columns = set(meta["search_columns"])
+        return True
+
     def _get_data_col_index(
         self,
         search_col: str = MappingColumns.search,
@@ -197,9 +255,18 @@ class MappingDict:
 
         data = data.join(pl.DataFrame(self.data_col_index), on=search_col, how="left")
 
-        pattern_expr = self._build_search_like_pattern(match_type_col, term_col)
+        # terms are normalized the same way as values of search columns
+        normalized_term_col = f"_normalized_{term_col}"
+        data = data.with_columns(
+            normalize_expr(pl.col(term_col)).alias(normalized_term_col)
+        )
+        pattern_expr = self._build_search_like_pattern(
+            match_type_col, normalized_term_col
+        )
 
-        data = data.with_columns(pattern_expr.str.to_uppercase().alias(pattern_col))
+        data = data.with_columns(pattern_expr.alias(pattern_col)).drop(
+            normalized_term_col
+        )
         self.search_columns.update(
             data[column_name_col].drop_nulls().unique().to_list()
         )
@@ -234,46 +301,79 @@ class MappingDict:
         search_col: str = MappingColumns.search,
         term_col: str = MappingColumns.term,
         pattern_col: str = MappingColumns.pattern,
+        column_name_col: str = MappingColumns.column_name,
         separator="|",
     ) -> pl.DataFrame:
         """
         Build mapping table for SQL fts matching.
 
+        Indexes of search columns and terms are split by separator,
+        each pair becomes `column_name:"(term)"` part of MATCH query.
+        Rules with invalid column indexes or with different number of
+        indexes and terms get empty pattern and are logged together.
         """
+        rule_id = "_rule_id"
+        part_col = "_part"
+        valid_col = "_valid"
+
+        rules = df.with_row_index(rule_id)
+        parts = (
+            rules.select(
+                rule_id,
+                pl.col(search_col).cast(pl.Utf8).str.split(separator),
+                pl.col(term_col).cast(pl.Utf8).str.split(separator),
+            )
+            .filter(pl.col(search_col).list.len() == pl.col(term_col).list.len())
+            .explode(search_col, term_col)
+            .with_columns(
+                pl.col(search_col).str.strip_chars().cast(pl.Int64, strict=False),
+                # base protection
+                pl.col(term_col).str.replace_all('"', "", literal=True),
+            )
+            .join(
+                pl.DataFrame(self.data_col_index),
+                on=search_col,
+                how="left",
+                maintain_order="left",
+            )
+        )
+        # adding brackets to make search more controllable
+        term = pl.col(term_col)
+        safe_term = (
+            pl.when(term.str.contains("(", literal=True))
+            .then(term)
+            .otherwise(pl.concat_str(pl.lit('"('), term, pl.lit(')"')))
+        )
+        queries = (
+            parts.with_columns(
+                pl.concat_str(pl.col(column_name_col), pl.lit(":"), safe_term).alias(
+                    part_col
+                )
+            )
+            .group_by(rule_id, maintain_order=True)
+            .agg(
+                pl.col(part_col).str.join(" "),
+                pl.col(part_col).is_not_null().all().alias(valid_col),
+            )
+        )
+        self.search_columns.update(
+            parts.join(queries.filter(valid_col), on=rule_id)[column_name_col]
+            .unique()
+            .to_list()
+        )
 
-        # ensure search column contains numbers - indexes of columns to search
-        pattern_col_values = []
+        rules = rules.join(queries, on=rule_id, how="left", maintain_order="left")
+        is_valid = pl.col(valid_col).fill_null(False)
+        invalid = rules.filter(~is_valid)
+        if not invalid.is_empty():
+            logger.warning(
+                f"{invalid.height:,} invalid fts search terms are skipped:\n"
+                f"{invalid.select(MappingColumns.mapping_index, search_col, term_col)}"
+            )
 
-        for row in df.iter_rows(named=True):
-            try:
-                indexes = list(
-                    map(lambda x: (int(x.strip())), row[search_col].split(separator))
-                )
-                filters = row[term_col].split(separator)
-                match_query = self.build_match_query(indexes, filters)
-            except (ValueError, AttributeError) as e:
-                logger.warning(f"Invalid fts search term {row}, skipping. Error {e}")
-                match_query = ""
-
-            pattern_col_values.append(match_query)
-
-        df_result = df.with_columns(pl.Series(pattern_col, pattern_col_values))
-        # print(df_result[MappingColumns.pattern].to_list())
-        return df_result
-
-    def build_match_query(self, indexes: list[int], filters: list[str]) -> str:
-        parts = []
-
-        columns_list: list[str] = self.data_col_index[MappingColumns.column_name]
-        for col_idx, value in zip(indexes, filters, strict=True):
-            col_name = columns_list[col_idx]
-            self.search_columns.add(col_name)
-            # base protection
-            safe_value = value.replace('"', "")
-
-            # adding brackets to make search more controllable
-            if "(" not in safe_value:
-                safe_value = f'"({safe_value})"'
-
-            parts.append(f"{col_name}:{safe_value}")
-        return " ".join(parts)
+        return rules.with_columns(
+            pl.when(is_valid)
+            .then(pl.col(part_col))
+            .otherwise(pl.lit(""))
+            .alias(pattern_col)
+        ).drop(rule_id, part_col, valid_col)
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from .models import MappingColumns
+
+logger = logging.getLogger(__name__)
+
+
+class MatchCache:
+    """
+    Persistent cache of rules matches of normalized search values.
+
+    The cache database is attached to the DBWorker connection as `SCHEMA`
+    and lives between runs. Values are cached per `rules_key` - hash of
+    the rules evaluated for them, so any change of these rules in the
+    dictionary makes the cache miss. Values without matches are cached too.
+
+    Least recently used values are evicted when the cache exceeds
+    `max_values` values.
+
+    The cache does not commit, its writes belong to the transaction of
+    the connection or are committed by autocommit mode. Statements are run
+    by `execute`, so the worker can profile them.
+    """
+
+    SCHEMA = "match_cache"
+    VALUES_TABLE = "cached_values"
+    MATCHES_TABLE = "cached_matches"
+
+    def __init__(
+        self,
+        db_con: sqlite3.Connection,
+        cache_file: Path,
+        max_values: int,
+        execute: Callable[..., sqlite3.Cursor] | None = None,
+    ):
+        self.db_con = db_con
+        self.execute = execute or db_con.execute
+        self.cache_file = cache_file
+        self.max_values = max_values
+        # values used in this run are kept on eviction first
+        self.run_id = time.time_ns()
+        self._attach()
+
+    @property
+    def values_table(self) -> str:
+        return f"{self.SCHEMA}.{self.VALUES_TABLE}"
+
+    @property
+    def matches_table(self) -> str:
+        return f"{self.SCHEMA}.{self.MATCHES_TABLE}"
+
+    def _attach(self):
+        self.db_con.execute(
+            f"ATTACH DATABASE ? AS {self.SCHEMA}", (str(self.cache_file),)
+        )
+        self.db_con.executescript(f"""
+            PRAGMA {self.SCHEMA}.journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS {self.values_table} (
+                rules_key TEXT,
+                value TEXT,
+                last_used INTEGER,
+                PRIMARY KEY (rules_key, value)
+            );
+            CREATE TABLE IF NOT EXISTS {self.matches_table} (
+                rules_key TEXT,
+                value TEXT,
+                {MappingColumns.mapping_index} INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS {self.SCHEMA}.{self.MATCHES_TABLE}_key_index
+            ON {self.MATCHES_TABLE}(rules_key, value);
+            CREATE INDEX IF NOT EXISTS {self.SCHEMA}.{self.VALUES_TABLE}_used_index
+            ON {self.VALUES_TABLE}(last_used);
+            """)
+        logger.debug(f"Match cache '{self.cache_file}' attached")
+
+    @staticmethod
+    def rules_key(kind: str, rules: Iterable[tuple]) -> str:
+        """Hash of the rules evaluated for the cached values."""
+        payload = json.dumps([kind, sorted(rules, key=str)], default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def collect_misses(self, rules_key: str, values_tbl: str, misses_tbl: str):
+        """
+        Copy rows of values_tbl with values missing in cache to misses_tbl.
+        Cached values of values_tbl are marked as used in this run.
+        """
+        self.execute(
+            f"""
+            UPDATE {self.values_table}
+            SET last_used = ?
+            WHERE rules_key = ?
+            AND value IN (SELECT value FROM {values_tbl})
+            """,
+            (self.run_id, rules_key),
+        )
+        self.execute(f"DROP TABLE IF EXISTS {misses_tbl}")
+        self.execute(
+            f"""
+            CREATE TEMP TABLE {misses_tbl} AS
+            SELECT v.*
+            FROM {values_tbl} AS v
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM {self.values_table} AS c
+                WHERE c.rules_key = ?
+                AND c.value = v.value
+            )
+            """,
+            (rules_key,),
+        )
+
+    def store(self, rules_key: str, misses_tbl: str, hits_query: str):
+        """
+        Save values of misses_tbl and their matches to cache.
+        :param hits_query: str, query returning value and mapping_index
+            of values from misses_tbl matched by rules
+        """
+        index_col = MappingColumns.mapping_index
+        self.execute(
+            f"""
+            INSERT OR REPLACE INTO {self.values_table} (rules_key, value, last_used)
+            SELECT ?, value, ?
+            FROM {misses_tbl}
+            """,
+            (rules_key, self.run_id),
+        )
+        self.execute(
+            f"""
+            INSERT INTO {self.matches_table} (rules_key, value, {index_col})
+            SELECT ?, hits.value, hits.{index_col}
+            FROM ({hits_query}) AS hits
+            """,
+            (rules_key,),
+        )
+
+    def hits_query(self, rules_key: str, values_tbl: str) -> str:
+        """Query of cached matches (value, mapping_index) of values_tbl."""
+        index_col = MappingColumns.mapping_index
+        # rules_key is a hex digest, safe to be inlined
+        return f"""
+            SELECT c.value, c.{index_col}
+            FROM {values_tbl} AS v
+            JOIN {self.matches_table} AS c
+            ON c.rules_key = '{rules_key}'
+            AND c.value = v.value
+            """
+
+    def evict(self):
+        """Remove least recently used values exceeding max_values."""
+        (values_count,) = self.execute(
+            f"SELECT COUNT(*) FROM {self.values_table}"
+        ).fetchone()
+        excess = values_count - self.max_values
+        if excess <= 0:
+            return
+        self.execute(
+            f"""
+            DELETE FROM {self.values_table}
+            WHERE rowid IN (
+                SELECT rowid
+                FROM {self.values_table}
+                ORDER BY last_used
+                LIMIT ?
+            )
+            """,
+            (excess,),
+        )
+        self.execute(f"""
+            DELETE FROM {self.matches_table} AS m
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM {self.values_table} AS v
+                WHERE v.rules_key = m.rules_key
+                AND v.value = m.value
+            )
+            """)
+        logger.debug(f"{excess:,} values evicted from match cache")
+
+    def close(self):
+        try:
+            self.evict()
+        finally:
+            self.db_con.execute(f"DETACH DATABASE {self.SCHEMA}")
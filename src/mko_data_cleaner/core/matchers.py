@@ -0,0 +1,176 @@
+import logging
+from collections import deque
+from collections.abc import Generator, Iterable
+from typing import Any
+
+import polars as pl
+
+from mko_data_cleaner.core.models import MappingColumns, MatchType
+
+logger = logging.getLogger(__name__)
+
+# # SQL LIKE wildcards which may be present in patterns built by MappingDict
+LIKE_WILDCARDS = "%_"
+
+# # suffix of shadow columns keeping normalized values of search columns
+NORMALIZED_SUFFIX = "__norm"
+
+
+def normalized_name(column_name: str) -> str:
+    """Name of the shadow column with normalized values of the column."""
+    return f"{column_name}{NORMALIZED_SUFFIX}"
+
+
+def normalize_expr(expr: pl.Expr) -> pl.Expr:
+    """
+    Normalize text for matching: unicode uppercase,
+    whitespace sequences replaced with single space and stripped.
+    Applied both to data values and to dictionary terms.
+    """
+    return expr.str.to_uppercase().str.replace_all(r"\s+", " ").str.strip_chars()
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton finding all occurrences of many words
+    in a single pass over the text.
+
+    Usage:
+        ac = AhoCorasick()
+        ac.add("HE", payload)
+        ac.build()
+        for start, end, payload in ac.iter_matches("SHE"):
+            ...
+    """
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # (word length, payload) for words ending in the node
+        self._output: list[list[tuple[int, Any]]] = [[]]
+        self._built = False
+
+    def add(self, word: str, payload: Any = None) -> None:
+        if not word:
+            raise ValueError("Empty word can't be added to automaton")
+        if self._built:
+            raise RuntimeError("Automaton is already built")
+        node = 0
+        for char in word:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(word), payload))
+
+    def build(self) -> None:
+        """Compute failure links (BFS over the trie)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_child = self._goto[fail].get(char, 0)
+                self._fail[child] = fail_child if fail_child != child else 0
+                self._output[child] = self._output[child] + self._output[fail_child]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Generator[tuple[int, int, Any]]:
+        """Yield (start, end, payload) for every word found in text."""
+        if not self._built:
+            self.build()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, payload in output[node]:
+                yield pos + 1 - length, pos + 1, payload
+
+
+class MultiPatternMatcher:
+    """
+    Matches partial (p), starts with (s) and ends with (e) rules of one
+    search column by a single Aho-Corasick scan of each value.
+    Values and terms are expected to be normalized, see `normalize_expr`.
+    """
+
+    def __init__(self, rules: pl.DataFrame):
+        self._automaton = AhoCorasick()
+        for mapping_index, match_type, term in rules.select(
+            MappingColumns.mapping_index, MappingColumns.match, MappingColumns.term
+        ).iter_rows():
+            self._automaton.add(term, (mapping_index, match_type))
+        self._automaton.build()
+
+    def match(self, value: str) -> set[int]:
+        """Return mapping indexes of all rules matching the value."""
+        value_end = len(value)
+        found = set()
+        for start, end, (mapping_index, match_type) in self._automaton.iter_matches(
+            value
+        ):
+            match match_type:
+                case MatchType.PARTIAL_MATCH:
+                    found.add(mapping_index)
+                case MatchType.STARTS_WITH if start == 0:
+                    found.add(mapping_index)
+                case MatchType.ENDS_WITH if end == value_end:
+                    found.add(mapping_index)
+        return found
+
+    def match_values(self, values: Iterable[str]) -> Generator[tuple[str, int]]:
+        """Yield (value, mapping_index) pairs for every matching rule."""
+        for value in values:
+            for mapping_index in self.match(value):
+                yield value, mapping_index
+
+
+def split_plain_rules(
+    like_data: pl.DataFrame, *match_types: MatchType
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """
+    Split LIKE rules built by MappingDict on two parts:
+        - rules of given match types with plain search terms,
+          `term` column holds the normalized term without LIKE wildcards
+        - the rest of rules
+    """
+    pattern = pl.col(MappingColumns.pattern)
+    match_type = pl.col(MappingColumns.match)
+
+    term = (
+        pl.when(match_type == MatchType.FULL_MATCH)
+        .then(pattern)
+        .when(match_type == MatchType.PARTIAL_MATCH)
+        .then(pattern.str.slice(1, pattern.str.len_chars() - 2))
+        .when(match_type == MatchType.STARTS_WITH)
+        .then(pattern.str.slice(0, pattern.str.len_chars() - 1))
+        .when(match_type == MatchType.ENDS_WITH)
+        .then(pattern.str.slice(1))
+        .otherwise(None)
+    )
+    data = like_data.with_columns(term.alias("_plain_term"))
+    is_plain = (
+        match_type.is_in(match_types)
+        & pl.col(MappingColumns.column_name).is_not_null()
+        & (pl.col("_plain_term").str.len_chars() > 0)
+        & ~pl.col("_plain_term").str.contains(f"[{LIKE_WILDCARDS}]")
+    ).fill_null(False)
+
+    plain = (
+        data.filter(is_plain)
+        .drop(MappingColumns.term)
+        .rename({"_plain_term": MappingColumns.term})
+    )
+    rest = data.filter(~is_plain).drop("_plain_term")
+    return plain, rest
@@ -11,6 +11,7 @@ from pydantic import (
     ConfigDict,
     Field,
     NonNegativeInt,
+    PositiveInt,
     StringConstraints,
 )
 
@@ -35,15 +36,44 @@ NameConstrained = Annotated[
 ]
 
 
+# ---------------Engine
+class Engine(StrEnum):
+    SQLITE = "sqlite"
+    POLARS = "polars"
+
+
 # ---------------Database
 class TableModel(BaseModel):
     table_name: NameConstrained
     column_name: NameConstrained
 
 
+class Matcher(StrEnum):
+    LIKE = "like"
+    AHO_CORASICK = "aho_corasick"
+
+
+class FtsBuild(StrEnum):
+    REBUILD = "rebuild"
+    TRIGGERS = "triggers"
+
+
 class Database(BaseModel):
     model_config = ConfigDict(extra="allow")
     table_name: NameConstrained = Field(default="data_table")
+    matcher: Matcher = Matcher.AHO_CORASICK
+    fts_build: FtsBuild = FtsBuild.REBUILD
+    match_cache: bool = False
+    match_cache_size: PositiveInt = 1000000
+    incremental: bool = False
+    profile: bool = False
+    shards: PositiveInt = 1
+
+
+class Batch(BaseModel):
+    workers: PositiveInt | None = None  # None: number of CPUs
+    memory_budget_mb: PositiveInt | None = None  # None: no limit
+    log_file: str = "batch_run.log"
 
 
 # ---------------Logging
@@ -71,6 +101,20 @@ class DataFileExtension(StrEnum):
     default = "csv"
     csv = "csv"
     gz = "gz"
+    parquet = "parquet"
+    arrow = "arrow"
+    ipc = "ipc"
+
+
+class DictFileExtension(StrEnum):
+    default = "csv"
+    csv = "csv"
+    gz = "gz"
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    PARQUET = "parquet"
 
 
 class DataFile(BaseModel):
@@ -78,6 +122,7 @@ class DataFile(BaseModel):
     extension: DataFileExtension
     index_column: str = None
     date_column: str = None  # 'researchDate' researchMonth
+    reader_threads: PositiveInt = 4
 
 
 class PolarsWriteCSV(BaseModel):
@@ -87,6 +132,18 @@ class PolarsWriteCSV(BaseModel):
     include_header: bool = True
     chunk_size: NonNegativeInt = 10000
     compression: Literal["gzip", "bz2", "zip", "xz", "zstd"] | None = "gzip"
+    writer_threads: PositiveInt = 4
+
+
+class PolarsWriteParquet(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    chunk_size: NonNegativeInt = 1000000
+    compression: Literal["lz4", "uncompressed", "snappy", "gzip", "brotli", "zstd"] = (
+        "zstd"
+    )
+    compression_level: int | None = None
+    row_group_size: PositiveInt | None = 100000
+    writer_threads: PositiveInt = 4
 
 
 class PolarsReadCSV(BaseModel):
@@ -140,10 +197,11 @@ class DictColumnsIndexes(BaseModel):
 
 class DataDict(BaseModel):
     model_config = ConfigDict(extra="allow")
-    extension: DataFileExtension
+    extension: DictFileExtension
     col_indexes: DictColumnsIndexes = DictColumnsIndexes()
     add_separator: str = ", "
     fts_separator: str = "|"
+    compiled_cache: bool = True
 
 
 class ReadCSV(BaseModel):
@@ -151,13 +209,17 @@ class ReadCSV(BaseModel):
 
 
 class WriteCSV(BaseModel):
+    file_format: ExportFormat = ExportFormat.CSV
     to_csv: PolarsWriteCSV
+    to_parquet: PolarsWriteParquet = PolarsWriteParquet()
 
 
 class DataSettings(BaseModel):
+    engine: Engine = Engine.SQLITE
     data_paths: WorkingPaths
     data_file_settings: DataFile
     dict_file_settings: DataDict
     database_settings: Database
+    batch_settings: Batch = Batch()
     read_settings: ReadCSV
     export_settings: WriteCSV
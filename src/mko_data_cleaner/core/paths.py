@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from platformdirs import user_config_dir
@@ -5,7 +6,9 @@ from pydantic import BaseModel
 
 APP_NAME: str = __package__.split(".")[0]
 APP_DIR: Path = Path(__file__).resolve().parent.parent
-USER_DIR: Path = Path(user_config_dir(APP_NAME))
+# folder of user settings, the environment variable overrides the default
+USER_DIR_ENV: str = "MKO_DATA_CLEANER_USER_DIR"
+USER_DIR: Path = Path(os.environ.get(USER_DIR_ENV) or user_config_dir(APP_NAME))
 
 
 class PathResolver:
@@ -0,0 +1,471 @@
+import logging
+import re
+import sqlite3
+from functools import cached_property
+
+import polars as pl
+
+from .dict_service import MappingDict
+from .matchers import LIKE_WILDCARDS, normalize_expr, split_plain_rules
+from .models import ActionType, MappingColumns, MatchType
+from .utils import clean_names, make_valid
+
+logger = logging.getLogger(__name__)
+
+
+def like_to_regex(pattern: str) -> str:
+    """
+    Convert SQL LIKE pattern to an anchored regex.
+
+    % → any sequence of characters
+    _ → any single character
+    """
+    parts = []
+    for char in pattern:
+        match char:
+            case "%":
+                parts.append(".*")
+            case "_":
+                parts.append(".")
+            case _:
+                parts.append(re.escape(char))
+    return f"(?s)^{''.join(parts)}$"
+
+
+class PolarsWorker:
+    """
+    Worker applying mapping rules with Polars instead of SQLite.
+
+    Follows the same steps as DBWorker:
+        index table (distinct index_column) → matches →
+        DELETE → REPLACE → ADD → sync with data
+    and produces the same output.
+    """
+
+    ROW_KEY = "__row_key"
+    TUPLE_ID = "__tuple_id"
+    NORMALIZED = "__normalized"
+    VALUE = "__value"
+
+    def __init__(
+        self,
+        index_column: str | None = None,
+        date_column: str | None = None,
+    ):
+        self.index_column = make_valid(index_column) if index_column else None
+        self.date_column = make_valid(date_column) if date_column else None
+        self._data_tbl_columns = None
+        self._search_columns = None
+        self._extra_columns = None
+
+        self.data: pl.DataFrame = pl.DataFrame()
+        self.target: pl.DataFrame = pl.DataFrame()
+        self.matches: pl.DataFrame = pl.DataFrame()
+
+    # ---------------------------------------------------------
+    # properties
+    # ---------------------------------------------------------
+
+    @property
+    def key_column(self) -> str:
+        return self.index_column or self.ROW_KEY
+
+    @property
+    def data_tbl_columns(self):
+        return self._data_tbl_columns
+
+    @property
+    def search_columns(self):
+        return self._search_columns
+
+    @search_columns.setter
+    def search_columns(self, search_columns: list[str]):
+        tbl_cols_set = set(self.data_tbl_columns)
+        self._search_columns = [name for name in search_columns if name in tbl_cols_set]
+
+    @property
+    def extra_columns(self):
+        return self._extra_columns
+
+    @cached_property
+    def _matches_schema(self) -> dict[str, pl.DataType]:
+        return {
+            self.key_column: self.target.schema[self.key_column],
+            MappingColumns.mapping_index: pl.UInt32,
+        }
+
+    def set_data_tbl_columns(self, *main_cols, extra_cols: list | None = None):
+        extra_cols = extra_cols or []
+        self._data_tbl_columns = clean_names(*main_cols, *extra_cols)
+        self._extra_columns = self.data_tbl_columns[-len(extra_cols) :]
+
+    # ---------------------------------------------------------
+    # Data import
+    # ---------------------------------------------------------
+
+    def load_data(self, data: pl.LazyFrame) -> int:
+        """
+        Collect source data and build the target frame with search
+        columns - one row per index_column value (or per row without index).
+        :return: int, number of loaded rows
+        """
+        if not self.index_column:
+            data = data.with_row_index(self.ROW_KEY)
+        self.data = data.collect(engine="streaming")
+        logger.info(f"{self.data.height:,} rows were loaded")
+
+        target = self.data.lazy()
+        if self.index_column:
+            # the same row is taken as in DBWorker: the first loaded row of the
+            # latest date (or the first loaded row), rows without key are skipped
+            if self.date_column:
+                target = target.sort(
+                    self.date_column,
+                    descending=True,
+                    nulls_last=True,
+                    maintain_order=True,
+                )
+            target = target.filter(pl.col(self.index_column).is_not_null()).unique(
+                subset=[self.index_column], keep="first", maintain_order=True
+            )
+
+        self.target = target.select(
+            self.key_column,
+            *self.search_columns,
+            *(pl.lit(None, dtype=pl.Utf8).alias(col) for col in self.extra_columns),
+        ).collect()
+        return self.data.height
+
+    # ---------------------------------------------------------
+    # Matching
+    # ---------------------------------------------------------
+
+    def match_rules(self, mapping_dict: MappingDict) -> dict[str, int]:
+        """
+        Collect (key, mapping_index) pairs for all LIKE and FTS rules.
+        :return: dict, number of matches by kind of rules: `full_match`
+            (patterns without wildcards), `like` and `fts`
+        """
+        frames = [pl.DataFrame(schema=self._matches_schema)]
+        counts = {}
+
+        if not mapping_dict.like_data.is_empty():
+            exact, like = self._like_matches(mapping_dict.like_data)
+            frames.extend([exact, like])
+            counts.update(full_match=exact.height, like=like.height)
+
+        if not mapping_dict.fts_data.is_empty():
+            fts = self._fts_matches(mapping_dict.fts_data)
+            frames.append(fts)
+            counts["fts"] = fts.height
+
+        self.matches = pl.concat(frames).unique()
+        logger.debug(f"{self.matches.height:,} matches found")
+        return counts
+
+    def _like_matches(
+        self, like_data: pl.DataFrame
+    ) -> tuple[pl.DataFrame, pl.DataFrame]:
+        """
+        Matches of patterns without and with wildcards. Patterns with
+        wildcards are checked once per distinct normalized value of the
+        search column: plain terms of p, s, e rules by a single
+        multi-pattern scan, the rest of patterns as regexes.
+        """
+        index_col = MappingColumns.mapping_index
+        column_name_col = MappingColumns.column_name
+        pattern_col = MappingColumns.pattern
+
+        rules = (
+            like_data.select(
+                index_col,
+                column_name_col,
+                MappingColumns.match,
+                pattern_col,
+                MappingColumns.term,
+            )
+            .drop_nulls([index_col, column_name_col, pattern_col])
+            .filter(pl.col(column_name_col).is_in(self.search_columns))
+        )
+        is_wildcard = pl.col(pattern_col).str.contains(f"[{LIKE_WILDCARDS}]")
+        plain_rules, regex_rules = split_plain_rules(
+            rules.filter(is_wildcard),
+            MatchType.PARTIAL_MATCH,
+            MatchType.STARTS_WITH,
+            MatchType.ENDS_WITH,
+        )
+
+        exact_frames = [pl.DataFrame(schema=self._matches_schema)]
+        like_frames = [pl.DataFrame(schema=self._matches_schema)]
+        for (col,), col_rules in rules.group_by(column_name_col):
+            values = (
+                self.target.select(self.key_column, pl.col(col).alias(self.VALUE))
+                .drop_nulls(self.VALUE)
+                .with_columns(normalize_expr(pl.col(self.VALUE)).alias(self.NORMALIZED))
+            )
+
+            # patterns without wildcards are equal to the value
+            exact_frames.append(
+                values.join(
+                    col_rules.filter(~is_wildcard),
+                    left_on=self.NORMALIZED,
+                    right_on=pattern_col,
+                ).select(self.key_column, pl.col(index_col).cast(pl.UInt32))
+            )
+
+            is_column = pl.col(column_name_col) == col
+            col_plain, col_regex = (
+                plain_rules.filter(is_column),
+                regex_rules.filter(is_column),
+            )
+            if col_plain.is_empty() and col_regex.is_empty():
+                continue
+            distinct = values.select(self.NORMALIZED).unique()
+            hits = pl.concat(
+                [
+                    self._plain_hits(distinct, col_plain),
+                    self._regex_hits(distinct, col_regex),
+                ]
+            )
+            like_frames.append(
+                values.join(hits, on=self.NORMALIZED).select(self.key_column, index_col)
+            )
+
+        return pl.concat(exact_frames), pl.concat(like_frames)
+
+    def _plain_hits(self, distinct: pl.DataFrame, rules: pl.DataFrame) -> pl.DataFrame:
+        """
+        (normalized value, mapping_index) of values containing plain terms
+        of p, s, e rules, all terms are found by one Aho-Corasick scan.
+        """
+        index_col = MappingColumns.mapping_index
+        match_col = MappingColumns.match
+        term_col = MappingColumns.term
+        schema = {self.NORMALIZED: pl.Utf8, index_col: pl.UInt32}
+        if rules.is_empty():
+            return pl.DataFrame(schema=schema)
+
+        value, term = pl.col(self.NORMALIZED), pl.col(term_col)
+        terms = rules[term_col].unique().to_list()
+        return (
+            distinct.with_columns(
+                value.str.extract_many(terms, overlapping=True).alias(term_col)
+            )
+            .explode(term_col)
+            .drop_nulls(term_col)
+            .unique()
+            .join(rules.select(index_col, match_col, term_col), on=term_col)
+            .filter(
+                (pl.col(match_col) == MatchType.PARTIAL_MATCH)
+                | (
+                    (pl.col(match_col) == MatchType.STARTS_WITH)
+                    & value.str.starts_with(term)
+                )
+                | (
+                    (pl.col(match_col) == MatchType.ENDS_WITH)
+                    & value.str.ends_with(term)
+                )
+            )
+            .select(self.NORMALIZED, pl.col(index_col).cast(pl.UInt32))
+            .unique()
+        )
+
+    def _regex_hits(self, distinct: pl.DataFrame, rules: pl.DataFrame) -> pl.DataFrame:
+        """
+        (normalized value, mapping_index) of values matching patterns with
+        wildcards inside terms, only values matching the union of patterns
+        are checked by each pattern.
+        """
+        index_col = MappingColumns.mapping_index
+        schema = {self.NORMALIZED: pl.Utf8, index_col: pl.UInt32}
+        if rules.is_empty():
+            return pl.DataFrame(schema=schema)
+
+        regexes = [
+            (mapping_index, like_to_regex(pattern))
+            for mapping_index, pattern in rules.select(
+                index_col, MappingColumns.pattern
+            ).iter_rows()
+        ]
+        union = "|".join(f"(?:{regex})" for _, regex in regexes)
+        candidates = distinct.filter(pl.col(self.NORMALIZED).str.contains(union))
+        return pl.concat(
+            [pl.DataFrame(schema=schema)]
+            + [
+                candidates.filter(
+                    pl.col(self.NORMALIZED).str.contains(regex)
+                ).with_columns(pl.lit(mapping_index, dtype=pl.UInt32).alias(index_col))
+                for mapping_index, regex in regexes
+            ]
+        )
+
+    def _fts_matches(self, fts_data: pl.DataFrame) -> pl.DataFrame:
+        """
+        FTS5 query syntax and tokenizer can't be reproduced with Polars
+        expressions, so FTS rules are evaluated with in-memory SQLite over
+        distinct combinations of search columns only.
+        """
+        index_col = MappingColumns.mapping_index
+        pattern_col = MappingColumns.pattern
+
+        rules = fts_data.select(index_col, pattern_col).filter(
+            pl.col(pattern_col) != ""
+        )
+        tuples = (
+            self.target.select(self.search_columns)
+            .unique()
+            .with_row_index(self.TUPLE_ID, offset=1)
+        )
+
+        columns = ",".join(self.search_columns)
+        placeholders = ",".join("?" * (len(self.search_columns) + 1))
+
+        con = sqlite3.connect(":memory:")
+        try:
+            con.execute(f"CREATE VIRTUAL TABLE search_fts USING fts5({columns})")
+            con.executemany(
+                f"INSERT INTO search_fts (rowid, {columns}) VALUES ({placeholders})",
+                tuples.iter_rows(),
+            )
+            con.execute(f"CREATE TABLE rules ({index_col} INTEGER, {pattern_col} TEXT)")
+            con.executemany("INSERT INTO rules VALUES (?, ?)", rules.iter_rows())
+            hits = con.execute(f"""
+                SELECT search_fts.rowid, r.{index_col}
+                FROM search_fts
+                JOIN rules AS r
+                ON search_fts MATCH r.{pattern_col}
+                """).fetchall()
+        finally:
+            con.close()
+
+        hits_df = pl.DataFrame(
+            hits,
+            schema={self.TUPLE_ID: pl.UInt32, index_col: pl.UInt32},
+            orient="row",
+        )
+        return (
+            self.target.select(self.key_column, *self.search_columns)
+            .join(tuples, on=self.search_columns, nulls_equal=True)
+            .join(hits_df, on=self.TUPLE_ID)
+            .select(self.key_column, index_col)
+        )
+
+    # ---------------------------------------------------------
+    # Mapping processing
+    # ---------------------------------------------------------
+
+    def apply_rules(
+        self, mapping_dict: MappingDict, separator=", "
+    ) -> dict[ActionType, int]:
+        """
+        Apply mapping rules in order:
+        DELETE → REPLACE → ADD
+        :return: dict, number of deleted or updated rows by action
+        """
+        rules = mapping_dict.data.select(
+            MappingColumns.action,
+            MappingColumns.mapping_index,
+            *self.extra_columns,
+        )
+
+        def _rules_by_action(action: ActionType) -> pl.DataFrame:
+            return rules.filter(pl.col(MappingColumns.action) == action).drop(
+                MappingColumns.action
+            )
+
+        return {
+            ActionType.DELETE: self._apply_delete(_rules_by_action(ActionType.DELETE)),
+            ActionType.REPLACE: self._apply_replace(
+                _rules_by_action(ActionType.REPLACE)
+            ),
+            ActionType.ADD: self._apply_add(
+                _rules_by_action(ActionType.ADD), separator
+            ),
+        }
+
+    def _matched_rules(self, rules: pl.DataFrame) -> pl.DataFrame:
+        return self.matches.join(rules, on=MappingColumns.mapping_index)
+
+    def _apply_delete(self, rules: pl.DataFrame) -> int:
+        deleted = self._matched_rules(rules).select(self.key_column).unique()
+        rows_count = self.target.height
+        self.target = self.target.join(deleted, on=self.key_column, how="anti")
+        rows_count -= self.target.height
+        logger.debug(f"{rows_count:,} rows deleted")
+        return rows_count
+
+    def _apply_replace(self, rules: pl.DataFrame) -> int:
+        """Rule with the highest mapping_index wins per non-null column."""
+        updates = (
+            self._unpivot_extra_columns(self._matched_rules(rules))
+            .sort(MappingColumns.mapping_index)
+            .group_by(self.key_column, MappingColumns.column_name)
+            .agg(pl.col(self.VALUE).last())
+        )
+        return self._update_target(updates)
+
+    def _apply_add(self, rules: pl.DataFrame, separator=", ") -> int:
+        """Tags are deduplicated, sorted and joined with separator."""
+        updates = (
+            self._unpivot_extra_columns(self._matched_rules(rules))
+            .filter(pl.col(self.VALUE) != "")
+            .group_by(self.key_column, MappingColumns.column_name)
+            .agg(pl.col(self.VALUE).unique().sort().str.join(separator))
+        )
+        return self._update_target(updates)
+
+    def _unpivot_extra_columns(self, matched: pl.DataFrame) -> pl.DataFrame:
+        return matched.unpivot(
+            on=self.extra_columns,
+            index=[self.key_column, MappingColumns.mapping_index],
+            variable_name=MappingColumns.column_name,
+            value_name=self.VALUE,
+        ).drop_nulls(self.VALUE)
+
+    def _update_target(self, updates: pl.DataFrame) -> int:
+        """
+        Set values from long (key, column_name, value) frame.
+        :return: int, number of updated rows
+        """
+        if updates.is_empty():
+            return 0
+        wide = updates.pivot(
+            on=MappingColumns.column_name,
+            index=self.key_column,
+            values=self.VALUE,
+        )
+        columns = [col for col in wide.columns if col != self.key_column]
+        self.target = (
+            self.target.join(wide, on=self.key_column, how="left", suffix="__new")
+            .with_columns(pl.coalesce(f"{col}__new", col).alias(col) for col in columns)
+            .drop([f"{col}__new" for col in columns])
+        )
+        # matches of deleted rows are not applied
+        return wide.join(self.target, on=self.key_column, how="semi").height
+
+    # ---------------------------------------------------------
+    # Results
+    # ---------------------------------------------------------
+
+    def non_mapped(self) -> pl.DataFrame:
+        """
+        Get rows with NULL values for defined columns
+        """
+        return (
+            self.target.filter(pl.any_horizontal(pl.col(self.extra_columns).is_null()))
+            .select(*self.search_columns, *self.extra_columns)
+            .unique(maintain_order=True)
+        )
+
+    def result(self) -> pl.DataFrame:
+        """Source data with extra columns, rows removed by DELETE are skipped."""
+        return (
+            self.data.drop(self.extra_columns, strict=False)
+            .join(
+                self.target.select(self.key_column, *self.extra_columns),
+                on=self.key_column,
+                how="inner",
+                maintain_order="left",
+            )
+            .select(self.data_tbl_columns)
+        )
@@ -0,0 +1,106 @@
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfiler:
+    """
+    Profile of SQL statements performed by DBWorker.
+
+    Each statement is recorded with its wall time, number of changed rows
+    and `EXPLAIN QUERY PLAN` output, tagged with the pipeline phase and
+    rule block it was performed in.
+    Time of SELECT statements covers only their first step, rows are
+    fetched by the caller.
+    """
+
+    def __init__(self):
+        self.records: list[dict[str, Any]] = []
+        self.phase: str | None = None
+        self.block: str | None = None
+
+    @contextmanager
+    def tag(self, phase: str, block: str | None = None) -> Iterator[None]:
+        """Tag statements of the scope with phase and rule block."""
+        previous = self.phase, self.block
+        self.phase, self.block = phase, block
+        try:
+            yield
+        finally:
+            self.phase, self.block = previous
+
+    def execute(
+        self, db_con: sqlite3.Connection, query: str, params: tuple = ()
+    ) -> sqlite3.Cursor:
+        plan = self._query_plan(db_con, query, params)
+        changes = db_con.total_changes
+        start = time.perf_counter()
+        cursor = db_con.execute(query, params)
+        seconds = time.perf_counter() - start
+        self.records.append(
+            {
+                "phase": self.phase,
+                "block": self.block,
+                "seconds": seconds,
+                "rows_changed": db_con.total_changes - changes,
+                "query": " ".join(query.split()),
+                "plan": plan,
+            }
+        )
+        return cursor
+
+    @staticmethod
+    def _query_plan(db_con: sqlite3.Connection, query: str, params: tuple) -> list:
+        try:
+            rows = db_con.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        except sqlite3.Error:
+            # statements on objects not created yet have no plan
+            return []
+        return [detail for *_, detail in rows]
+
+    @staticmethod
+    def full_scans(plan: list[str]) -> list[str]:
+        """Steps of the plan scanning tables without index."""
+        return [
+            step for step in plan if step.startswith("SCAN ") and " INDEX " not in step
+        ]
+
+    def report(self) -> list[dict[str, Any]]:
+        """Records sorted by wall time, slowest first."""
+        records = sorted(self.records, key=lambda r: r["seconds"], reverse=True)
+        return [{**r, "full_scans": self.full_scans(r["plan"])} for r in records]
+
+    def save(self, path: Path) -> Path:
+        path.write_text(
+            json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf8"
+        )
+        logger.info(f"SQL profile of {len(self.records):,} statements saved to {path}")
+        return path
+
+    def summary(self, top: int = 10) -> str:
+        """Console summary: time per phase and the slowest statements."""
+        phases: dict[str, float] = {}
+        for record in self.records:
+            phase = record["phase"] or "-"
+            phases[phase] = phases.get(phase, 0) + record["seconds"]
+        total = sum(phases.values())
+        lines = [f"SQL profile: {len(self.records):,} statements, {total:.3f} s"]
+        lines += [
+            f"  {phase:<10} {seconds:>10.3f} s" for phase, seconds in phases.items()
+        ]
+        lines.append(f"Slowest {top} statements:")
+        for record in self.report()[:top]:
+            tag = "/".join(t for t in (record["phase"], record["block"]) if t) or "-"
+            lines.append(
+                f"  {record['seconds']:>10.3f} s  {record['rows_changed']:>10,} rows  "
+                f"{tag:<16} {record['query'][:80]}"
+            )
+            lines += [f"{'':>14}full scan: {step}" for step in record["full_scans"]]
+        return "\n".join(lines)
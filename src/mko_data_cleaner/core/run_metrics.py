@@ -0,0 +1,135 @@
+import json
+import logging
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of the process in MB, None if not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _rate(value: int, seconds: float) -> float | None:
+    return round(value / seconds, 1) if seconds > 0 else None
+
+
+class RunMetrics:
+    """
+    Metrics of a report run: wall time and counters of pipeline phases,
+    ingest throughput per data file and peak memory of the process.
+
+    Counters of a phase are free-form numbers (rows, matches), phases
+    with `rows` counter get `rows_per_s` throughput in the report.
+    """
+
+    FILE_NAME = "run_metrics.json"
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.phases: dict[str, dict[str, Any]] = {}
+        self.files: list[dict[str, Any]] = []
+        self._start = time.perf_counter()
+
+    def _counters(self, phase: str) -> dict[str, Any]:
+        return self.phases.setdefault(phase, {"seconds": 0.0})
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[dict[str, Any]]:
+        """Measure wall time of the scope, yield counters of the phase."""
+        counters = self._counters(name)
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            counters["seconds"] += time.perf_counter() - start
+
+    def count(self, phase: str, name: str, value: int):
+        counters = self._counters(phase)
+        counters[name] = counters.get(name, 0) + value
+
+    def merge(self, phases: dict[str, dict[str, Any]]):
+        """
+        Add counters of phases measured in another process. Phases of
+        parallel runs overlap, so seconds of a phase are the longest run.
+        """
+        for name, counters in phases.items():
+            target = self._counters(name)
+            for key, value in counters.items():
+                if key == "seconds":
+                    target[key] = max(target[key], value)
+                else:
+                    target[key] = target.get(key, 0) + value
+
+    def track_files(
+        self, chunks: Iterable[tuple[Path, pl.DataFrame]]
+    ) -> Iterator[tuple[Path, pl.DataFrame]]:
+        """
+        Pass (file, chunk) pairs through, recording rows, size and time
+        of each file. Time of a file includes waiting for its chunks and
+        processing them by the consumer.
+        """
+        current, rows = None, 0
+        file_start = resumed = time.perf_counter()
+        for file, chunk in chunks:
+            if file != current:
+                if current is not None:
+                    self.add_file(current, rows, resumed - file_start)
+                current, rows, file_start = file, 0, resumed
+            rows += chunk.height
+            yield file, chunk
+            resumed = time.perf_counter()
+        if current is not None:
+            self.add_file(current, rows, resumed - file_start)
+
+    def add_file(self, file: Path, rows: int, seconds: float):
+        size = file.stat().st_size
+        self.files.append(
+            {
+                "file": file.name,
+                "rows": rows,
+                "bytes": size,
+                "seconds": seconds,
+                "rows_per_s": _rate(rows, seconds),
+                "bytes_per_s": _rate(size, seconds),
+            }
+        )
+
+    def report(self) -> dict[str, Any]:
+        phases = {}
+        for name, counters in self.phases.items():
+            phases[name] = dict(counters)
+            if "rows" in counters:
+                phases[name]["rows_per_s"] = _rate(
+                    counters["rows"], counters["seconds"]
+                )
+        return {
+            "engine": self.engine,
+            "total_seconds": time.perf_counter() - self._start,
+            "peak_rss_mb": peak_rss_mb(),
+            "phases": phases,
+            "files": self.files,
+        }
+
+    def save(self, path: Path) -> Path:
+        path.write_text(
+            json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf8"
+        )
+        logger.info(f"Run metrics saved to {path}")
+        return path
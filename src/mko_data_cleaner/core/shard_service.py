@@ -0,0 +1,52 @@
+import logging
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+
+class ShardSpool:
+    """
+    Rows of data files partitioned by hash of the index column into
+    Arrow IPC files, a folder per shard. All rows of a key get into
+    the same shard, so shards are processed independently.
+    """
+
+    SHARD_COLUMN = "_shard"
+
+    def __init__(self, path: Path, shards: int, index_column: str):
+        self.path = path
+        self.shards = shards
+        self.index_column = index_column
+        self._parts_count = 0
+        self.clear()
+        for shard in range(shards):
+            self.shard_path(shard).mkdir(parents=True)
+
+    def shard_path(self, shard: int) -> Path:
+        return self.path / f"shard_{shard}"
+
+    def shard_expr(self) -> pl.Expr:
+        return (pl.col(self.index_column).hash() % self.shards).alias(self.SHARD_COLUMN)
+
+    def write(self, chunk: pl.DataFrame) -> int:
+        """Append rows of the chunk to their shards, return number of rows."""
+        parts = chunk.with_columns(self.shard_expr()).partition_by(
+            self.SHARD_COLUMN, as_dict=True, include_key=False
+        )
+        for (shard,), part in parts.items():
+            part.write_ipc(self.shard_path(shard) / f"{self._parts_count:06d}.arrow")
+        self._parts_count += 1
+        return chunk.height
+
+    def read(self, shard: int) -> Iterator[pl.DataFrame]:
+        """Chunks of the shard in the order they were written."""
+        for file in sorted(self.shard_path(shard).glob("*.arrow")):
+            yield pl.read_ipc(file, memory_map=False)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        logger.debug(f"Shard spool '{self.path}' cleared")
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import logging
 from os import PathLike
 from pathlib import Path
@@ -128,6 +130,18 @@ def list_files_in_directory(
         return []
 
 
+def file_hash(file: str | PathLike) -> str:
+    """SHA-256 hex digest of the file content."""
+    with open(file, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def content_hash(*parts: Any) -> str:
+    """SHA-256 hex digest of JSON serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 def yaml_to_dict(file: str | PathLike) -> dict[str, Any] | None:
     """
     Loads configuration from a YAML file.
@@ -1,3 +1,4 @@
+import random
 from pathlib import Path
 
 import polars as pl
@@ -105,3 +106,129 @@ def db_worker_memory(tmp_path):
 
     with DBWorker(db_file=db_file, tbl_name="data_table", index_column="id") as worker:
         yield worker
+
+
+REPORT_COLUMNS = [
+    "researchDate",
+    "AdId",
+    "ADVERTISERS",
+    "BRANDS",
+    "SUBBRANDS",
+    "MEDIA",
+    "COST RUB",
+]
+REPORT_DICT_COLUMNS = [
+    "action",
+    "match",
+    "search_column_idx",
+    "note",
+    "term",
+    "CAT",
+    "BRAND CLEAN",
+    "TAG",
+]
+SYLLABLES = ["ka", "ro", "mi", "ta", "ne", "su", "ба", "ко", "ли", "ма", "ре", "со"]
+
+
+def _names(rnd: random.Random, count: int, max_words: int) -> list[str]:
+    names: set[str] = set()
+    while len(names) < count:
+        words = [
+            "".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 3)))
+            for _ in range(rnd.randint(1, max_words))
+        ]
+        names.add(" ".join(words).upper())
+    return sorted(names)
+
+
+def _term(rnd: random.Random, value: str, match: str) -> str:
+    word = rnd.choice(value.split())
+    match match:
+        case "p":
+            return word[1:4]
+        case "s":
+            return value[:4]
+        case "e":
+            return value[-3:]
+        case "fts":
+            return word
+        case _:
+            return value
+
+
+def build_report(
+    root: Path,
+    rows: int = 3_000,
+    files: int = 2,
+    rules: int = 300,
+    date_column: bool = True,
+    seed: int = 1,
+) -> Path:
+    """
+    Report folder with csv data files and a dictionary of rules of all
+    match types and actions. Ads repeat over rows, some rows of an ad have
+    another subbrand, several ads have no AdId.
+    """
+    rnd = random.Random(seed)
+    vocab = {
+        "ADVERTISERS": _names(rnd, 50, 2),
+        "BRANDS": _names(rnd, 200, 2),
+        "SUBBRANDS": _names(rnd, 400, 3),
+    }
+    ads = [
+        ["" if ad % 100 == 0 else str(ad), *map(rnd.choice, vocab.values())]
+        for ad in range(1, 801)
+    ]
+    columns = REPORT_COLUMNS if date_column else REPORT_COLUMNS[1:]
+
+    raw_path = root / "raw_data"
+    raw_path.mkdir(parents=True)
+    for i in range(files):
+        data = []
+        for _ in range(rows):
+            ad_id, advertiser, brand, subbrand = rnd.choice(ads)
+            if rnd.random() < 0.1:  # search values of an ad change over time
+                subbrand = rnd.choice(vocab["SUBBRANDS"])
+            data.append(
+                [
+                    f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                    ad_id,
+                    advertiser,
+                    brand,
+                    subbrand,
+                    rnd.choice(["TV", "RADIO", "INTERNET"]),
+                    str(rnd.randint(1, 10**6)),
+                ]
+            )
+        frame = pl.DataFrame(data, schema=REPORT_COLUMNS, orient="row")
+        frame.select(columns).write_csv(raw_path / f"part_{i}.csv", separator=";")
+
+    dictionary = []
+    for _ in range(rules):
+        match = rnd.choice(["f", "f", "f", "f", "p", "p", "p", "s", "e", "fts"])
+        column = rnd.choices(list(vocab), weights=(1, 4, 2))[0]
+        value = rnd.choice(vocab[column])
+        roll = rnd.random()
+        if roll < 0.05:
+            action, extra = "d", [None, None, None]
+        elif roll < 0.25:
+            action, extra = "a", [None, None, f"TAG {rnd.randint(1, 50)}"]
+        else:
+            action = "r"
+            extra = [f"CAT {rnd.randint(1, 20)}", rnd.choice([value, None]), None]
+        search_idx = str(columns.index(column))
+        dictionary.append(
+            [action, match, search_idx, None, _term(rnd, value, match), *extra]
+        )
+    dict_file = root / "dict" / "merged_dictionary.csv"
+    dict_file.parent.mkdir(parents=True)
+    pl.DataFrame(dictionary, schema=REPORT_DICT_COLUMNS, orient="row").write_csv(
+        dict_file, separator=";"
+    )
+    return root
+
+
+@pytest.fixture
+def make_report():
+    """Builder of small report folders, see `build_report`."""
+    return build_report
@@ -0,0 +1,126 @@
+import shutil
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from mko_data_cleaner.core import paths
+from mko_data_cleaner.core.dict_service import MappingDict
+from mko_data_cleaner.core.models import (
+    ActionType,
+    DataFileExtension,
+    DataSettings,
+    MappingColumns,
+)
+from mko_data_cleaner.core.paths import APP_PATHS, USER_DIR_ENV, AppPaths, PathResolver
+from mko_data_cleaner.core.utils import yaml_to_dict
+
+
+@pytest.fixture
+def report_service(tmp_path: Path, monkeypatch):
+    """AppService with default settings in a temporary user folder."""
+    user_dir = tmp_path / "user"
+    shutil.copytree(APP_PATHS.app_settings_dir, user_dir / "settings")
+    app_paths = AppPaths(
+        app_dir=APP_PATHS.app_dir, app_name=APP_PATHS.app_name, user_dir=user_dir
+    )
+    # app_service module configures logging from user settings on import,
+    # processes of sharded runs import it with the environment of the tests
+    monkeypatch.setenv(USER_DIR_ENV, str(user_dir))
+    monkeypatch.setattr(paths, "APP_PATHS", app_paths)
+    from mko_data_cleaner.core.app_service import AppService
+
+    return AppService(app_paths=app_paths, resolver=PathResolver(user_dir))
+
+
+def _config(**database_settings) -> DataSettings:
+    """Default config of the package without caches kept between runs."""
+    config = DataSettings(
+        **yaml_to_dict(APP_PATHS.app_settings_dir / "app_config.yaml")
+    )
+    config.data_file_settings.extension = DataFileExtension.csv
+    config.dict_file_settings.compiled_cache = False
+    for name, value in {"match_cache": False, **database_settings}.items():
+        setattr(config.database_settings, name, value)
+    return config
+
+
+def _read(root: Path, pattern: str) -> pl.DataFrame:
+    frame = pl.concat(
+        pl.read_csv(file, separator=";", infer_schema_length=0)
+        for file in sorted(root.glob(pattern))
+    )
+    return frame.sort(frame.columns, nulls_last=True)
+
+
+def _run(
+    service,
+    root: Path,
+    engine: str = "sqlite",
+    config: DataSettings | None = None,
+):
+    """Run the report, return sorted export and non-mapped rows."""
+    service.app_config = config or _config()
+    service.run_report(root, engine=engine)
+    return _read(root, "clean_data/*"), _read(root, "null_data_*")
+
+
+def test_sharded_run_matches_single_database(report_service, make_report, tmp_path):
+    data, non_mapped = _run(report_service, make_report(tmp_path / "single"))
+    sharded_data, sharded_non_mapped = _run(
+        report_service, make_report(tmp_path / "sharded"), config=_config(shards=2)
+    )
+
+    assert data.height > 0 and non_mapped.height > 0
+    assert sharded_data.equals(data)
+    # columns of non-mapped rows keep the order of a single database run
+    assert sharded_non_mapped.equals(non_mapped)
+    assert not list((tmp_path / "sharded" / "data_base").glob("*shard*"))
+
+
+@pytest.mark.parametrize("date_column", [True, False])
+def test_polars_engine_matches_sqlite(
+    report_service, make_report, tmp_path, date_column
+):
+    data, non_mapped = _run(
+        report_service, make_report(tmp_path / "sqlite", date_column=date_column)
+    )
+    polars_data, polars_non_mapped = _run(
+        report_service,
+        make_report(tmp_path / "polars", date_column=date_column),
+        engine="polars",
+    )
+
+    assert data.height > 0 and non_mapped.height > 0
+    assert polars_data.equals(data)
+    assert polars_non_mapped.equals(non_mapped)
+
+
+def test_failed_rules_block_keeps_earlier_blocks(
+    report_service, make_report, tmp_path, monkeypatch
+):
+    service = report_service
+    service.app_config = _config()
+    metrics = service.run_report(make_report(tmp_path / "report"))
+    data = _read(tmp_path / "report", "clean_data/*")
+    generate_rules_blocks = MappingDict.generate_rules_blocks
+
+    def broken_add_block(mapping_dict):
+        for action, block in generate_rules_blocks(mapping_dict):
+            if action == ActionType.ADD:
+                # statements of the block refer to a column missing in the table
+                block = block.rename({MappingColumns.mapping_index: "missing_column"})
+            yield action, block
+
+    monkeypatch.setattr(MappingDict, "generate_rules_blocks", broken_add_block)
+    broken = service.run_report(make_report(tmp_path / "broken"))
+    broken_data = _read(tmp_path / "broken", "clean_data/*")
+
+    apply, broken_apply = metrics.phases["apply"], broken.phases["apply"]
+    assert broken_apply["failed_blocks"] == 1 and "add_rows" not in broken_apply
+    assert broken_apply["delete_rows"] == apply["delete_rows"] > 0
+    assert broken_apply["replace_rows"] == apply["replace_rows"] > 0
+    # rows deleted and replaced before the failed block are exported
+    assert broken_data.height == data.height
+    assert broken_data.drop("TAG").equals(data.drop("TAG"))
+    assert broken_data["TAG"].null_count() == broken_data.height
@@ -0,0 +1,101 @@
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from mko_data_cleaner.core.batch_service import (
+    BatchJob,
+    BatchRunner,
+    JobStatus,
+    expand_reports,
+)
+from mko_data_cleaner.core.errors import NoReportFoundError
+from mko_data_cleaner.core.paths import PathResolver
+
+LOG_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"basic": {"format": "%(levelname)s - %(message)s"}},
+    "handlers": {},
+    "loggers": {},
+    "root": {"level": "INFO", "handlers": []},
+}
+
+
+def report_job(report: Path, engine: str | None) -> dict:
+    """Job of a worker process, fails on reports named 'broken'."""
+    print(f"processing {report.name}")
+    logging.getLogger("report_job").info(f"engine {engine}")
+    if report.name == "broken":
+        raise ValueError("bad dictionary")
+    return {"peak_rss_mb": 10.0, "phases": {"export": {"rows": 3}}}
+
+
+def test_expand_reports(tmp_path: Path):
+    for name in ("b", "a", "c"):
+        (tmp_path / "reports" / name).mkdir(parents=True)
+    (tmp_path / "reports" / "notes.txt").touch()
+    resolver = PathResolver(tmp_path)
+
+    reports = expand_reports(["reports/c", "reports/*"], resolver)
+
+    assert [p.name for p in reports] == ["c", "a", "b"]
+    with pytest.raises(FileNotFoundError):
+        expand_reports(["reports/d"], resolver)
+    with pytest.raises(NoReportFoundError):
+        expand_reports(["other/*"], resolver)
+
+
+def test_failed_report_does_not_stop_others(tmp_path: Path):
+    reports = [tmp_path / name for name in ("first", "broken", "last")]
+    for report in reports:
+        report.mkdir()
+    updates = []
+    runner = BatchRunner(job=report_job, log_config=LOG_CONFIG, workers=2)
+
+    jobs = runner.run(
+        reports,
+        engine="polars",
+        on_update=lambda jobs: updates.append([job.status for job in jobs]),
+    )
+
+    assert [job.status for job in jobs] == [
+        JobStatus.DONE,
+        JobStatus.FAILED,
+        JobStatus.DONE,
+    ]
+    assert jobs[0].rows == 3 and jobs[0].peak_rss_mb == 10.0
+    assert jobs[1].error == "ValueError: bad dictionary"
+    assert updates[0] == [JobStatus.PENDING] * 3
+    # output and logs of each report are in its own log file
+    log = (tmp_path / "last" / "batch_run.log").read_text(encoding="utf-8")
+    assert "processing last" in log and "INFO - engine polars" in log
+    assert "broken" not in log
+    assert "bad dictionary" in (tmp_path / "broken" / "batch_run.log").read_text(
+        encoding="utf-8"
+    )
+
+
+def test_memory_budget_limits_running_reports(tmp_path: Path):
+    measured, new = tmp_path / "measured", tmp_path / "new"
+    measured.mkdir()
+    new.mkdir()
+    (measured / "run_metrics.json").write_text(json.dumps({"peak_rss_mb": 700}))
+    runner = BatchRunner(
+        job=report_job, log_config=LOG_CONFIG, workers=4, memory_budget_mb=1000
+    )
+
+    def job(report: Path) -> BatchJob:
+        return BatchJob(
+            report=report,
+            log_file=report / "log",
+            memory_mb=runner.expected_memory(report),
+        )
+
+    assert job(measured).memory_mb == 700
+    assert job(new).memory_mb == 250
+    assert runner.fits(job(measured), [])
+    assert runner.fits(job(new), [job(measured)])
+    assert not runner.fits(job(measured), [job(new), job(new)])
+    assert not runner.fits(job(new), [job(new)] * 4)
@@ -1,4 +1,8 @@
+import sqlite3
+
+import adbc_driver_sqlite.dbapi as adb
 import polars as pl
+import pytest
 
 from mko_data_cleaner.core.csv_service import CSVWorker
 
@@ -27,3 +31,173 @@ def test_get_file_name(tmp_path):
 
     assert name.startswith("prefix_")
     assert name.endswith(".csv.gz")
+
+
+def test_export_sql_to_csv(tmp_path):
+    db_file = tmp_path / "test.db"
+    with sqlite3.connect(db_file) as con:
+        con.execute("CREATE TABLE data (id TEXT, tag TEXT)")
+        # tag is NULL in the first chunk
+        con.executemany(
+            "INSERT INTO data VALUES (?, ?)",
+            [(str(i), None if i < 5 else f"t{i}") for i in range(7)],
+        )
+
+    worker = CSVWorker.__new__(CSVWorker)
+    worker.export_settings = {
+        "chunk_size": 3,
+        "compression": "gzip",
+        "writer_threads": 2,
+    }
+
+    with adb.connect(str(db_file)) as adb_con:
+        worker.export_sql_to_csv(
+            adb_con, "data", file_prefix="out", export_path=tmp_path / "export"
+        )
+
+    files = sorted((tmp_path / "export").glob("out_*.csv.gz"))
+    chunks = [pl.read_csv(f, schema_overrides={"tag": pl.Utf8}) for f in files]
+
+    assert [c.height for c in chunks] == [3, 3, 1]
+    result = pl.concat(chunks)
+    assert result["tag"].to_list() == [None] * 5 + ["t5", "t6"]
+    # files are numbered in the order of chunks
+    assert result["id"].to_list() == list(range(7))
+
+
+def test_export_sql_to_csv_from_shards(tmp_path):
+    shards = [[("1", "a"), ("2", "b")], [("3", "a"), ("1", "a")]]
+    db_files = []
+    for i, rows in enumerate(shards):
+        db_files.append(tmp_path / f"shard{i}.db")
+        with sqlite3.connect(db_files[-1]) as con:
+            # columns are created in different order
+            con.execute(
+                f"CREATE TABLE data ({'id TEXT, tag TEXT' if i else 'tag TEXT, id TEXT'})"
+            )
+            con.executemany("INSERT INTO data (id, tag) VALUES (?, ?)", rows)
+
+    worker = CSVWorker.__new__(CSVWorker)
+    worker.export_settings = {"chunk_size": 3, "compression": "gzip"}
+
+    adb_cons = [adb.connect(str(db_file)) for db_file in db_files]
+    try:
+        rows = worker.export_sql_to_csv(
+            adb_cons,
+            "data",
+            file_prefix="all",
+            export_path=tmp_path,
+            columns=["id", "tag"],
+        )
+        distinct_rows = worker.export_sql_to_csv(
+            adb_cons,
+            "data",
+            file_prefix="distinct",
+            export_path=tmp_path,
+            columns=["id", "tag"],
+            distinct=True,
+        )
+    finally:
+        for adb_con in adb_cons:
+            adb_con.close()
+
+    assert (rows, distinct_rows) == (4, 3)
+    files = sorted(tmp_path.glob("all_*.csv.gz"))
+    # chunks continue across shards
+    assert [pl.read_csv(f).height for f in files] == [3, 1]
+    result = pl.concat(pl.read_csv(f, infer_schema_length=0) for f in files)
+    assert result.rows() == [("1", "a"), ("2", "b"), ("3", "a"), ("1", "a")]
+    distinct = pl.read_csv(
+        next(tmp_path.glob("distinct_*.csv.gz")), infer_schema_length=0
+    )
+    assert distinct.rows() == [("1", "a"), ("2", "b"), ("3", "a")]
+
+
+def test_rechunk():
+    frames = [pl.DataFrame({"a": [1, 2]}), pl.DataFrame({"a": [3, 4, 5]})]
+
+    chunks = list(CSVWorker._rechunk(frames, max_rows=2))
+
+    assert [c["a"].to_list() for c in chunks] == [[1, 2], [3, 4], [5]]
+
+
+def _csv_worker_with_files(tmp_path, files_count: int, rows: int) -> CSVWorker:
+    worker = CSVWorker.__new__(CSVWorker)
+    worker.data_path = tmp_path
+    worker.data_settings = {"reader_threads": 3}
+    worker.reader_settings = {"separator": ";"}
+    worker.data_files = []
+    for i in range(files_count):
+        file = tmp_path / f"data_{i}.csv"
+        pl.DataFrame(
+            {"id": [f"{i}_{j}" for j in range(rows)], "file": [i] * rows}
+        ).write_csv(file, separator=";")
+        worker.data_files.append(file)
+    return worker
+
+
+def test_get_data_chunks_keeps_files_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(CSVWorker, "CHUNK_SIZE", 4)
+    worker = _csv_worker_with_files(tmp_path, files_count=5, rows=10)
+
+    result = pl.concat(worker.get_data_chunks(["id", "file"]))
+
+    assert result.height == 50
+    assert result["file"].to_list() == [i for i in range(5) for _ in range(10)]
+
+
+def test_get_data_chunks_stops_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(CSVWorker, "CHUNK_SIZE", 1)
+    worker = _csv_worker_with_files(tmp_path, files_count=5, rows=20)
+
+    chunks = worker.get_data_chunks(["id", "file"])
+    first = next(chunks)
+    # readers blocked on full queues must be released
+    chunks.close()
+
+    assert first["id"].to_list() == ["0_0"]
+
+
+def test_get_data_chunks_raises_reader_error(tmp_path):
+    worker = _csv_worker_with_files(tmp_path, files_count=2, rows=2)
+    worker.data_files.append(tmp_path / "missing.csv")
+
+    with pytest.raises(FileNotFoundError):
+        list(worker.get_data_chunks(["id", "file"]))
+
+
+def test_binary_data_files_read_as_strings(tmp_path):
+    worker = CSVWorker.__new__(CSVWorker)
+    worker.data_path = tmp_path
+    worker.data_settings = {"extension": "parquet", "reader_threads": 2}
+    worker.reader_settings = {}
+    file = tmp_path / "data.parquet"
+    pl.DataFrame({"ad id": [1, 2], "date": ["2024-01-01", "2024-01-02"]}).write_parquet(
+        file
+    )
+    worker.data_files = [file]
+
+    assert worker.get_csv_headers(file) == ["ad id", "date"]
+    chunks = list(worker.get_data_chunks(["ad_id", "date"]))
+    result = pl.concat(chunks)
+
+    assert result.columns == ["ad_id", "date"]
+    assert result["ad_id"].to_list() == ["1", "2"]
+    assert worker.scan_data(["ad_id", "date"]).collect().equals(result)
+
+
+def test_export_frame_to_parquet(tmp_path):
+    worker = CSVWorker.__new__(CSVWorker)
+    worker.export_settings = {
+        "file_format": "parquet",
+        "chunk_size": 2,
+        "compression": "zstd",
+        "row_group_size": 1,
+    }
+    df = pl.DataFrame({"a": ["1", "2", "3"]})
+
+    worker.export_frame_to_csv(df, file_prefix="out", export_path=tmp_path)
+
+    files = sorted(tmp_path.glob("out_*.parquet"))
+    assert len(files) == 2
+    assert pl.concat(pl.read_parquet(f) for f in files).equals(df)
@@ -1,3 +1,11 @@
+import polars as pl
+import pytest
+
+from mko_data_cleaner.core.db_service import FILE_ID_COLUMN, RAW_ROWID_COLUMN, DBWorker
+from mko_data_cleaner.core.matchers import normalize_expr, normalized_name
+from mko_data_cleaner.core.models import ActionType, FtsBuild, MappingColumns
+
+
 def test_create_table(db_worker):
     db_worker.create_table("test_table", "col1", "col2")
 
@@ -47,7 +55,8 @@ def test_create_table_with_index_realistic(db_worker):
     columns = db_worker.get_table_columns(db_worker.data_tbl_name)
     assert "adId" in columns
     assert "brand_normalized" in columns
-    assert len(columns) == len(main_columns) + len(extra_columns)
+    # shadow columns with normalized values of search columns
+    assert len(columns) == len(main_columns) + len(extra_columns) + 3
 
     # Проверка, что индексная таблица содержит нужные колонки
     index_columns = db_worker.get_table_columns(db_worker._index_tbl_name)
@@ -197,3 +206,329 @@ def test_create_search_table(db_worker):
     all_tables = {t[0] for t in fts_tables}
 
     assert fts_table in all_tables
+
+
+def _load_brands(db_worker, brands: list[str | None], use_fts: bool = False):
+    """Create data table with normalized shadow column and load brands."""
+    db_worker.set_data_tbl_columns("id", "brand", extra_cols=["tag"])
+    db_worker.index_column = None
+    db_worker.search_columns = ["brand"]
+    db_worker.create_table(
+        db_worker.data_tbl_name,
+        *db_worker.data_tbl_columns,
+        *db_worker.normalized_columns.values(),
+    )
+    db_worker.create_rules_matches()
+    if use_fts:
+        db_worker.link_search_table()
+    data = pl.DataFrame(
+        {"id": [str(i) for i in range(1, len(brands) + 1)], "brand": brands},
+        schema={"id": pl.Utf8, "brand": pl.Utf8},
+    ).with_columns(normalize_expr(pl.col("brand")).alias(normalized_name("brand")))
+    db_worker.frame_to_sql(data, db_worker.data_tbl_name, if_table_exists="append")
+    db_worker.create_search_indexes()
+    db_worker.build_distinct_values()
+
+
+def _get_matches(db_worker) -> set[tuple[int, int]]:
+    return set(
+        db_worker.perform_query(
+            f"SELECT {MappingColumns.data_rowid}, {MappingColumns.mapping_index} "
+            f"FROM full_matches_table"
+        ).fetchall()
+    )
+
+
+def test_create_table_with_normalized_columns(db_worker):
+    db_worker.set_data_tbl_columns("adId", "brand", "product", extra_cols=["tag"])
+    db_worker.search_columns = ["brand"]
+
+    db_worker.create_table_with_index()
+
+    data_columns = db_worker.get_table_columns(db_worker.data_tbl_name)
+    index_columns = db_worker.get_table_columns(db_worker._index_tbl_name)
+    assert normalized_name("brand") in data_columns
+    assert normalized_name("brand") in index_columns
+    assert normalized_name("product") not in data_columns
+
+
+def test_insert_multi_pattern_matches(db_worker):
+    _load_brands(db_worker, ["samsung", "Galaxy  Sam ", "Лента", None])
+
+    rules = pl.DataFrame(
+        {
+            MappingColumns.mapping_index: [1, 2, 3],
+            MappingColumns.column_name: ["brand", "brand", "brand"],
+            MappingColumns.match: ["s", "e", "p"],
+            MappingColumns.term: ["SAM", "SAM", "ЕНТ"],
+        }
+    )
+    db_worker.insert_multi_pattern_matches(rules)
+
+    assert _get_matches(db_worker) == {(1, 1), (2, 2), (3, 3)}
+
+
+def test_insert_exact_matches(db_worker):
+    _load_brands(db_worker, ["Samsung", "SAMSUNG GALAXY", " лента  ", "APPLE"])
+
+    db_worker.frame_to_sql(
+        pl.DataFrame(
+            {
+                MappingColumns.mapping_index: [1, 2],
+                MappingColumns.column_name: ["brand", "brand"],
+                MappingColumns.term: ["SAMSUNG", "ЛЕНТА"],
+            }
+        ),
+        "exact_rules",
+    )
+    db_worker.insert_exact_matches("exact_rules")
+
+    assert _get_matches(db_worker) == {(1, 1), (3, 2)}
+    assert not db_worker.tbl_exists("exact_rules")
+
+
+def test_insert_prefix_matches(db_worker):
+    _load_brands(db_worker, ["Samsung", "galaxy samsung", "Лента маркет", "SAM", None])
+
+    db_worker.frame_to_sql(
+        pl.DataFrame(
+            {
+                MappingColumns.mapping_index: [1, 2],
+                MappingColumns.column_name: ["brand", "brand"],
+                MappingColumns.term: ["SAM", "ЛЕНТА"],
+            }
+        ),
+        "prefix_rules",
+    )
+    db_worker.insert_prefix_matches("prefix_rules")
+
+    assert _get_matches(db_worker) == {(1, 1), (3, 2), (4, 1)}
+    assert not db_worker.tbl_exists("prefix_rules")
+
+
+def test_build_distinct_values(db_worker):
+    _load_brands(db_worker, ["Samsung", "SAMSUNG ", "samsung", "Apple", None])
+
+    values = db_worker.perform_query(
+        f"SELECT value FROM {db_worker.values_table('brand')} ORDER BY value"
+    ).fetchall()
+
+    assert values == [("APPLE",), ("SAMSUNG",)]
+
+
+def test_insert_matches_fans_out_to_rows(db_worker):
+    _load_brands(db_worker, ["Samsung", "APPLE", "samsung", "Samsung Galaxy"])
+
+    db_worker.frame_to_sql(
+        pl.DataFrame(
+            {
+                MappingColumns.mapping_index: [1],
+                MappingColumns.column_name: ["brand"],
+                MappingColumns.pattern: ["SAMS_NG%"],
+            }
+        ),
+        "like_rules",
+    )
+    db_worker.insert_matches("like_rules")
+
+    assert _get_matches(db_worker) == {(1, 1), (3, 1), (4, 1)}
+
+
+@pytest.mark.parametrize("fts_build", list(FtsBuild))
+def test_insert_matches_from_fts_fans_out_to_rows(db_worker, fts_build):
+    db_worker.fts_build = fts_build
+    _load_brands(db_worker, ["Samsung", "APPLE", "Samsung", None], use_fts=True)
+
+    tuples_count = db_worker.perform_query(
+        f"SELECT COUNT(*) FROM {db_worker.data_tbl_name}_search_tuples"
+    ).fetchone()[0]
+    assert tuples_count == 3
+
+    db_worker.frame_to_sql(
+        pl.DataFrame(
+            {
+                MappingColumns.mapping_index: [1],
+                MappingColumns.pattern: ['brand:"(samsung)"'],
+            }
+        ),
+        "fts_rules",
+    )
+    db_worker.insert_matches_from_fts("fts_rules")
+
+    assert _get_matches(db_worker) == {(1, 1), (3, 1)}
+
+
+def test_fts_rebuild_mode_has_no_triggers(db_worker):
+    _load_brands(db_worker, ["Samsung"], use_fts=True)
+
+    triggers = db_worker.perform_query(
+        "SELECT name FROM sqlite_master WHERE type='trigger'"
+    ).fetchall()
+
+    assert triggers == []
+
+
+def _incremental_worker(db_file) -> DBWorker:
+    db_worker = DBWorker(db_file=db_file, tbl_name="data_table", incremental=True)
+    db_worker.set_data_tbl_columns("id", "brand", extra_cols=["tag"])
+    db_worker.search_columns = ["brand"]
+    db_worker.check_ingest_state("layout", "rules")
+    db_worker.create_table_with_index()
+    return db_worker
+
+
+def _load_file(db_worker, file, brands: list[str]):
+    file_id = db_worker.register_file(file)
+    data = pl.DataFrame(
+        {"id": [file.stem] * len(brands), "brand": brands, FILE_ID_COLUMN: file_id},
+    ).with_columns(normalize_expr(pl.col("brand")).alias(normalized_name("brand")))
+    db_worker.frame_to_sql(data, db_worker.raw_tbl_name, if_table_exists="append")
+    db_worker.file_loaded(file_id, file)
+
+
+def test_incremental_sync_manifest(tmp_path):
+    files = {name: tmp_path / f"{name}.csv" for name in ("a", "b", "c")}
+    for name, file in files.items():
+        file.write_text(name)
+
+    db_worker = _incremental_worker(tmp_path / "test.db")
+    assert db_worker.index_column == RAW_ROWID_COLUMN
+    assert db_worker.sync_manifest(list(files.values())) == list(files.values())
+    for name, file in files.items():
+        _load_file(db_worker, file, [name, name])
+    db_worker.finish_ingest()
+    db_worker.close()
+    assert (tmp_path / "test.db").exists()
+
+    files["a"].write_text("changed")
+    files["b"].touch()
+    files["c"].unlink()
+    db_worker = _incremental_worker(tmp_path / "test.db")
+
+    to_load = db_worker.sync_manifest([files["a"], files["b"]])
+
+    raw_brands = db_worker.perform_query(
+        f"SELECT brand FROM {db_worker.raw_tbl_name}"
+    ).fetchall()
+    affected = db_worker.perform_query("SELECT COUNT(*) FROM affected_keys")
+    assert to_load == [files["a"]]
+    assert raw_brands == [("b",), ("b",)]
+    assert affected.fetchone()[0] == 4
+    db_worker.close()
+
+
+def test_incremental_refresh_data_table(tmp_path):
+    file = tmp_path / "a.csv"
+    file.write_text("a")
+    db_worker = _incremental_worker(tmp_path / "test.db")
+    _load_file(db_worker, file, ["Samsung", "Apple"])
+    db_worker.finish_ingest()
+
+    # rows are refreshed only for affected keys
+    db_worker.refresh_data_table()
+    assert db_worker.perform_query("SELECT COUNT(*) FROM data_table").fetchone() == (0,)
+
+    db_worker.refresh_data_table(all_keys=True)
+    db_worker.update_index_from_data()
+
+    rows = db_worker.perform_query(
+        f"SELECT brand, {normalized_name('brand')} FROM data_table_distinct"
+    ).fetchall()
+    assert sorted(rows) == [("Apple", "APPLE"), ("Samsung", "SAMSUNG")]
+    db_worker.close()
+
+
+def test_incremental_state_reset_on_layout_change(tmp_path):
+    db_worker = _incremental_worker(tmp_path / "test.db")
+    db_worker.finish_ingest()
+
+    assert not db_worker.check_ingest_state("layout", "rules")
+    assert db_worker.check_ingest_state("layout", "new rules")
+    assert db_worker.check_ingest_state("new layout", "rules")
+    assert not db_worker.tbl_exists(db_worker.raw_tbl_name)
+    db_worker.close()
+
+
+def test_replace_highest_index_wins_per_column(db_worker):
+    _load_brands(db_worker, ["Samsung", "Apple"])
+    db_worker.add_columns(db_worker.data_tbl_name, cat="TEXT")
+    db_worker._extra_columns = ["tag", "cat"]
+    rules = pl.DataFrame(
+        {
+            MappingColumns.mapping_index: [1, 2, 3],
+            "tag": ["t1", "t2", None],
+            "cat": ["c1", None, "c3"],
+        }
+    )
+    db_worker.db_con.executemany(
+        "INSERT INTO full_matches_table VALUES (?, ?)",
+        [(1, 1), (1, 2), (1, 3), (2, 1)],
+    )
+    db_worker.frame_to_sql(rules, "mapping_table")
+
+    # rules without value in a column do not override it
+    db_worker.apply_mapping("mapping_table", ActionType.REPLACE, rules.columns)
+
+    rows = db_worker.perform_query(
+        f"SELECT tag, cat FROM {db_worker.data_tbl_name} ORDER BY rowid"
+    ).fetchall()
+    assert rows == [("t2", "c3"), ("t1", "c1")]
+
+
+def test_add_tags_sorted_and_deduplicated(db_worker):
+    _load_brands(db_worker, ["Samsung", "Apple", "Lenta"])
+    db_worker.add_columns(db_worker.data_tbl_name, cat="TEXT")
+    db_worker._extra_columns = ["tag", "cat"]
+    rules = pl.DataFrame(
+        {
+            MappingColumns.mapping_index: [1, 2, 3],
+            "tag": ["b", "a", "b"],
+            "cat": ["c1", None, ""],
+        }
+    )
+    db_worker.db_con.executemany(
+        "INSERT INTO full_matches_table VALUES (?, ?)",
+        [(1, 1), (1, 2), (1, 3), (2, 3)],
+    )
+    db_worker.frame_to_sql(rules, "mapping_table")
+
+    updated = db_worker.apply_mapping("mapping_table", ActionType.ADD, rules.columns)
+
+    rows = db_worker.perform_query(
+        f"SELECT tag, cat FROM {db_worker.data_tbl_name} ORDER BY rowid"
+    ).fetchall()
+    assert rows == [("a, b", "c1"), ("b", None), (None, None)]
+    assert updated == 2
+
+
+def _values(db_worker, table: str) -> list[tuple]:
+    return db_worker.perform_query(f"SELECT v FROM {table} ORDER BY v").fetchall()
+
+
+def test_transaction_commit_and_rollback(db_worker):
+    db_worker.perform_query("CREATE TABLE t (v INTEGER)")
+
+    with db_worker.transaction():
+        db_worker.perform_query("INSERT INTO t VALUES (1)")
+    with pytest.raises(ValueError):
+        with db_worker.transaction():
+            db_worker.perform_query("INSERT INTO t VALUES (2)")
+            raise ValueError
+
+    assert not db_worker.db_con.in_transaction
+    assert _values(db_worker, "t") == [(1,)]
+
+
+def test_transaction_savepoint_keeps_earlier_work(db_worker):
+    db_worker.perform_query("CREATE TABLE t (v INTEGER)")
+
+    with db_worker.transaction():
+        db_worker.perform_query("INSERT INTO t VALUES (1)")
+        with pytest.raises(ValueError):
+            with db_worker.transaction(savepoint="block"):
+                db_worker.perform_query("INSERT INTO t VALUES (2)")
+                raise ValueError
+        # frames are written by the sqlite3 connection inside a transaction
+        db_worker.frame_to_sql(pl.DataFrame({"v": [3]}), "t", if_table_exists="append")
+
+    assert _values(db_worker, "t") == [(1,), (3,)]
@@ -123,21 +123,6 @@ def test_drop_empty_columns():
     assert "b" not in result.columns
 
 
-def test_group_by_cols():
-    df = pl.DataFrame(
-        [
-            {"a": 1, "b": None},
-            {"a": 2, "b": None},
-            {"a": 3, "b": 4},
-        ]
-    )
-
-    groups = list(MappingDict.group_by_cols(df))
-
-    assert len(groups) == 2
-    assert groups[0].height == 2
-
-
 def test_like_pattern_full():
     expr = MappingDict._build_search_like_pattern("match", "term")
 
@@ -156,3 +141,92 @@ def test_like_pattern_partial():
     result = df.with_columns(expr.alias("pattern"))
 
     assert result["pattern"][0] == "%APP%"
+
+
+def test_compiled_dictionary_roundtrip(
+    sample_dictionary, dict_indexes, tmp_path, mocker
+):
+    tbl_columns = ["adId", "channelName", "brand", "tag"]
+    compiled_path = tmp_path / "compiled" / "key"
+
+    built = MappingDict(data=sample_dictionary, action_col_indexes=dict_indexes)
+    built.build_mapping(
+        *tbl_columns, extra_col_names=["tag"], compiled_path=compiled_path
+    )
+    loaded = MappingDict(data=sample_dictionary, action_col_indexes=dict_indexes)
+    # compiled frames are loaded instead of being built
+    mocker.patch.object(MappingDict, "_build_query", side_effect=AssertionError)
+    loaded.build_mapping(
+        *tbl_columns, extra_col_names=["tag"], compiled_path=compiled_path
+    )
+
+    assert loaded.like_data.equals(built.like_data)
+    assert loaded.fts_data.equals(built.fts_data)
+    assert loaded.search_columns == built.search_columns
+    built_blocks = list(built.generate_rules_blocks())
+    loaded_blocks = list(loaded.generate_rules_blocks())
+    assert [action for action, _ in loaded_blocks] == [a for a, _ in built_blocks]
+    for (_, loaded_df), (_, built_df) in zip(loaded_blocks, built_blocks, strict=True):
+        assert loaded_df.equals(built_df)
+
+
+def test_compiled_dictionary_replaces_old_versions(
+    sample_dictionary, dict_indexes, tmp_path
+):
+    for key in ("old", "new"):
+        mapping = MappingDict(data=sample_dictionary, action_col_indexes=dict_indexes)
+        mapping.build_mapping(
+            "brand",
+            "tag",
+            extra_col_names=["tag"],
+            compiled_path=tmp_path / "compiled" / key,
+        )
+
+    assert [p.name for p in (tmp_path / "compiled").iterdir()] == ["new"]
+
+
+def test_compiled_dictionary_saved_by_concurrent_runs(
+    sample_dictionary, dict_indexes, tmp_path
+):
+    compiled = tmp_path / "compiled"
+    # folder being written by another run and an old version
+    (compiled / "key.other.tmp").mkdir(parents=True)
+    (compiled / "old").mkdir()
+    mapping = MappingDict(data=sample_dictionary, action_col_indexes=dict_indexes)
+    mapping.build_mapping("brand", "tag", extra_col_names=["tag"])
+
+    mapping._save_compiled(compiled / "key")
+    # the same version saved by another run is kept
+    mapping._save_compiled(compiled / "key")
+
+    assert sorted(p.name for p in compiled.iterdir()) == ["key", "key.other.tmp"]
+    assert (compiled / "key" / MappingDict.COMPILED_META).is_file()
+
+
+def test_build_fts_query(dict_indexes, caplog):
+    data = pl.DataFrame(
+        [
+            ["r", "fts", "1|2", None, "канал|(A OR B)", "x"],
+            ["r", "fts", " 2 ", None, 'say "hi"', "x"],
+            ["r", "fts", "1|2", None, "one term", "x"],
+            ["r", "fts", "9", None, "no column", "x"],
+            ["r", "fts", None, None, "no index", "x"],
+        ],
+        schema=["action", "match", "search", "extra_col", "term", "tag"],
+        orient="row",
+    )
+    mapping = MappingDict(data=data, action_col_indexes=dict_indexes)
+
+    mapping.build_mapping("adId", "channelName", "brand", extra_col_names=["tag"])
+
+    assert mapping.fts_data[MappingColumns.pattern].to_list() == [
+        'channelName:"(канал)" brand:(A OR B)',
+        'brand:"(say hi)"',
+        "",
+        "",
+        "",
+    ]
+    assert mapping.search_columns == {"channelName", "brand"}
+    warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 1
+    assert "3 invalid fts search terms" in warnings[0].message
@@ -0,0 +1,203 @@
+import sqlite3
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from mko_data_cleaner.core.db_service import DBWorker
+from mko_data_cleaner.core.matchers import normalize_expr, normalized_name
+from mko_data_cleaner.core.models import MappingColumns
+from mko_data_cleaner.core.query_profiler import QueryProfiler
+
+
+@pytest.fixture
+def cache_file(tmp_path: Path) -> Path:
+    return tmp_path / "match_cache.db"
+
+
+def _worker(
+    tmp_path: Path,
+    cache_file: Path,
+    brands: list[str | None],
+    max_values: int = 100,
+    profiler: QueryProfiler | None = None,
+    use_fts: bool = False,
+) -> DBWorker:
+    """New worker with the match cache and data of brands loaded and indexed."""
+    db_file = tmp_path / "test.db"
+    db_file.unlink(missing_ok=True)
+    db_worker = DBWorker(
+        db_file=db_file,
+        tbl_name="data_table",
+        match_cache_file=cache_file,
+        match_cache_size=max_values,
+        profiler=profiler,
+    )
+    db_worker.set_data_tbl_columns("id", "brand", extra_cols=["tag"])
+    db_worker.search_columns = ["brand"]
+    db_worker.create_table(
+        db_worker.data_tbl_name,
+        *db_worker.data_tbl_columns,
+        *db_worker.normalized_columns.values(),
+    )
+    db_worker.create_rules_matches()
+    if use_fts:
+        db_worker.link_search_table()
+    data = pl.DataFrame(
+        {"id": [str(i) for i in range(1, len(brands) + 1)], "brand": brands},
+        schema={"id": pl.Utf8, "brand": pl.Utf8},
+    ).with_columns(normalize_expr(pl.col("brand")).alias(normalized_name("brand")))
+    db_worker.frame_to_sql(data, db_worker.data_tbl_name, if_table_exists="append")
+    db_worker.create_search_indexes()
+    db_worker.build_distinct_values()
+    return db_worker
+
+
+def _matches(db_worker: DBWorker) -> tuple[set[tuple[int, int]], int]:
+    """Matches of the run and cache misses count."""
+    matches = set(
+        db_worker.perform_query(
+            f"SELECT {MappingColumns.data_rowid}, {MappingColumns.mapping_index} "
+            f"FROM full_matches_table"
+        ).fetchall()
+    )
+    (misses,) = db_worker.perform_query("SELECT COUNT(*) FROM value_misses").fetchone()
+    return matches, misses
+
+
+def _run_like(
+    tmp_path: Path,
+    cache_file: Path,
+    brands: list[str | None],
+    patterns: list[str],
+    max_values: int = 100,
+    profiler: QueryProfiler | None = None,
+) -> tuple[set[tuple[int, int]], int]:
+    """Match LIKE rules with a new worker, return matches and cache misses count."""
+    with _worker(tmp_path, cache_file, brands, max_values, profiler) as db_worker:
+        db_worker.frame_to_sql(
+            pl.DataFrame(
+                {
+                    MappingColumns.mapping_index: list(range(1, len(patterns) + 1)),
+                    MappingColumns.column_name: ["brand"] * len(patterns),
+                    MappingColumns.pattern: patterns,
+                }
+            ),
+            "like_rules",
+        )
+        db_worker.insert_matches("like_rules")
+        return _matches(db_worker)
+
+
+def _run_fts(
+    tmp_path: Path,
+    cache_file: Path,
+    brands: list[str | None],
+    patterns: list[str],
+    profiler: QueryProfiler | None = None,
+) -> tuple[set[tuple[int, int]], int]:
+    """Match fts rules with a new worker, return matches and cache misses count."""
+    with _worker(
+        tmp_path, cache_file, brands, profiler=profiler, use_fts=True
+    ) as db_worker:
+        db_worker.frame_to_sql(
+            pl.DataFrame(
+                {
+                    MappingColumns.mapping_index: list(range(1, len(patterns) + 1)),
+                    MappingColumns.pattern: patterns,
+                }
+            ),
+            "fts_rules",
+        )
+        db_worker.insert_matches_from_fts("fts_rules")
+        return _matches(db_worker)
+
+
+def test_match_cache_reused_between_runs(tmp_path, cache_file):
+    brands = ["Samsung", "APPLE", "samsung", "Samsung Galaxy"]
+
+    first, first_misses = _run_like(tmp_path, cache_file, brands, ["SAMS_NG%"])
+    second, second_misses = _run_like(tmp_path, cache_file, brands, ["SAMS_NG%"])
+
+    assert first == second == {(1, 1), (3, 1), (4, 1)}
+    assert first_misses == 3
+    assert second_misses == 0
+
+
+def test_match_cache_only_new_values_evaluated(tmp_path, cache_file):
+    _run_like(tmp_path, cache_file, ["Samsung", "APPLE"], ["SAMS_NG%"])
+
+    matches, misses = _run_like(
+        tmp_path, cache_file, ["Samsung", "APPLE", "Samsung Galaxy"], ["SAMS_NG%"]
+    )
+
+    assert matches == {(1, 1), (3, 1)}
+    assert misses == 1
+
+
+def test_match_cache_rules_change_misses(tmp_path, cache_file):
+    brands = ["Samsung", "APPLE"]
+    _run_like(tmp_path, cache_file, brands, ["SAMS_NG%"])
+
+    matches, misses = _run_like(tmp_path, cache_file, brands, ["APP%"])
+
+    assert matches == {(2, 1)}
+    assert misses == 2
+
+
+def test_match_cache_eviction(tmp_path, cache_file):
+    _run_like(tmp_path, cache_file, ["Samsung", "APPLE"], ["SAMS_NG%"])
+    _run_like(tmp_path, cache_file, ["Lenta"], ["%"], max_values=2)
+
+    con = sqlite3.connect(cache_file)
+    values = con.execute("SELECT value FROM cached_values").fetchall()
+    orphans = con.execute("""
+        SELECT COUNT(*)
+        FROM cached_matches AS m
+        LEFT JOIN cached_values AS v
+        USING (rules_key, value)
+        WHERE v.value IS NULL
+        """).fetchone()[0]
+    con.close()
+
+    # values used by the last run are evicted last
+    assert len(values) == 2
+    assert ("LENTA",) in values
+    assert orphans == 0
+
+
+def test_match_cache_statements_profiled(tmp_path, cache_file):
+    profiler = QueryProfiler()
+
+    _run_like(tmp_path, cache_file, ["Samsung"], ["SAMS_NG%"], profiler=profiler)
+
+    queries = [r["query"] for r in profiler.records]
+    # matching of cache misses runs inside the cache store statement
+    (store,) = [
+        q for q in queries if q.startswith("INSERT INTO match_cache.cached_matches")
+    ]
+    assert "LIKE rules.pattern ) AS hits" in store
+    assert any(q.startswith("CREATE TEMP TABLE value_misses") for q in queries)
+
+
+def test_match_cache_fts_matches_only_new_tuples(tmp_path, cache_file):
+    patterns = ['brand:"(samsung)"']
+    first, first_misses = _run_fts(tmp_path, cache_file, ["Samsung", "APPLE"], patterns)
+    profiler = QueryProfiler()
+
+    second, second_misses = _run_fts(
+        tmp_path,
+        cache_file,
+        ["Samsung", "APPLE", "Samsung Galaxy"],
+        patterns,
+        profiler=profiler,
+    )
+
+    assert first == {(1, 1)} and first_misses == 2
+    assert second == {(1, 1), (3, 1)} and second_misses == 1
+    # rules are matched against an index of missing tuples only,
+    # the full index is neither queried nor rebuilt
+    queries = [r["query"] for r in profiler.records]
+    assert any("FROM data_table_fts_misses JOIN fts_rules" in q for q in queries)
+    assert not any("FROM data_table_fts JOIN" in q for q in queries)
+    assert not any("VALUES ('rebuild')" in q for q in queries)
@@ -0,0 +1,119 @@
+import random
+import sqlite3
+
+import polars as pl
+
+from mko_data_cleaner.core.matchers import (
+    AhoCorasick,
+    MultiPatternMatcher,
+    normalize_expr,
+    split_plain_rules,
+)
+from mko_data_cleaner.core.models import MappingColumns, MatchType
+
+
+def test_aho_corasick_overlapping():
+    ac = AhoCorasick()
+    for word in ("HE", "SHE", "HIS", "HERS"):
+        ac.add(word, word)
+    ac.build()
+
+    found = {(start, end, word) for start, end, word in ac.iter_matches("USHERS")}
+
+    assert found == {(1, 4, "SHE"), (2, 4, "HE"), (2, 6, "HERS")}
+
+
+def test_normalize_expr():
+    df = pl.DataFrame({"a": ["apple  inc ", "\tЛента\nмаркет", None]})
+
+    result = df.select(normalize_expr(pl.col("a")))
+
+    assert result["a"].to_list() == ["APPLE INC", "ЛЕНТА МАРКЕТ", None]
+
+
+def test_split_plain_rules():
+    like_data = pl.DataFrame(
+        {
+            MappingColumns.mapping_index: [1, 2, 3, 4, 5],
+            MappingColumns.match: ["f", "p", "s", "e", "p"],
+            MappingColumns.column_name: ["a", "a", "a", "a", "a"],
+            MappingColumns.term: ["x", "y", "z", "w", "1%"],
+            MappingColumns.pattern: ["X", "%Y%", "Z%", "%W", "%1%%"],
+        }
+    )
+
+    plain, rest = split_plain_rules(
+        like_data, MatchType.PARTIAL_MATCH, MatchType.STARTS_WITH, MatchType.ENDS_WITH
+    )
+
+    assert plain[MappingColumns.mapping_index].to_list() == [2, 3, 4]
+    assert plain[MappingColumns.term].to_list() == ["Y", "Z", "W"]
+    assert rest[MappingColumns.mapping_index].to_list() == [1, 5]
+
+
+def test_split_plain_rules_full_match():
+    like_data = pl.DataFrame(
+        {
+            MappingColumns.mapping_index: [1, 2, 3],
+            MappingColumns.match: ["f", "f", "p"],
+            MappingColumns.column_name: ["a", "a", "a"],
+            MappingColumns.term: ["x", "x_1", "y"],
+            MappingColumns.pattern: ["X", "X_1", "%Y%"],
+        }
+    )
+
+    exact, rest = split_plain_rules(like_data, MatchType.FULL_MATCH)
+
+    assert exact[MappingColumns.mapping_index].to_list() == [1]
+    assert exact[MappingColumns.term].to_list() == ["X"]
+    assert rest[MappingColumns.mapping_index].to_list() == [2, 3]
+
+
+def test_multi_pattern_matcher_same_as_like():
+    """Results must be the same as SQLite `LIKE` over normalized values."""
+    rnd = random.Random(42)
+    alphabet = "abAB лЛ"
+    raw_values = [
+        "".join(rnd.choices(alphabet, k=rnd.randint(1, 8))) for _ in range(300)
+    ]
+    values = (
+        pl.DataFrame({"v": raw_values})
+        .select(normalize_expr(pl.col("v")))["v"]
+        .to_list()
+    )
+    terms = ["".join(rnd.choices(alphabet, k=rnd.randint(1, 3))) for _ in range(30)]
+    match_types = [MatchType.PARTIAL_MATCH, MatchType.STARTS_WITH, MatchType.ENDS_WITH]
+
+    like_data = pl.DataFrame(
+        {
+            MappingColumns.mapping_index: list(range(1, len(terms) + 1)),
+            MappingColumns.match: [rnd.choice(match_types) for _ in terms],
+            MappingColumns.column_name: ["a"] * len(terms),
+            MappingColumns.term: terms,
+        }
+    ).with_columns(
+        pl.when(pl.col(MappingColumns.match) == MatchType.PARTIAL_MATCH)
+        .then(pl.concat_str(pl.lit("%"), pl.col(MappingColumns.term), pl.lit("%")))
+        .when(pl.col(MappingColumns.match) == MatchType.STARTS_WITH)
+        .then(pl.concat_str(pl.col(MappingColumns.term), pl.lit("%")))
+        .otherwise(pl.concat_str(pl.lit("%"), pl.col(MappingColumns.term)))
+        .str.to_uppercase()
+        .alias(MappingColumns.pattern)
+    )
+    multi_pattern, _ = split_plain_rules(like_data, *match_types)
+
+    matcher = MultiPatternMatcher(multi_pattern)
+    found = set(matcher.match_values(values))
+
+    con = sqlite3.connect(":memory:")
+    expected = {
+        (value, mapping_index)
+        for value in values
+        for mapping_index, pattern in like_data.select(
+            MappingColumns.mapping_index, MappingColumns.pattern
+        ).iter_rows()
+        if con.execute("SELECT ? LIKE ?", (value, pattern)).fetchone()[0]
+    }
+    con.close()
+
+    assert found == expected
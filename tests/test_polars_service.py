@@ -0,0 +1,163 @@
+import polars as pl
+import pytest
+
+from mko_data_cleaner.core.dict_service import MappingDict
+from mko_data_cleaner.core.models import ActionType, MappingColumns
+from mko_data_cleaner.core.polars_service import PolarsWorker, like_to_regex
+
+
+@pytest.fixture
+def rules_dictionary():
+    data = [
+        ["r", "f", "2", None, "apple inc", "APPLE", None],
+        ["r", "p", "3", None, "SMART", "SMARTPHONES", None],
+        ["r", "f", "2", None, "APPLE INC", "APPLE CLEAN", None],
+        ["a", "s", "2", None, "SAM", None, "KOREA"],
+        ["a", "e", "3", None, "S25", None, "GALAXY"],
+        ["d", "f", "2", None, "DELETE ME", None, None],
+        ["r", "fts", "2|3", None, "OZON|MARKET", "OZON", None],
+    ]
+    return pl.DataFrame(
+        data,
+        schema=["action", "match", "search", "note", "term", "brand_clean", "tag"],
+        orient="row",
+    )
+
+
+@pytest.fixture
+def source_data():
+    return pl.LazyFrame(
+        {
+            "adId": ["1", "2", "2", "3", "4", "5"],
+            "researchDate": ["2024-01-01"] * 6,
+            "brand": [
+                " apple  inc",
+                "SAMSUNG",
+                "SAMSUNG",
+                "DELETE ME",
+                "OZON",
+                "Лента",
+            ],
+            "product": ["SMART TV", "GALAXY S25", "GALAXY S25", None, "MARKET", None],
+        }
+    )
+
+
+@pytest.fixture
+def mapping_and_worker(rules_dictionary, dict_indexes, source_data):
+    mapping = MappingDict(data=rules_dictionary, action_col_indexes=dict_indexes)
+    worker = PolarsWorker(index_column="adId", date_column="researchDate")
+    worker.set_data_tbl_columns(
+        *source_data.collect_schema().names(), extra_cols=mapping.extra_col_names
+    )
+    mapping.build_mapping(
+        *worker.data_tbl_columns, extra_col_names=worker.extra_columns
+    )
+    worker.search_columns = mapping.search_columns
+    return mapping, worker
+
+
+@pytest.fixture
+def polars_worker(mapping_and_worker, source_data):
+    mapping, worker = mapping_and_worker
+    worker.load_data(source_data)
+    worker.match_rules(mapping)
+    worker.apply_rules(mapping, separator=", ")
+    return worker
+
+
+def test_like_to_regex():
+    assert like_to_regex("%APP%") == "(?s)^.*APP.*$"
+    assert like_to_regex("A_B") == "(?s)^A.B$"
+    assert like_to_regex("A.B") == r"(?s)^A\.B$"
+
+
+def test_like_matches_by_match_type():
+    worker = PolarsWorker(index_column="adId")
+    worker.set_data_tbl_columns("adId", "brand", extra_cols=["tag"])
+    worker.search_columns = ["brand"]
+    brands = ["SAMSUNG", "GALAXY SAM", "ASAMA", "SAM", "X_Y", "xzy"]
+    worker.load_data(
+        pl.LazyFrame({"adId": [str(i) for i in range(1, 7)], "brand": brands})
+    )
+    rules = pl.DataFrame(
+        [
+            [1, "brand", "p", "%SAM%", "SAM"],
+            [2, "brand", "s", "SAM%", "SAM"],
+            [3, "brand", "e", "%SAM", "SAM"],
+            [4, "brand", "p", "%SA%", "SA"],
+            # wildcard inside the term of a full match rule
+            [5, "brand", "f", "X_Y", "X_Y"],
+            [6, "brand", "f", "SAM", "SAM"],
+        ],
+        schema=[
+            MappingColumns.mapping_index,
+            MappingColumns.column_name,
+            MappingColumns.match,
+            MappingColumns.pattern,
+            MappingColumns.term,
+        ],
+        orient="row",
+    )
+
+    exact, like = worker._like_matches(rules)
+
+    def pairs(frame: pl.DataFrame) -> set[tuple[str, int]]:
+        return set(frame.iter_rows())
+
+    assert pairs(exact) == {("4", 6)}
+    assert pairs(like) == {
+        *(("1", 1), ("2", 1), ("3", 1), ("4", 1)),
+        *(("1", 2), ("4", 2)),
+        *(("2", 3), ("4", 3)),
+        *(("1", 4), ("2", 4), ("3", 4), ("4", 4)),
+        *(("5", 5), ("6", 5)),
+    }
+
+
+def test_target_distinct_by_index(polars_worker):
+    # 5 distinct adId, one of them deleted
+    assert polars_worker.target.height == 4
+    assert polars_worker.data.height == 6
+
+
+def test_rules_counters(mapping_and_worker, source_data):
+    mapping, worker = mapping_and_worker
+
+    assert worker.load_data(source_data) == 6
+    assert worker.match_rules(mapping) == {"full_match": 3, "like": 3, "fts": 1}
+    assert worker.apply_rules(mapping) == {
+        ActionType.DELETE: 1,
+        ActionType.REPLACE: 2,
+        ActionType.ADD: 1,
+    }
+
+
+def test_apply_rules(polars_worker):
+    result = polars_worker.result()
+    by_id = {row["adId"]: row for row in result.iter_rows(named=True)}
+
+    # DELETE
+    assert "3" not in by_id
+    # REPLACE - highest mapping_index wins
+    assert by_id["1"]["brand_clean"] == "APPLE CLEAN"
+    # ADD - sorted unique tags, all rows with the same index
+    assert by_id["2"]["tag"] == "GALAXY, KOREA"
+    assert result.filter(pl.col("adId") == "2").height == 2
+    # FTS
+    assert by_id["4"]["brand_clean"] == "OZON"
+    # not matched
+    assert by_id["5"]["brand_clean"] is None
+    # values are kept as is
+    assert by_id["1"]["brand"] == " apple  inc"
+
+
+def test_result_keeps_columns_order(polars_worker):
+    assert polars_worker.result().columns == polars_worker.data_tbl_columns
+
+
+def test_non_mapped(polars_worker):
+    non_mapped = polars_worker.non_mapped()
+
+    assert set(non_mapped.columns) == {"brand", "product", "brand_clean", "tag"}
+    assert "Лента" in non_mapped["brand"].to_list()
@@ -0,0 +1,40 @@
+import json
+
+from mko_data_cleaner.core.query_profiler import QueryProfiler
+
+
+def test_profiler_records_tagged_statements(db_worker):
+    db_worker.profiler = QueryProfiler()
+    db_worker.perform_query("CREATE TABLE t (v INTEGER)")
+
+    with db_worker.profile_scope("apply", "a"):
+        db_worker.perform_query("INSERT INTO t VALUES (1), (2)")
+        db_worker.perform_query("UPDATE t SET v = v + 1 WHERE v > 1")
+
+    create, insert, update = db_worker.profiler.records
+    assert create["phase"] is None
+    assert (insert["phase"], insert["block"], insert["rows_changed"]) == (
+        "apply",
+        "a",
+        2,
+    )
+    assert update["rows_changed"] == 1
+    assert update["plan"] == ["SCAN t"]
+    assert db_worker.profiler.phase is None
+
+
+def test_profiler_report(db_worker, tmp_path):
+    profiler = QueryProfiler()
+    db_worker.profiler = profiler
+    db_worker.perform_query("CREATE TABLE t (v INTEGER)")
+    db_worker.perform_query("CREATE INDEX t_v_index ON t(v)")
+    with profiler.tag("match"):
+        db_worker.perform_query("SELECT * FROM t WHERE v = 1")
+
+    report = json.loads(profiler.save(tmp_path / "profile.json").read_text())
+
+    seconds = [r["seconds"] for r in report]
+    assert seconds == sorted(seconds, reverse=True)
+    (select,) = [r for r in report if r["phase"] == "match"]
+    assert select["full_scans"] == []
+    assert "SQL profile: 3 statements" in profiler.summary()
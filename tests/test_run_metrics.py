@@ -0,0 +1,63 @@
+import json
+
+import polars as pl
+
+from mko_data_cleaner.core.run_metrics import RunMetrics
+
+
+def test_phase_counters_accumulate():
+    metrics = RunMetrics("sqlite")
+
+    with metrics.phase("match") as counters:
+        counters["rows"] = 10
+    with metrics.phase("match"):
+        metrics.count("match", "fts", 2)
+    metrics.count("match", "fts", 3)
+
+    phase = metrics.report()["phases"]["match"]
+    assert phase["rows"] == 10
+    assert phase["fts"] == 5
+    assert phase["seconds"] >= 0
+    assert "rows_per_s" in phase
+
+
+def test_merge_phases_of_processes():
+    metrics = RunMetrics("sqlite")
+    metrics.merge({"match": {"seconds": 2.0, "fts": 1}})
+    metrics.merge({"match": {"seconds": 1.0, "fts": 2}, "sync": {"seconds": 0.5}})
+
+    phases = metrics.report()["phases"]
+    assert phases["match"] == {"seconds": 2.0, "fts": 3}
+    assert phases["sync"] == {"seconds": 0.5}
+
+
+def test_track_files(tmp_path):
+    files = [tmp_path / "a.csv", tmp_path / "b.csv"]
+    for file in files:
+        file.write_text("x\n1\n")
+    chunks = [
+        (files[0], pl.DataFrame({"x": [1, 2]})),
+        (files[0], pl.DataFrame({"x": [3]})),
+        (files[1], pl.DataFrame({"x": [4]})),
+    ]
+    metrics = RunMetrics("sqlite")
+
+    passed = list(metrics.track_files(chunks))
+
+    assert passed == chunks
+    assert [(f["file"], f["rows"], f["bytes"]) for f in metrics.files] == [
+        ("a.csv", 3, 4),
+        ("b.csv", 1, 4),
+    ]
+
+
+def test_save_report(tmp_path):
+    metrics = RunMetrics("polars")
+    with metrics.phase("export") as counters:
+        counters["rows"] = 5
+
+    report = json.loads(metrics.save(tmp_path / "metrics.json").read_text())
+
+    assert report["engine"] == "polars"
+    assert report["phases"]["export"]["rows"] == 5
+    assert report["total_seconds"] >= report["phases"]["export"]["seconds"]
@@ -0,0 +1,37 @@
+import polars as pl
+
+from mko_data_cleaner.core.shard_service import ShardSpool
+
+
+def test_keys_stay_in_one_shard(tmp_path):
+    spool = ShardSpool(tmp_path / "spool", shards=3, index_column="ad_id")
+    chunks = [
+        pl.DataFrame(
+            {"ad_id": [str(i % 10) for i in range(n, n + 20)], "n": range(n, n + 20)}
+        )
+        for n in (0, 20)
+    ]
+
+    rows = sum(spool.write(chunk) for chunk in chunks)
+
+    shards = [pl.concat(spool.read(shard)) for shard in range(3)]
+    assert rows == sum(s.height for s in shards) == 40
+    keys = [set(s["ad_id"]) for s in shards]
+    assert set.union(*keys) == {str(i) for i in range(10)}
+    assert sum(len(k) for k in keys) == 10
+    # rows of a shard keep the order they were written in
+    for shard in shards:
+        assert shard.columns == ["ad_id", "n"]
+        assert shard["n"].is_sorted()
+
+
+def test_spool_is_recreated(tmp_path):
+    path = tmp_path / "spool"
+    spool = ShardSpool(path, shards=2, index_column="ad_id")
+    spool.write(pl.DataFrame({"ad_id": ["1", "2"]}))
+
+    spool = ShardSpool(path, shards=2, index_column="ad_id")
+    assert [list(spool.read(shard)) for shard in range(2)] == [[], []]
+
+    spool.clear()
+    assert not path.exists()